@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Benchmark da conversão de datas: to_datetime(dayfirst) por célula x formato detectado + cache de valores distintos
+"""
+
+import sys
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).parent.parent))
+from benchmarks.suite import medir
+from src.utils import converter_datas
+
+
+def gerar_coluna_datas(n_linhas: int, semente: int = 42) -> pd.Series:
+    """Coluna como o Excel entrega: dd/mm/aaaa em texto, alguns datetimes, ISO e marcadores"""
+    rng = np.random.default_rng(semente)
+    datas = pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 600, n_linhas), unit='D')
+    serie = pd.Series(datas.strftime('%d/%m/%Y'), dtype=object)
+
+    sorteio = rng.random(n_linhas)
+    serie[sorteio < 0.05] = pd.Series(datas[sorteio < 0.05]).to_numpy()
+    iso = (sorteio >= 0.05) & (sorteio < 0.08)
+    serie[iso] = datas[iso].strftime('%Y-%m-%d %H:%M:%S')
+    serie[(sorteio >= 0.08) & (sorteio < 0.09)] = '#N/D'
+    serie[sorteio >= 0.97] = None
+    return serie
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark da conversão de datas')
+    parser.add_argument('--linhas', type=int, default=1_000_000, help='Quantidade de registros')
+    parser.add_argument('--repeticoes', type=int, default=3, help='Repetições de cada implementação')
+    args = parser.parse_args()
+
+    serie = gerar_coluna_datas(args.linhas)
+    print(f"📊 Registros: {args.linhas:,}")
+
+    tempo_legado = min(medir(lambda: pd.to_datetime(serie, errors='coerce', dayfirst=True), args.repeticoes))
+    tempo_misto = min(medir(lambda: pd.to_datetime(serie, errors='coerce', dayfirst=True, format='mixed'), args.repeticoes))
+    tempo_formato = min(medir(lambda: converter_datas(serie, '%d/%m/%Y'), args.repeticoes))
+
+    # Referência: cada célula interpretada pelo seu próprio formato
+    esperado = pd.Series(pd.NaT, index=serie.index, dtype='datetime64[us]')
+    for formato in ['%d/%m/%Y', '%Y-%m-%d %H:%M:%S']:
+        faltantes = esperado.isna()
+        esperado[faltantes] = pd.to_datetime(serie[faltantes], errors='coerce', format=formato)
+    faltantes = esperado.isna()
+    esperado[faltantes] = pd.to_datetime(serie[faltantes], errors='coerce')
+
+    obtido, contagens = converter_datas(serie, '%d/%m/%Y')
+    assert esperado.equals(obtido), "Resultados divergentes da referência"
+    legado = pd.to_datetime(serie, errors='coerce', dayfirst=True)
+
+    print(f"🐢 to_datetime(dayfirst) (legado):  {tempo_legado:.3f}s | {(legado != esperado).sum():,} células divergentes")
+    print(f"🐢 to_datetime(format='mixed'):     {tempo_misto:.3f}s")
+    print(f"⚡ converter_datas:                 {tempo_formato:.3f}s ({tempo_legado / tempo_formato:.0f}x)")
+    print(f"📅 Caminhos: {contagens}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Benchmark do cálculo de Dias_Em_Aberto: apply por linha x kernel vetorizado
+"""
+
+import sys
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).parent.parent))
+from benchmarks.suite import medir
+from src.utils import calcular_dias_em_aberto, calcular_dias_em_aberto_vetorizado
+
+
+def gerar_datas_status(n_linhas: int, semente: int = 42) -> pd.Series:
+    """Gera uma coluna Data_Status sintética com ~5% de nulos"""
+    rng = np.random.default_rng(semente)
+    hoje = pd.Timestamp.now().normalize()
+    datas = hoje - pd.to_timedelta(rng.integers(-5, 120, n_linhas), unit='D')
+    serie = pd.Series(datas)
+    serie[rng.random(n_linhas) < 0.05] = pd.NaT
+    return serie
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de Dias_Em_Aberto')
+    parser.add_argument('--linhas', type=int, default=1_000_000, help='Quantidade de registros')
+    parser.add_argument('--repeticoes', type=int, default=3, help='Repetições do kernel vetorizado')
+    args = parser.parse_args()
+
+    serie = gerar_datas_status(args.linhas)
+    print(f"📊 Registros: {args.linhas:,}")
+
+    # O apply por linha é lento demais para repetir
+    tempo_apply = min(medir(lambda: serie.apply(calcular_dias_em_aberto), 1))
+    tempo_vetorizado = min(medir(lambda: calcular_dias_em_aberto_vetorizado(serie), args.repeticoes))
+
+    esperado = serie.apply(calcular_dias_em_aberto).astype('Int64')
+    obtido = calcular_dias_em_aberto_vetorizado(serie)
+    assert esperado.equals(obtido), "Resultados divergentes entre apply e kernel vetorizado"
+
+    print(f"🐢 apply por linha:  {tempo_apply:.3f}s")
+    print(f"⚡ vetorizado:       {tempo_vetorizado:.3f}s")
+    print(f"🚀 Speedup:          {tempo_apply / tempo_vetorizado:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark da limpeza de texto: replace global + astype(str) x kernel de passada única
+"""
+
+import sys
+import warnings
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).parent.parent))
+from benchmarks.suite import medir
+from src.utils import limpar_dados_problematicos
+
+
+def limpeza_legada(df: pd.DataFrame) -> pd.DataFrame:
+    """Implementação anterior de limpar_dados_problematicos (referência)"""
+    valores_problematicos = ['#N/D', '#REF!', '#VALOR!', 'N/A', 'n/a', '', ' ', 'nan']
+    df_limpo = df.replace(valores_problematicos, np.nan)
+    for col in df_limpo.select_dtypes(include=['object']).columns:
+        df_limpo[col] = df_limpo[col].astype(str).str.strip()
+        df_limpo[col] = df_limpo[col].replace('nan', np.nan)
+    return df_limpo
+
+
+def limpeza_legada_transformer(df: pd.DataFrame) -> pd.DataFrame:
+    """Implementação anterior de SafraTransformer._limpar_dados_reais (referência)"""
+    df = df.dropna(how='all')
+    for col in df.select_dtypes(include=['object']).columns:
+        df[col] = df[col].astype(str).str.strip()
+        df[col] = df[col].replace(['nan', 'None', '', 'NaT'], np.nan)
+    return df
+
+
+def gerar_relatorio(n_linhas: int, semente: int = 42) -> pd.DataFrame:
+    """Relatório sintético: textos com espaços e marcadores do Excel, números e datas"""
+    rng = np.random.default_rng(semente)
+    providers = np.array(['POLO SAO PAULO ', ' POLO RIO', 'POLO RECIFE', '#N/D', '', 'Polo Curitiba'], dtype=object)
+    status = np.array(['Aberta', ' Em trânsito', 'Entregue ', '#REF!', 'N/A'], dtype=object)
+    cidades = np.array([f" Cidade {i} " for i in range(500)] + ['#VALOR!'], dtype=object)
+
+    df = pd.DataFrame({
+        'Ordem PagBank': np.arange(n_linhas, dtype='int64'),
+        'Provider': providers[rng.integers(0, len(providers), n_linhas)],
+        'Status da Ordem': status[rng.integers(0, len(status), n_linhas)],
+        'Cidade': cidades[rng.integers(0, len(cidades), n_linhas)],
+        'SLA Cliente': rng.integers(0, 30, n_linhas).astype(float),
+        'Criação da Ordem': pd.Timestamp('2025-01-01') + pd.to_timedelta(rng.integers(0, 300, n_linhas), unit='D'),
+    })
+    for col in ['Provider', 'Status da Ordem', 'Cidade']:
+        df.loc[rng.random(n_linhas) < 0.05, col] = np.nan
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark da limpeza de texto')
+    parser.add_argument('--linhas', type=int, default=1_000_000, help='Quantidade de registros')
+    parser.add_argument('--repeticoes', type=int, default=3, help='Repetições de cada implementação')
+    args = parser.parse_args()
+
+    # O select_dtypes(include=['object']) das versões legadas emite aviso de depreciação no pandas 3
+    warnings.simplefilter('ignore', DeprecationWarning)
+
+    # Colunas de texto reproduzem a leitura antiga; a mesma base em category mostra o caso tipado
+    df = gerar_relatorio(args.linhas)
+    df_categorias = df.astype({col: 'category' for col in ['Provider', 'Status da Ordem', 'Cidade']})
+    print(f"📊 Registros: {args.linhas:,}")
+
+    tempo_legado = min(medir(lambda: limpeza_legada(df), args.repeticoes))
+    tempo_transformer = min(medir(lambda: limpeza_legada_transformer(df.copy()), args.repeticoes))
+    tempo_kernel = min(medir(lambda: limpar_dados_problematicos(df), args.repeticoes))
+    tempo_categorias = min(medir(lambda: limpar_dados_problematicos(df_categorias), args.repeticoes))
+
+    esperado = limpeza_legada(df)
+    obtido = limpar_dados_problematicos(df)
+    assert esperado.astype(str).equals(obtido.astype(str)), "Resultados divergentes entre legado e kernel"
+    obtido_categorias = limpar_dados_problematicos(df_categorias)
+    assert obtido.astype(str).equals(obtido_categorias.astype(str)), "Resultados divergentes em colunas category"
+
+    print(f"🐢 limpar_dados_problematicos (legado): {tempo_legado:.3f}s")
+    print(f"🐢 _limpar_dados_reais (legado):        {tempo_transformer:.3f}s")
+    print(f"⚡ kernel (texto):                      {tempo_kernel:.3f}s ({tempo_legado / tempo_kernel:.1f}x)")
+    print(f"⚡ kernel (category):                   {tempo_categorias:.3f}s ({tempo_legado / tempo_categorias:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Portão de regressão de performance: compara um resultado da suíte de benchmarks com a linha de base
+e falha (código de saída 1) quando algum caminho crítico fica mais lento que a tolerância ou deixa de rodar
+"""
+
+import argparse
+import json
+import shutil
+import sys
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+ARQUIVO_BASE = Path(__file__).parent / 'resultados' / 'baseline.json'
+LIMITE_PADRAO = 10.0          # % de piora tolerada em qualquer benchmark
+FATOR_RUIDO = 2.0             # a tolerância nunca fica abaixo de FATOR_RUIDO x ruído relativo (IQR / mediana)
+TEMPO_MINIMO = 0.005          # diferenças absolutas abaixo disso (s) são ruído de relógio
+DOMINANCIA_MINIMA = 0.9       # fração dos pares (atual, base) em que a execução atual foi mais lenta
+
+# Caminhos críticos com tolerância própria (padrões fnmatch sobre o nome do benchmark)
+LIMITES_BENCHMARK = {
+    'etl.upsert_ordens_caixa3': 10.0,
+    'exportador.exportar_polo_excel': 15.0,
+    'exportador.exportar_consolidado_todos_polos': 15.0
+}
+
+ROTULOS = {
+    'regressao': '❌ regressão',
+    'melhora': '🚀 melhora',
+    'estavel': '✅ estável',
+    'ruido': '⚪ ruído',
+    'falhou': '💥 falhou',
+    'ausente': '⏭️ ausente'
+}
+
+
+def carregar_resultados(caminho: Path) -> Dict[str, Any]:
+    """Lê um arquivo de resultados da suíte"""
+    with open(caminho, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def indexar(documento: Dict[str, Any]) -> Dict[Tuple[str, int], Dict[str, Any]]:
+    """Resultados por (benchmark, linhas), qualquer que seja o status"""
+    return {(resultado['benchmark'], resultado['linhas']): resultado for resultado in documento['resultados']}
+
+
+def valido(resultado: Optional[Dict[str, Any]]) -> bool:
+    return resultado is not None and resultado.get('status') == 'ok'
+
+
+def selecionado(documento: Dict[str, Any], nome: str, n_linhas: int) -> bool:
+    """Se a execução pretendia rodar o benchmark nesse tamanho (a suíte grava os tamanhos e filtros usados)"""
+    selecao = documento.get('selecao')
+    if selecao is None:
+        return True
+    filtros = selecao.get('filtros')
+    return n_linhas in selecao['tamanhos'] and (not filtros or any(filtro in nome for filtro in filtros))
+
+
+def limite_benchmark(nome: str, limite_padrao: float, limites: Dict[str, float]) -> float:
+    """Tolerância configurada (%) para o benchmark: o padrão mais específico que casar, senão o global"""
+    candidatos = [(len(padrao), limite) for padrao, limite in limites.items() if fnmatch(nome, padrao)]
+    return max(candidatos)[1] if candidatos else limite_padrao
+
+
+def ruido_relativo(resultado: Dict[str, Any]) -> float:
+    """Dispersão das repetições em relação à mediana"""
+    if not resultado['mediana_s']:
+        return 0.0
+    return resultado.get('iqr_s', 0.0) / resultado['mediana_s']
+
+
+def dominancia(mais_lento: List[float], mais_rapido: List[float]) -> float:
+    """Fração dos pares de repetições em que o primeiro conjunto foi mais lento (estatística U de Mann-Whitney)"""
+    pares = [(a > b) + 0.5 * (a == b) for a in mais_lento for b in mais_rapido]
+    return sum(pares) / len(pares)
+
+
+def comparar(base: Dict[str, Any], atual: Dict[str, Any], limite_padrao: float = LIMITE_PADRAO,
+             limites: Optional[Dict[str, float]] = None, fator_ruido: float = FATOR_RUIDO,
+             tempo_minimo: float = TEMPO_MINIMO, dominancia_minima: float = DOMINANCIA_MINIMA,
+             permitir_indisponivel: bool = False) -> List[Dict[str, Any]]:
+    """
+    Classifica cada benchmark pela razão entre os melhores tempos (o mínimo é o menos afetado por interferência).
+
+    Uma mudança só conta quando (1) a razão passa da tolerância, que é o maior entre o limite configurado e
+    fator_ruido x o ruído relativo da execução mais ruidosa, (2) a diferença absoluta passa de tempo_minimo e
+    (3) as repetições estão separadas: em ao menos dominancia_minima dos pares uma execução foi mais lenta.
+
+    Um benchmark que roda na linha de base e some (sem ter sido filtrado) ou dá erro na execução atual
+    falhou; 'indisponivel' (dependência opcional ausente nesta máquina) só passa com permitir_indisponivel
+    """
+    limites = LIMITES_BENCHMARK if limites is None else limites
+    indice_base, indice_atual = indexar(base), indexar(atual)
+    linhas = []
+
+    for chave in sorted(set(indice_base) | set(indice_atual)):
+        nome, n_linhas = chave
+        anterior, corrente = indice_base.get(chave), indice_atual.get(chave)
+        linha = {'benchmark': nome, 'linhas': n_linhas,
+                 'base_s': anterior['min_s'] if valido(anterior) else None,
+                 'atual_s': corrente['min_s'] if valido(corrente) else None,
+                 'razao': None, 'tolerancia_pct': None, 'motivo': None}
+
+        if valido(anterior) and not valido(corrente):
+            if corrente is None and not selecionado(atual, nome, n_linhas):
+                linha['status'] = 'ausente'
+            elif corrente is None:
+                linha.update(status='falhou', motivo='não executado')
+            elif corrente.get('status') == 'indisponivel' and permitir_indisponivel:
+                linha['status'] = 'ausente'
+            else:
+                linha.update(status='falhou', motivo=f"{corrente.get('status')}: {corrente.get('erro', '')}")
+            linhas.append(linha)
+            continue
+
+        if not valido(anterior) or not valido(corrente) or not anterior['min_s']:
+            linha['status'] = 'ausente'
+            linhas.append(linha)
+            continue
+
+        razao = corrente['min_s'] / anterior['min_s']
+        ruido = max(ruido_relativo(anterior), ruido_relativo(corrente))
+        tolerancia = max(limite_benchmark(nome, limite_padrao, limites) / 100, fator_ruido * ruido)
+        diferenca = abs(corrente['mediana_s'] - anterior['mediana_s'])
+        mais_lento = dominancia(corrente['tempos_s'], anterior['tempos_s'])
+
+        if razao > 1 + tolerancia and mais_lento >= dominancia_minima:
+            status = 'regressao'
+        elif razao < 1 / (1 + tolerancia) and 1 - mais_lento >= dominancia_minima:
+            status = 'melhora'
+        elif razao > 1 + tolerancia or razao < 1 / (1 + tolerancia):
+            status = 'ruido'
+        else:
+            status = 'estavel'
+        if diferenca < tempo_minimo and status != 'estavel':
+            status = 'ruido'
+
+        linha.update(razao=round(razao, 3), tolerancia_pct=round(tolerancia * 100, 1), status=status)
+        linhas.append(linha)
+
+    return linhas
+
+
+def formatar_tabela(linhas: List[Dict[str, Any]]) -> str:
+    """Tabela de texto alinhada com uma linha por benchmark e tamanho"""
+    cabecalho = ['Benchmark', 'Linhas', 'Base mín (s)', 'Atual mín (s)', 'Razão', 'Tolerância', 'Status']
+    celulas = [cabecalho] + [
+        [
+            linha['benchmark'],
+            f"{linha['linhas']:,}",
+            f"{linha['base_s']:.4f}" if linha['base_s'] is not None else '-',
+            f"{linha['atual_s']:.4f}" if linha['atual_s'] is not None else '-',
+            f"{linha['razao']:.2f}x" if linha['razao'] is not None else '-',
+            f"±{linha['tolerancia_pct']:.0f}%" if linha['tolerancia_pct'] is not None else '-',
+            ROTULOS[linha['status']]
+        ]
+        for linha in linhas
+    ]
+    larguras = [max(len(celula[i]) for celula in celulas) for i in range(len(cabecalho))]
+    alinhar = lambda celula: '  '.join(
+        texto.ljust(largura) if i in (0, 6) else texto.rjust(largura)
+        for i, (texto, largura) in enumerate(zip(celula, larguras))
+    )
+    separador = '  '.join('-' * largura for largura in larguras)
+    return '\n'.join([alinhar(celulas[0]), separador] + [alinhar(celula) for celula in celulas[1:]])
+
+
+def avisos_ambiente(base: Dict[str, Any], atual: Dict[str, Any]) -> List[str]:
+    """Diferenças de máquina/versões que tornam a comparação pouco confiável"""
+    avisos = []
+    meta_base, meta_atual = base.get('metadados', {}), atual.get('metadados', {})
+    for campo in ('maquina', 'processador', 'python', 'pandas', 'numpy'):
+        if meta_base.get(campo) != meta_atual.get(campo):
+            avisos.append(f"{campo}: {meta_base.get(campo)} → {meta_atual.get(campo)}")
+    return avisos
+
+
+def interpretar_limites(especificacoes: List[str]) -> Dict[str, float]:
+    """Converte 'padrao=pct' da linha de comando em limites por benchmark (prevalecem sobre os padrões do módulo)"""
+    limites = dict(LIMITES_BENCHMARK)
+    for especificacao in especificacoes:
+        padrao, separador, valor = especificacao.partition('=')
+        if not separador:
+            raise ValueError(f"Limite inválido '{especificacao}' (use padrao=percentual)")
+        limites = {nome: limite for nome, limite in limites.items() if not fnmatch(nome, padrao)}
+        limites[padrao] = float(valor)
+    return limites
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Compara resultados de benchmark com a linha de base')
+    parser.add_argument('atual', help='Arquivo JSON gerado por benchmarks/suite.py')
+    parser.add_argument('--base', default=str(ARQUIVO_BASE), help='Linha de base (padrão: resultados/baseline.json)')
+    parser.add_argument('--limite', type=float, default=LIMITE_PADRAO, help='Piora tolerada (%%) por padrão')
+    parser.add_argument('--limite-benchmark', action='append', default=[], metavar='PADRAO=PCT',
+                        help="Tolerância de um benchmark (fnmatch), ex.: 'exportador.*=20'")
+    parser.add_argument('--fator-ruido', type=float, default=FATOR_RUIDO, help='Múltiplo do ruído relativo (IQR/mediana)')
+    parser.add_argument('--tempo-minimo', type=float, default=TEMPO_MINIMO, help='Diferença absoluta mínima (s)')
+    parser.add_argument('--dominancia', type=float, default=DOMINANCIA_MINIMA,
+                        help='Fração mínima de pares de repetições em que a execução atual foi mais lenta')
+    parser.add_argument('--permitir-indisponivel', action='store_true',
+                        help="Não falhar quando um benchmark da linha de base ficar 'indisponivel' (dependência opcional ausente)")
+    parser.add_argument('--promover', action='store_true', help='Sem regressões, grava o resultado atual como linha de base')
+    args = parser.parse_args()
+
+    caminho_base, caminho_atual = Path(args.base), Path(args.atual)
+    if not caminho_base.exists():
+        if args.promover:
+            caminho_base.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(caminho_atual, caminho_base)
+            print(f"📌 Linha de base criada a partir de: {caminho_atual.name}")
+            return 0
+        print(f"❌ Linha de base não encontrada: {caminho_base} (use --promover na primeira execução)")
+        return 2
+
+    base, atual = carregar_resultados(caminho_base), carregar_resultados(caminho_atual)
+    linhas = comparar(base, atual, args.limite, interpretar_limites(args.limite_benchmark),
+                      args.fator_ruido, args.tempo_minimo, args.dominancia, args.permitir_indisponivel)
+
+    print(f"📊 Base:  {caminho_base.name} (commit {base['metadados'].get('commit')})")
+    print(f"📊 Atual: {caminho_atual.name} (commit {atual['metadados'].get('commit')})\n")
+    print(formatar_tabela(linhas))
+
+    for aviso in avisos_ambiente(base, atual):
+        print(f"⚠️ Ambiente diferente da linha de base - {aviso}")
+
+    regressoes = [linha for linha in linhas if linha['status'] == 'regressao']
+    falhas = [linha for linha in linhas if linha['status'] == 'falhou']
+    if regressoes:
+        print(f"\n❌ {len(regressoes)} regressão(ões) acima da tolerância:")
+        for linha in regressoes:
+            print(f"   {linha['benchmark']} ({linha['linhas']:,} linhas): {linha['razao']:.2f}x "
+                  f"(tolerância ±{linha['tolerancia_pct']:.0f}%)")
+    if falhas:
+        print(f"\n❌ {len(falhas)} benchmark(s) da linha de base sem resultado na execução atual:")
+        for linha in falhas:
+            print(f"   {linha['benchmark']} ({linha['linhas']:,} linhas): {linha['motivo']}")
+    if regressoes or falhas:
+        return 1
+
+    print("\n✅ Nenhuma regressão acima da tolerância e nenhum benchmark da linha de base faltando")
+    if args.promover:
+        shutil.copyfile(caminho_atual, caminho_base)
+        print(f"📌 Linha de base atualizada: {caminho_base}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Relatório de memória por coluna: leitura sem tipagem x plano de tipos (category / string[pyarrow])
+"""
+
+import sys
+import argparse
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.append(str(Path(__file__).parent.parent))
+from config.settings import config
+from src.utils import converter_tipos_seguros, relatorio_memoria
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Relatório de memória do plano de tipos')
+    parser.add_argument('--arquivo', default=str(config.DATA_DIR / 'Safra_Gerencial_Téc.Prop_17.06.xlsx'),
+                        help='Workbook a analisar')
+    parser.add_argument('--aba', default='Consolidado', help='Aba do workbook')
+    args = parser.parse_args()
+
+    bruto = pd.read_excel(args.arquivo, sheet_name=args.aba, engine='openpyxl')
+    # Linha de base: texto como object, como na leitura original
+    bruto = bruto.astype({col: object for col in bruto.select_dtypes(include=['str', 'string']).columns})
+    tipado = converter_tipos_seguros(bruto, config.TIPOS_DADOS)
+
+    relatorio = relatorio_memoria(bruto, tipado)
+    print(f"📊 Registros: {len(bruto):,} | Colunas: {len(bruto.columns)}")
+    with pd.option_context('display.max_rows', None, 'display.width', 160):
+        print(relatorio)
+
+    total = relatorio.loc['TOTAL']
+    print(f"💾 Antes: {total['bytes_antes'] / 1024**2:.1f} MB | Depois: {total['bytes_depois'] / 1024**2:.1f} MB "
+          f"({total['reducao_pct']}% de redução)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+"""
+Suíte de benchmarks dos caminhos críticos (ETL, exportadores e cálculos do dashboard)
+em vários tamanhos de dados sintéticos; resultados gravados em JSON para comparar commits
+"""
+
+import argparse
+import ast
+import gc
+import importlib.util
+import json
+import logging
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+RAIZ = Path(__file__).parent.parent
+sys.path.append(str(RAIZ))
+from src.gerador_sintetico import gerar_base_historica, gerar_relatorio_diario
+
+DIRETORIO_RESULTADOS = Path(__file__).parent / 'resultados'
+TAMANHOS_PADRAO = [10_000, 100_000]
+QUANTIDADE_LIDERES = 8
+
+# nome -> função que recebe os dados preparados e devolve o callable medido
+BENCHMARKS: Dict[str, Callable[[Dict[str, Any]], Callable[[], Any]]] = {}
+
+
+def benchmark(nome: str):
+    """Registra um benchmark da suíte"""
+    def registrar(funcao):
+        BENCHMARKS[nome] = funcao
+        return funcao
+    return registrar
+
+
+def importar_etl(diretorio_temporario: Path):
+    """
+    Importa o SafraETLProcessor com os caminhos apontados para um diretório temporário.
+
+    O etl_consolidacao usa imports planos ('from config import Config'), que sombreiam o pacote
+    config/ usado pelo dashboard; o módulo plano sai do sys.modules logo após o import
+    """
+    diretorio_src = str(RAIZ / 'src')
+    sombreados = {modulo: sys.modules.pop(modulo) for modulo in ('config', 'utils') if modulo in sys.modules}
+    sys.path.insert(0, diretorio_src)
+    try:
+        import etl_consolidacao
+    finally:
+        sys.path.remove(diretorio_src)
+        for modulo in ('config', 'utils'):
+            sys.modules.pop(modulo, None)
+        sys.modules.update(sombreados)
+
+    caminhos = etl_consolidacao.Config.CAMINHOS
+    caminhos.update({
+        nome: str(diretorio_temporario / Path(caminho).name)
+        for nome, caminho in caminhos.items()
+        if nome not in ('base_historica', 'relatorio_diario', 'mapeamento')
+    })
+    return etl_consolidacao.SafraETLProcessor
+
+
+def importar_arquivo(caminho: Path) -> ModuleType:
+    """Importa um módulo pelo caminho (src/utils/ é sombreado por src/utils.py e não é importável como pacote)"""
+    nome = f"bench_{caminho.stem}"
+    if nome not in sys.modules:
+        especificacao = importlib.util.spec_from_file_location(nome, caminho)
+        modulo = importlib.util.module_from_spec(especificacao)
+        especificacao.loader.exec_module(modulo)
+        sys.modules[nome] = modulo
+    return sys.modules[nome]
+
+
+def criar_gerenciador_polos():
+    """PoloReportManager (importa streamlit: ImportError quando o dashboard não está instalado)"""
+    return importar_arquivo(RAIZ / 'src' / 'utils' / 'polo_report_manager.py').PoloReportManager()
+
+
+def criar_exportador():
+    """QuickExporter (importa streamlit: ImportError quando o dashboard não está instalado)"""
+    return importar_arquivo(RAIZ / 'src' / 'utils' / 'quick_exporter.py').QuickExporter()
+
+
+def carregar_funcoes_script(caminho: Path, nomes: List[str]) -> Dict[str, Callable]:
+    """
+    Extrai funções de um script Streamlit sem executar o app (o app roda no import).
+
+    Os imports do topo do script são reproduzidos; os que não estiverem disponíveis
+    (streamlit, plotly) são ignorados, pois as funções medidas não dependem deles
+    """
+    arvore = ast.parse(caminho.read_text(encoding='utf-8'))
+    namespace: Dict[str, Any] = {}
+    for no in arvore.body:
+        if isinstance(no, (ast.Import, ast.ImportFrom)):
+            try:
+                exec(compile(ast.Module(body=[no], type_ignores=[]), str(caminho), 'exec'), namespace)
+            except ImportError:
+                pass
+
+    funcoes = [no for no in arvore.body if isinstance(no, ast.FunctionDef) and no.name in nomes]
+    faltantes = set(nomes) - {no.name for no in funcoes}
+    if faltantes:
+        raise ImportError(f"Funções não encontradas em {caminho.name}: {sorted(faltantes)}")
+    exec(compile(ast.Module(body=funcoes, type_ignores=[]), str(caminho), 'exec'), namespace)
+    return {nome: namespace[nome] for nome in nomes}
+
+
+def como_excel(df: pd.DataFrame) -> pd.DataFrame:
+    """Versão 'crua' do relatório, como lida do Excel sem tipagem: textos object e datas dd/mm/aaaa"""
+    bruto = pd.DataFrame(index=df.index)
+    for col in df.columns:
+        serie = df[col]
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            bruto[col] = serie.astype(object)
+        elif pd.api.types.is_datetime64_any_dtype(serie):
+            codigos, datas = pd.factorize(serie)
+            textos = np.append(datas.strftime('%d/%m/%Y %H:%M:%S').to_numpy(dtype=object), None)
+            bruto[col] = textos[codigos]
+        else:
+            bruto[col] = serie
+    return bruto
+
+
+def preparar_dados(n_linhas: int, diretorio_temporario: Path, semente: int = 42) -> Dict[str, Any]:
+    """Gera as entradas de cada benchmark a partir de uma base e um relatório sintéticos de n_linhas"""
+    from src.utils import converter_tipos_seguros, limpar_dados_problematicos
+    from src.upsert_ordens import upsert_ordens
+    from src.classificacao import classificar_ordens
+
+    processador = importar_etl(diretorio_temporario)()
+    config = processador.config
+    logging.getLogger().setLevel(logging.WARNING)
+
+    base = gerar_base_historica(n_linhas, semente=semente)
+    diario = gerar_relatorio_diario(n_linhas, base, sobreposicao=0.3, semente=semente + 1)
+    diario_bruto = como_excel(diario)
+
+    base_tipada = converter_tipos_seguros(limpar_dados_problematicos(base), config.TIPOS_DADOS)
+    diario_filtrado = processador.aplicar_filtros_negocio(diario)
+    diario_tipado = converter_tipos_seguros(limpar_dados_problematicos(diario_filtrado), config.TIPOS_DADOS)
+    consolidado, _ = upsert_ordens(base_tipada, diario_tipado, config.COLUNAS_ATUALIZAR, config.COLUNAS_FEEDBACK)
+    consolidado = processador.processar_dias_em_aberto(consolidado)
+    dados_dashboard = classificar_ordens(consolidado)
+
+    # Mapeamento Polo + SAP -> Líder no formato do pagresolve_regionais.xlsx
+    polos = pd.Series(diario['Provider'].cat.categories)
+    polos = polos[polos.str.startswith('Polo ')]
+    mapeamento = pd.DataFrame({
+        'Polo + SAP': polos.str.removeprefix('Polo ').to_numpy(),
+        'Líder PagResolve': [f"Líder {i % QUANTIDADE_LIDERES + 1}" for i in range(len(polos))]
+    })
+
+    return {
+        'n_linhas': n_linhas,
+        'config': config,
+        'processador': processador,
+        'base_tipada': base_tipada,
+        'diario': diario,
+        'diario_bruto': diario_bruto,
+        'diario_filtrado': diario_filtrado,
+        'diario_tipado': diario_tipado,
+        'consolidado': consolidado,
+        'dados_dashboard': dados_dashboard,
+        'mapeamento': mapeamento
+    }
+
+
+# ---------------------------------------------------------------- ETL
+
+@benchmark('etl.aplicar_filtros_negocio')
+def bench_filtros(dados: Dict[str, Any]) -> Callable[[], Any]:
+    return lambda: dados['processador'].aplicar_filtros_negocio(dados['diario'])
+
+
+@benchmark('etl.limpar_dados_problematicos')
+def bench_limpeza(dados: Dict[str, Any]) -> Callable[[], Any]:
+    from src.utils import limpar_dados_problematicos
+    return lambda: limpar_dados_problematicos(dados['diario_bruto'])
+
+
+@benchmark('etl.converter_tipos_seguros')
+def bench_conversao(dados: Dict[str, Any]) -> Callable[[], Any]:
+    from src.utils import converter_tipos_seguros
+    config = dados['config']
+    return lambda: converter_tipos_seguros(dados['diario_bruto'], config.TIPOS_DADOS, config.PARAMETROS['date_format'])
+
+
+@benchmark('etl.upsert_ordens_caixa3')
+def bench_upsert(dados: Dict[str, Any]) -> Callable[[], Any]:
+    from src.upsert_ordens import upsert_ordens
+    config = dados['config']
+    return lambda: upsert_ordens(dados['base_tipada'], dados['diario_tipado'],
+                                 config.COLUNAS_ATUALIZAR, config.COLUNAS_FEEDBACK)
+
+
+@benchmark('etl.processar_dias_em_aberto')
+def bench_dias_em_aberto(dados: Dict[str, Any]) -> Callable[[], Any]:
+    return lambda: dados['processador'].processar_dias_em_aberto(dados['consolidado'])
+
+
+@benchmark('etl.preparar_dados_dashboard')
+def bench_visoes(dados: Dict[str, Any]) -> Callable[[], Any]:
+    return lambda: dados['processador'].preparar_dados_dashboard(dados['consolidado'])
+
+
+# ---------------------------------------------------------------- Relatórios por polo
+
+def _relatorios_polo(dados: Dict[str, Any]) -> Dict[str, pd.DataFrame]:
+    """Relatórios por polo calculados uma única vez por tamanho (entrada dos exportadores)"""
+    if 'relatorios_polo' not in dados:
+        dados['relatorios_polo'] = criar_gerenciador_polos().gerar_relatorio_por_polo(dados['dados_dashboard'])
+    return dados['relatorios_polo']
+
+
+def _maior_polo(dados: Dict[str, Any]):
+    """Polo com mais ordens em aberto (pior caso dos exportadores individuais)"""
+    relatorios = _relatorios_polo(dados)
+    nome = max(relatorios, key=lambda polo: len(relatorios[polo]))
+    return relatorios[nome], nome
+
+
+@benchmark('polos.gerar_relatorio_por_polo')
+def bench_relatorio_polos(dados: Dict[str, Any]) -> Callable[[], Any]:
+    gerenciador = criar_gerenciador_polos()
+    return lambda: gerenciador.gerar_relatorio_por_polo(dados['dados_dashboard'])
+
+
+@benchmark('exportador.exportar_polo_excel')
+def bench_exportar_excel(dados: Dict[str, Any]) -> Callable[[], Any]:
+    dados_polo, nome = _maior_polo(dados)
+    return lambda: criar_exportador().exportar_polo_excel(dados_polo, nome)
+
+
+@benchmark('exportador.exportar_polo_csv')
+def bench_exportar_csv(dados: Dict[str, Any]) -> Callable[[], Any]:
+    dados_polo, nome = _maior_polo(dados)
+    return lambda: criar_exportador().exportar_polo_csv(dados_polo, nome)
+
+
+@benchmark('exportador.exportar_resumo_executivo')
+def bench_exportar_resumo(dados: Dict[str, Any]) -> Callable[[], Any]:
+    dados_polo, nome = _maior_polo(dados)
+    return lambda: criar_exportador().exportar_resumo_executivo(dados_polo, nome)
+
+
+@benchmark('exportador.exportar_consolidado_todos_polos')
+def bench_exportar_consolidado(dados: Dict[str, Any]) -> Callable[[], Any]:
+    relatorios = _relatorios_polo(dados)
+    return lambda: criar_exportador().exportar_consolidado_todos_polos(relatorios)
+
+
+# ---------------------------------------------------------------- Dashboard
+
+def _funcoes_dashboard() -> Dict[str, Callable]:
+    return carregar_funcoes_script(RAIZ / 'dashboard' / 'app_dashboard.py',
+                                   ['calcular_metricas_safra', 'processar_dados_com_lider'])
+
+
+@benchmark('dashboard.calcular_metricas_safra')
+def bench_metricas(dados: Dict[str, Any]) -> Callable[[], Any]:
+    calcular_metricas_safra = _funcoes_dashboard()['calcular_metricas_safra']
+    return lambda: calcular_metricas_safra(dados['diario_filtrado'])
+
+
+@benchmark('dashboard.processar_dados_com_lider')
+def bench_lider(dados: Dict[str, Any]) -> Callable[[], Any]:
+    from src.normalizacao import normalizar_polos_sap
+    processar_dados_com_lider = _funcoes_dashboard()['processar_dados_com_lider']
+    mapeamento = dados['mapeamento'].copy()
+    mapeamento['Polo_SAP_Normalizado'] = normalizar_polos_sap(mapeamento['Polo + SAP'])
+    return lambda: processar_dados_com_lider(dados['diario_filtrado'], mapeamento)
+
+
+# ---------------------------------------------------------------- Execução
+
+def medir(funcao: Callable[[], Any], repeticoes: int, aquecimento: int = 0) -> List[float]:
+    """Tempos (s) de cada repetição, com o GC desligado durante a medição (como o timeit)"""
+    for _ in range(aquecimento):
+        funcao()
+
+    tempos = []
+    for _ in range(repeticoes):
+        gc.collect()
+        gc.disable()
+        try:
+            inicio = time.perf_counter()
+            funcao()
+            tempos.append(time.perf_counter() - inicio)
+        finally:
+            gc.enable()
+    return tempos
+
+
+def resumir(tempos: List[float]) -> Dict[str, float]:
+    """Estatísticas usadas na comparação entre execuções"""
+    quartis = np.percentile(tempos, [25, 75])
+    return {
+        'min_s': round(min(tempos), 6),
+        'mediana_s': round(statistics.median(tempos), 6),
+        'media_s': round(statistics.mean(tempos), 6),
+        'desvio_s': round(statistics.stdev(tempos), 6) if len(tempos) > 1 else 0.0,
+        'iqr_s': round(float(quartis[1] - quartis[0]), 6)
+    }
+
+
+def metadados_execucao() -> Dict[str, Any]:
+    """Commit, versões e máquina (resultados só são comparáveis na mesma máquina)"""
+    def git(*argumentos: str) -> Optional[str]:
+        try:
+            saida = subprocess.run(['git', *argumentos], cwd=RAIZ, capture_output=True, text=True, timeout=30)
+            return saida.stdout.strip() if saida.returncode == 0 else None
+        except (OSError, subprocess.SubprocessError):
+            return None
+
+    return {
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'commit': git('rev-parse', '--short', 'HEAD'),
+        'alteracoes_locais': bool(git('status', '--porcelain', '--untracked-files=no')),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'maquina': platform.node(),
+        'processador': platform.processor() or platform.machine(),
+        'sistema': platform.platform()
+    }
+
+
+def executar_suite(tamanhos: List[int], repeticoes: int, aquecimento: int,
+                   filtros: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Executa os benchmarks selecionados em cada tamanho e devolve o documento de resultados"""
+    selecionados = {nome: fabrica for nome, fabrica in BENCHMARKS.items()
+                    if not filtros or any(filtro in nome for filtro in filtros)}
+    resultados = []
+
+    with tempfile.TemporaryDirectory(prefix='bench_safra_') as temporario:
+        for n_linhas in tamanhos:
+            print(f"\n📊 Preparando dados sintéticos: {n_linhas:,} ordens")
+            dados = preparar_dados(n_linhas, Path(temporario))
+
+            for nome, fabrica in selecionados.items():
+                resultado = {'benchmark': nome, 'linhas': n_linhas, 'repeticoes': repeticoes}
+                try:
+                    tempos = medir(fabrica(dados), repeticoes, aquecimento)
+                    resultado.update(status='ok', tempos_s=[round(t, 6) for t in tempos], **resumir(tempos))
+                    print(f"   ⏱️ {nome:<45} mediana {resultado['mediana_s']:.4f}s"
+                          f" | mín {resultado['min_s']:.4f}s | IQR {resultado['iqr_s']:.4f}s")
+                except ImportError as e:
+                    # Dependência opcional ausente (ex.: streamlit nos exportadores do dashboard)
+                    resultado.update(status='indisponivel', erro=str(e))
+                    print(f"   ⏭️ {nome:<45} indisponível: {e}")
+                except Exception as e:
+                    resultado.update(status='erro', erro=f"{type(e).__name__}: {e}")
+                    print(f"   ❌ {nome:<45} erro: {resultado['erro']}")
+                resultados.append(resultado)
+            del dados
+
+    # A seleção vai junto para o portão de regressão distinguir benchmark filtrado de benchmark que sumiu
+    return {'metadados': metadados_execucao(), 'selecao': {'tamanhos': list(tamanhos), 'filtros': filtros},
+            'resultados': resultados}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Suíte de benchmarks do Projeto Safra')
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=TAMANHOS_PADRAO, help='Ordens por cenário')
+    parser.add_argument('--repeticoes', type=int, default=5, help='Repetições medidas por benchmark')
+    parser.add_argument('--aquecimento', type=int, default=1, help='Execuções descartadas antes da medição')
+    parser.add_argument('--filtro', nargs='*', default=None, help='Executa só benchmarks cujo nome contém o texto')
+    parser.add_argument('--saida', default=None, help='Arquivo JSON de resultados (padrão: benchmarks/resultados/)')
+    parser.add_argument('--listar', action='store_true', help='Lista os benchmarks e sai')
+    args = parser.parse_args()
+
+    if args.listar:
+        print('\n'.join(BENCHMARKS))
+        return
+
+    documento = executar_suite(args.tamanhos, args.repeticoes, args.aquecimento, args.filtro)
+
+    saida = Path(args.saida) if args.saida else DIRETORIO_RESULTADOS / (
+        f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{documento['metadados']['commit'] or 'sem_commit'}.json")
+    saida.parent.mkdir(parents=True, exist_ok=True)
+    with open(saida, 'w', encoding='utf-8') as f:
+        json.dump(documento, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 Resultados gravados em: {saida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,12 +11,18 @@ class SafraConfig:
         self.INPUT_DIR = self.DATA_DIR / "input"
         self.PROCESSED_DIR = self.DATA_DIR / "processed"
         self.BACKUP_DIR = self.DATA_DIR / "backup"
+        self.CACHE_DIR = self.DATA_DIR / "cache"
+        self.VISOES_DIR = self.PROCESSED_DIR / "visoes"  # agregados publicados pelo ETL de consolidação
         self.LOGS_DIR = self.BASE_DIR / "logs"
         
         # Arquivos principais
         self.RELATORIO_DIARIO = "Relatorio_Diario.xlsx"
         self.BASE_HISTORICA = "safra_base_historica.parquet"
         self.DASHBOARD_DATA = "dashboard_data.parquet"
+        self.ARQUIVO_MAPEAMENTO = "pagresolve_regionais.xlsx"
+        self.MANIFESTO_EXECUCAO = "manifesto_execucao.json"
+        self.ARQUIVO_METRICAS = "metricas_etl.jsonl"
+        self.BANCO_OPERACIONAL = "safra_operacional.db"  # SQLite (WAL): log de exportações e justificativas
         
         # Configurações de processamento
         self.CHUNK_SIZE = 10000
@@ -32,21 +38,29 @@ class SafraConfig:
         self.TIPOS_DADOS = {
             'numeros_inteiros': [
                 'Ordem PagBank', 'Ordem SAP', 'SLA Cliente', 'SLA Logística',
-                'Cód. Último Tracking', 'Ordem Workfinity', 'SLA', 'SLA Tracking',
-                'Dias_Em_Aberto'
+                'Cód. Último Tracking', 'Ordem Workfinity', 'Dias_Em_Aberto'
             ],
             'datas': [
                 'Criação da Ordem', 'Início Indoor', 'Data Últ. Tracking Indoor',
                 'Início Transporte', 'Data Últ. Tracking Transporte', 'Data Tracking',
                 'Data Coleta', 'Previsão do Gerenciador', 'Data_Status', 'Data_Feedback'
             ],
-            'textos': [
-                'CEP', 'Material', 'Código Rastreio', 'Provider',
+            # Texto de baixa cardinalidade (category)
+            'categorias': [
+                'Provider', 'SLA', 'SLA Tracking', 'Material',
                 'Tipo da Ordem', 'Status da Ordem', 'Tipo Atendimento',
                 'Transportadora', 'Status Operação', 'Último Tracking',
                 'Status Integração', 'Estado', 'Região', 'Classif. Cidade',
                 'Origem', 'Cidade', 'status_da_ordem', 'tipo_da_ordem',
-                'Status_Tratativa', 'Causa_Raiz', 'Feedback', 'Proxima_Acao', 'Alerta_SLA'
+                'Status Prazo 10 Dias', 'Status Prazo 10 Dias Tracking',
+                'Status Prazo Tracking Entrada', 'classificacao da ordem',
+                'DAX_nam_opl', "'DAX-ORDENS_LOGISTICA'[nam_opl]",
+                'operador_operacao', 'operador_operacao2', 'operador_operacao3', 'operador_sql',
+                'Status_Tratativa', 'Causa_Raiz', 'Proxima_Acao', 'Alerta_SLA'
+            ],
+            # Texto livre / códigos de alta cardinalidade (string[pyarrow])
+            'textos': [
+                'CEP', 'Código Rastreio', 'DAX_opl', "'DAX-ORDENS_LOGISTICA'[opl]", 'Feedback'
             ]
         }
         
@@ -72,7 +86,7 @@ class SafraConfig:
     def _criar_diretorios(self):
         """Cria diretórios necessários"""
         for dir_path in [self.DATA_DIR, self.INPUT_DIR, self.PROCESSED_DIR, 
-                        self.BACKUP_DIR, self.LOGS_DIR]:
+                        self.BACKUP_DIR, self.CACHE_DIR, self.LOGS_DIR]:
             dir_path.mkdir(parents=True, exist_ok=True)
 
 # Instância global
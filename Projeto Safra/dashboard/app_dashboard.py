@@ -3,7 +3,6 @@ import pandas as pd
 import io
 from pathlib import Path
 import sys
-import unicodedata
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
 import requests
@@ -15,6 +14,34 @@ import re
 
 # Adicionar path do projeto
 sys.path.append(str(Path(__file__).parent.parent))
+from config.settings import config
+from src.cache_ingestao import obter_cache
+from src.utils import montar_colunas_leitura, contar_valores
+from src.dados_dashboard import carregar_dados_dashboard, ler_versao_dados, ler_token_versao, diretorio_snapshots
+from src.snapshots_diarios import SnapshotsDiarios
+from src.visoes_dashboard import carregar_manifesto, carregar_visoes
+from src.normalizacao import normalizar_providers, normalizar_polos_sap
+
+# Cache de ingestão compartilhado com o ETL (Excel -> Parquet)
+cache_ingestao = obter_cache(config.CACHE_DIR)
+COLUNAS_LEITURA = montar_colunas_leitura(
+    config.TIPOS_DADOS, config.COLUNAS_CHAVE, config.COLUNAS_ATUALIZAR, config.COLUNAS_FEEDBACK
+)
+
+# Saída do ETL consumida pelo dashboard
+ARQUIVO_DADOS_DASHBOARD = config.PROCESSED_DIR / config.DASHBOARD_DATA
+
+# Agregados do histórico consolidado publicados pelo ETL (lidos pelo manifesto)
+DIRETORIO_VISOES = config.VISOES_DIR
+
+# Snapshots diários gravados pelo ETL (base do comparativo entre datas)
+snapshots_diarios = SnapshotsDiarios(diretorio_snapshots(ARQUIVO_DADOS_DASHBOARD))
+
+# Entradas brutas (mapeamento e contingência sem publicação do ETL)
+ARQUIVO_MAPEAMENTO = Path('data/input/pagresolve_regionais.xlsx')
+ARQUIVOS_RELATORIO_EXCEL = {
+    'hoje': Path('data/input/Relatorio_Diario1.xlsx')
+}
 
 # Configuração de cores
 CORES = {
@@ -208,59 +235,6 @@ def calcular_semana_ano() -> Tuple[int, str]:
     return semana, periodo
 
 
-def remover_acentos(texto: str) -> str:
-    """
-    Remove acentos de uma string usando normalização Unicode.
-
-    Args:
-        texto (str): Texto a ser processado
-
-    Returns:
-        str: Texto sem acentos
-    """
-    if pd.isna(texto):
-        return ""
-    texto = str(texto)
-    return unicodedata.normalize('NFD', texto).encode('ascii', 'ignore').decode('ascii')
-
-
-def normalizar_provider(provider: str) -> str:
-    """
-    Normaliza o nome do provider removendo prefixos e acentos.
-
-    Args:
-        provider (str): Nome do provider
-
-    Returns:
-        str: Provider normalizado
-    """
-    if pd.isna(provider):
-        return ""
-
-    provider_str = str(provider).strip().upper()
-    if provider_str.startswith('POLO '):
-        provider_str = provider_str[5:]
-
-    return remover_acentos(provider_str)
-
-
-def normalizar_polo_sap(polo_sap: str) -> str:
-    """
-    Normaliza o nome do polo SAP removendo acentos.
-
-    Args:
-        polo_sap (str): Nome do polo SAP
-
-    Returns:
-        str: Polo SAP normalizado
-    """
-    if pd.isna(polo_sap):
-        return ""
-
-    polo_str = str(polo_sap).strip().upper()
-    return remover_acentos(polo_str)
-
-
 def calcular_metricas_safra(df_filtrado: pd.DataFrame) -> Dict[str, float]:
     """
     Calcula métricas principais da safra para um DataFrame filtrado.
@@ -306,6 +280,38 @@ def calcular_metricas_safra(df_filtrado: pd.DataFrame) -> Dict[str, float]:
     }
 
 
+def formatar_data_snapshot(data: str) -> str:
+    """
+    Rótulo de uma data do comparativo ('Hoje' para a data dos dados carregados).
+
+    Args:
+        data (str): Data ISO (AAAA-MM-DD)
+
+    Returns:
+        str: Rótulo exibido nos seletores e no gráfico
+    """
+    if data == data_referencia:
+        return 'Hoje'
+    return datetime.strptime(data, '%Y-%m-%d').strftime('%d/%m/%Y')
+
+
+def metricas_da_data(data: str, metricas_atuais: Dict[str, float], lider: str) -> Optional[Dict[str, float]]:
+    """
+    Métricas de uma data do comparativo para o líder selecionado.
+
+    Args:
+        data (str): Data ISO (AAAA-MM-DD)
+        metricas_atuais (Dict[str, float]): Métricas dos dados carregados (data de referência)
+        lider (str): Líder selecionado ('TODOS' para o total)
+
+    Returns:
+        Optional[Dict[str, float]]: Métricas da data (None se não houver snapshot)
+    """
+    if data == data_referencia:
+        return metricas_atuais
+    return snapshots_diarios.metricas(data, lider=lider)
+
+
 def calcular_deltas(metricas_hoje: Dict[str, float], metricas_ontem: Dict[str, float]) -> Dict[str, float]:
     """
     Calcula as diferenças entre métricas de hoje e ontem.
@@ -407,13 +413,16 @@ def criar_ranking_vertical(ranking_data: pd.Series) -> Tuple[Optional[go.Figure]
     return fig, CONFIG_PLOT
 
 
-def criar_grafico_comparacao(metricas_hoje: Dict[str, float], metricas_ontem: Dict[str, float]) -> Tuple[go.Figure, Dict]:
+def criar_grafico_comparacao(metricas_hoje: Dict[str, float], metricas_ontem: Dict[str, float],
+                             rotulo_atual: str = 'Hoje', rotulo_comparacao: str = 'Ontem') -> Tuple[go.Figure, Dict]:
     """
-    Cria gráfico de comparação entre métricas de hoje e ontem.
+    Cria gráfico de comparação entre métricas de duas datas (por padrão hoje e ontem).
 
     Args:
-        metricas_hoje (Dict[str, float]): Métricas de hoje
-        metricas_ontem (Dict[str, float]): Métricas de ontem
+        metricas_hoje (Dict[str, float]): Métricas da data base
+        metricas_ontem (Dict[str, float]): Métricas da data comparada
+        rotulo_atual (str): Legenda da data base
+        rotulo_comparacao (str): Legenda da data comparada
 
     Returns:
         Tuple[go.Figure, Dict]: Figura do Plotly e configuração
@@ -437,7 +446,7 @@ def criar_grafico_comparacao(metricas_hoje: Dict[str, float], metricas_ontem: Di
     fig = go.Figure()
 
     fig.add_trace(go.Bar(
-        name='Hoje',
+        name=rotulo_atual,
         x=categorias,
         y=valores_hoje,
         marker_color=CORES['primaria'],
@@ -448,7 +457,7 @@ def criar_grafico_comparacao(metricas_hoje: Dict[str, float], metricas_ontem: Di
     ))
 
     fig.add_trace(go.Bar(
-        name='Ontem',
+        name=rotulo_comparacao,
         x=categorias,
         y=valores_ontem,
         marker_color=CORES['secundaria'],
@@ -460,7 +469,7 @@ def criar_grafico_comparacao(metricas_hoje: Dict[str, float], metricas_ontem: Di
 
     fig.update_layout(
         title={
-            'text': 'Comparação: Hoje vs Ontem',
+            'text': f'Comparação: {rotulo_atual} vs {rotulo_comparacao}',
             'x': 0.5,
             'font': {'size': 16, 'color': CORES['texto']}
         },
@@ -506,7 +515,7 @@ def criar_graficos_ultimo_tracking(df_em_aberto: pd.DataFrame) -> Tuple[Optional
     if df_em_aberto.empty or 'Último Tracking' not in df_em_aberto.columns:
         return None, None, CONFIG_PLOT
 
-    status_counts = df_em_aberto['Último Tracking'].value_counts()
+    status_counts = contar_valores(df_em_aberto['Último Tracking'])
 
     if status_counts.empty:
         return None, None, CONFIG_PLOT
@@ -716,21 +725,75 @@ st.markdown("""
 # Cache para dados
 
 
-@st.cache_data(ttl=300)
-def carregar_dados_comparativo() -> Dict[str, pd.DataFrame]:
+@st.cache_data(show_spinner=False)
+def carregar_dados_comparativo(versao_dados: str) -> Dict[str, pd.DataFrame]:
+    """
+    Carrega os dados de hoje publicados pelo ETL em Parquet (as demais datas do
+    comparativo vêm dos snapshots diários).
+
+    O cache é invalidado pela versão publicada pelo ETL (sem TTL): a mesma versão
+    nunca é relida e uma nova execução do ETL aparece na interação seguinte.
+
+    Args:
+        versao_dados: Token de versão gravado pelo ETL (chave do cache)
+
+    Returns:
+        Dict[str, pd.DataFrame]: Dados de hoje
+    """
+    dados = carregar_dados_dashboard(ARQUIVO_DADOS_DASHBOARD)
+
+    mostrar_mensagem_status(
+        'success', f"Dados de HOJE: {len(dados['hoje']):,} registros")
+    return dados
+
+
+@st.cache_data(show_spinner=False, max_entries=2)
+def carregar_visoes_historico(versao_visoes: str, _manifesto: Dict) -> Dict[str, pd.DataFrame]:
     """
-    Carrega dados comparativos de hoje e ontem com cache.
+    Carrega os agregados do histórico consolidado publicados pelo ETL.
+
+    Só as tabelas já agregadas são lidas, pela versão apontada no manifesto
+    (o histórico em si não é tocado); a versão é a chave do cache.
+
+    Args:
+        versao_visoes: Versão publicada (chave do cache)
+        _manifesto: Manifesto dessa versão (não entra no hash do cache)
 
     Returns:
-        Dict[str, pd.DataFrame]: Dados de hoje e ontem
+        Dict[str, pd.DataFrame]: Visões 'status_tratativa' e 'provider'
+    """
+    return carregar_visoes(DIRETORIO_VISOES, ['status_tratativa', 'provider'], _manifesto)
+
+
+def versao_arquivos(*caminhos: Path) -> str:
+    """
+    Token de versão a partir da data de modificação dos arquivos.
+
+    Returns:
+        str: Datas de modificação concatenadas ('-' para arquivo ausente)
+    """
+    return '|'.join(
+        str(caminho.stat().st_mtime_ns) if caminho.exists() else '-' for caminho in caminhos)
+
+
+def carregar_relatorios_excel() -> Dict[str, pd.DataFrame]:
+    """
+    Lê os relatórios brutos em Excel (contingência enquanto não há publicação do ETL).
+
+    Não usa st.cache_data: o cache de ingestão já evita reprocessar o Excel e a
+    leitura acompanha qualquer troca dos arquivos.
+
+    Returns:
+        Dict[str, pd.DataFrame]: Dados de hoje
     """
     dados = {}
 
     # Dados de hoje
     try:
-        arquivo_hoje = Path('data/input/Relatorio_Diario1.xlsx')
+        arquivo_hoje = ARQUIVOS_RELATORIO_EXCEL['hoje']
         if arquivo_hoje.exists():
-            dados['hoje'] = pd.read_excel(arquivo_hoje)
+            dados['hoje'] = cache_ingestao.ler_excel(
+                arquivo_hoje, colunas=COLUNAS_LEITURA, tipos=config.TIPOS_DADOS)
             mostrar_mensagem_status(
                 'success', f"Dados de HOJE: {len(dados['hoje']):,} registros")
         else:
@@ -742,22 +805,6 @@ def carregar_dados_comparativo() -> Dict[str, pd.DataFrame]:
             'error', f"Erro ao carregar dados de hoje: {e}")
         dados['hoje'] = pd.DataFrame()
 
-    # Dados de ontem
-    try:
-        arquivo_ontem = Path('data/input/Relatorio_Diario2.xlsx')
-        if arquivo_ontem.exists():
-            dados['ontem'] = pd.read_excel(arquivo_ontem)
-            mostrar_mensagem_status(
-                'success', f"Dados de ONTEM: {len(dados['ontem']):,} registros")
-        else:
-            dados['ontem'] = pd.DataFrame()
-            mostrar_mensagem_status(
-                'info', "Arquivo de dados de ontem não encontrado")
-    except Exception as e:
-        mostrar_mensagem_status(
-            'warning', f"Dados de ontem não disponíveis: {e}")
-        dados['ontem'] = pd.DataFrame()
-
     return dados
 
 
@@ -770,18 +817,29 @@ def carregar_mapeamento() -> pd.DataFrame:
         pd.DataFrame: Dados de mapeamento
     """
     try:
-        df_map = pd.read_excel('data/input/pagresolve_regionais.xlsx')
+        df_map = cache_ingestao.ler_excel(ARQUIVO_MAPEAMENTO)
         # Pré-processar mapeamento para otimizar joins
-        df_map['Polo_SAP_Normalizado'] = df_map['Polo + SAP'].apply(
-            normalizar_polo_sap)
+        df_map['Polo_SAP_Normalizado'] = normalizar_polos_sap(df_map['Polo + SAP'])
         return df_map
     except Exception as e:
         mostrar_mensagem_status('error', f"Erro ao carregar mapeamento: {e}")
         return pd.DataFrame()
 
 
-# Carregar dados
-dados_comparativo = carregar_dados_comparativo()
+# Carregar dados (a versão publicada pelo ETL é a chave do cache)
+versao_dados = ler_versao_dados(ARQUIVO_DADOS_DASHBOARD)
+try:
+    if not versao_dados:
+        raise FileNotFoundError("ETL ainda não publicou dados processados")
+    dados_comparativo = carregar_dados_comparativo(versao_dados)
+    data_referencia = (ler_token_versao(ARQUIVO_DADOS_DASHBOARD) or {}).get('data_referencia')
+except Exception as e:
+    mostrar_mensagem_status(
+        'warning', f"{e} - lendo relatórios em Excel")
+    dados_comparativo = carregar_relatorios_excel()
+    versao_dados = f"excel:{versao_arquivos(*ARQUIVOS_RELATORIO_EXCEL.values())}"
+    data_referencia = None
+data_referencia = data_referencia or datetime.now().date().isoformat()
 df_mapeamento = carregar_mapeamento()
 
 if df_mapeamento.empty or dados_comparativo['hoje'].empty:
@@ -789,24 +847,13 @@ if df_mapeamento.empty or dados_comparativo['hoje'].empty:
         'error', "Dados essenciais não encontrados. Verifique os arquivos de entrada.")
     st.stop()
 
-# Processar dados
-df_hoje = dados_comparativo['hoje'][dados_comparativo['hoje']
-                                    ['Provider'] != 'TEFTI'].copy()
-tem_dados_ontem = not dados_comparativo['ontem'].empty
-
-if tem_dados_ontem:
-    df_ontem = dados_comparativo['ontem'][dados_comparativo['ontem']
-                                          ['Provider'] != 'TEFTI'].copy()
-else:
-    df_ontem = pd.DataFrame()
-
-
-def processar_dados_com_lider(df: pd.DataFrame) -> pd.DataFrame:
+def processar_dados_com_lider(df: pd.DataFrame, df_map: pd.DataFrame) -> pd.DataFrame:
     """
     Processa dados adicionando informação do líder.
 
     Args:
         df (pd.DataFrame): DataFrame original
+        df_map (pd.DataFrame): Mapeamento Polo + SAP -> Líder
 
     Returns:
         pd.DataFrame: DataFrame com coluna de líder
@@ -815,11 +862,11 @@ def processar_dados_com_lider(df: pd.DataFrame) -> pd.DataFrame:
         return df
 
     df_processado = df.copy()
-    df_processado['Provider_Normalizado'] = df_processado['Provider'].apply(
-        normalizar_provider)
+    df_processado['Provider_Normalizado'] = normalizar_providers(
+        df_processado['Provider'])
 
     df_com_lider = df_processado.merge(
-        df_mapeamento[['Polo_SAP_Normalizado', 'Líder PagResolve']],
+        df_map[['Polo_SAP_Normalizado', 'Líder PagResolve']],
         left_on='Provider_Normalizado',
         right_on='Polo_SAP_Normalizado',
         how='left'
@@ -828,63 +875,98 @@ def processar_dados_com_lider(df: pd.DataFrame) -> pd.DataFrame:
     return df_com_lider
 
 
-# Processar dados com líder
-df_hoje_com_lider = processar_dados_com_lider(df_hoje)
-if tem_dados_ontem:
-    df_ontem_com_lider = processar_dados_com_lider(df_ontem)
-else:
-    df_ontem_com_lider = pd.DataFrame()
+@st.cache_resource(show_spinner=False, max_entries=2)
+def preparar_particoes_lider(versao: str, _dados: Dict[str, pd.DataFrame],
+                             _df_map: pd.DataFrame) -> Dict[str, Dict[str, pd.DataFrame]]:
+    """
+    Faz o join com os líderes e particiona por Lider uma única vez por versão dos dados.
+
+    Os frames ficam em cache compartilhado entre sessões e são somente leitura:
+    selecionar um líder é apenas uma consulta ao dicionário.
+
+    Args:
+        versao: Chave do cache (versão dos dados + versão do mapeamento)
+        _dados: Dados de hoje (não entram no hash do cache)
+        _df_map: Mapeamento de regionais (não entra no hash do cache)
+
+    Returns:
+        Dict[str, Dict[str, pd.DataFrame]]: Por período ('hoje'), 'TODOS' e um frame por líder
+    """
+    particoes = {}
+    for periodo, df in _dados.items():
+        if df.empty:
+            particoes[periodo] = {}
+            continue
+
+        df_sem_excluidos = df[~df['Provider'].isin(config.PROVIDERS_EXCLUIDOS)]
+        df_com_lider = processar_dados_com_lider(df_sem_excluidos, _df_map)
+        particoes[periodo] = {
+            'TODOS': df_com_lider,
+            **{lider: grupo for lider, grupo in df_com_lider.groupby('Lider', sort=True)}
+        }
+    return particoes
+
+
+# Processar dados com líder (cache por versão)
+particoes_lider = preparar_particoes_lider(
+    f"{versao_dados}|{versao_arquivos(ARQUIVO_MAPEAMENTO)}", dados_comparativo, df_mapeamento)
+df_hoje_com_lider = particoes_lider['hoje']['TODOS']
 
 # Verificar associação
 com_lider_hoje = df_hoje_com_lider['Lider'].notna().sum()
 
 if com_lider_hoje > 0:
-    lideres = ['TODOS'] + \
-        sorted(df_hoje_com_lider['Lider'].dropna().unique().tolist())
+    lideres = ['TODOS'] + [
+        lider for lider in particoes_lider['hoje'] if lider != 'TODOS']
 
     st.markdown('<h3 class="titulo-secao">🎯 Seleção de Líder</h3>',
                 unsafe_allow_html=True)
     lider_selecionado = st.selectbox(
         "Selecione o líder:", lideres, label_visibility="collapsed")
 
-    # Filtrar dados
-    if lider_selecionado == 'TODOS':
-        df_hoje_filtrado = df_hoje_com_lider.copy()
+    # Filtrar dados: consulta O(1) às partições (frames compartilhados, não alterar)
+    df_hoje_filtrado = particoes_lider['hoje'][lider_selecionado]
+
+    # Datas do comparativo: a de hoje vem dos dados carregados, as demais dos snapshots diários
+    datas_disponiveis = [data_referencia] + [
+        data for data in snapshots_diarios.datas() if data != data_referencia]
+    if len(datas_disponiveis) > 1:
+        col_data_base, col_data_comparacao = st.columns(2)
+        with col_data_base:
+            data_base = st.selectbox(
+                "📅 Data base:", datas_disponiveis, format_func=formatar_data_snapshot)
+        datas_comparacao = [data for data in datas_disponiveis if data != data_base]
+        anteriores = [data for data in datas_comparacao if data < data_base]
+        with col_data_comparacao:
+            data_comparacao = st.selectbox(
+                "📅 Comparar com:", datas_comparacao, format_func=formatar_data_snapshot,
+                index=datas_comparacao.index(anteriores[0]) if anteriores else 0)
     else:
-        df_hoje_filtrado = df_hoje_com_lider[df_hoje_com_lider['Lider'] == lider_selecionado].copy(
-        )
-
-    if tem_dados_ontem and not df_ontem_com_lider.empty:
-        if lider_selecionado == 'TODOS':
-            df_ontem_filtrado = df_ontem_com_lider.copy()
-        else:
-            df_ontem_filtrado = df_ontem_com_lider[df_ontem_com_lider['Lider'] == lider_selecionado].copy(
-            )
-    else:
-        df_ontem_filtrado = pd.DataFrame()
+        data_base, data_comparacao = data_referencia, None
 
     # Mostrar informações do filtro
     st.markdown(
         f'<div class="info-box">📊 Dados de HOJE ({lider_selecionado}): {len(df_hoje_filtrado):,} registros</div>', unsafe_allow_html=True)
 
-    if tem_dados_ontem:
-        st.markdown(
-            f'<div class="info-box">📊 Dados de ONTEM ({lider_selecionado}): {len(df_ontem_filtrado):,} registros</div>', unsafe_allow_html=True)
-
     # Mostrar polos do líder
     if lider_selecionado != 'TODOS' and not df_hoje_filtrado.empty:
         polos = df_hoje_filtrado['Provider'].unique()
         st.markdown(
             f'<div class="info-box">🏢 <strong>Polos:</strong> {", ".join(polos)}</div>', unsafe_allow_html=True)
 
-    # Calcular métricas
-    metricas_hoje = calcular_metricas_safra(df_hoje_filtrado)
+    # Calcular métricas (outras datas: uma linha de agregados do snapshot, sem reler o relatório)
+    metricas_atuais = calcular_metricas_safra(df_hoje_filtrado)
+    metricas_hoje = metricas_da_data(data_base, metricas_atuais, lider_selecionado)
+    metricas_ontem = metricas_da_data(data_comparacao, metricas_atuais, lider_selecionado) \
+        if data_comparacao else None
+    rotulo_atual = formatar_data_snapshot(data_base)
+    rotulo_comparacao = formatar_data_snapshot(data_comparacao) if data_comparacao else ''
 
-    if tem_dados_ontem and not df_ontem_filtrado.empty:
-        metricas_ontem = calcular_metricas_safra(df_ontem_filtrado)
+    if metricas_hoje is not None and metricas_ontem is not None:
         deltas = calcular_deltas(metricas_hoje, metricas_ontem)
         mostrar_comparacao = True
     else:
+        metricas_hoje = metricas_hoje or metricas_atuais
         metricas_ontem = {'total_em_aberto': 0,
                           'em_atraso': 0, 'perc_atraso': 0.0, 'sla_medio': 0.0}
         deltas = {'delta_total': 0, 'delta_atraso': 0,
@@ -941,7 +1023,7 @@ if com_lider_hoje > 0:
     # Seção de comparação detalhada
     if mostrar_comparacao:
         st.markdown(
-            '<h3 class="titulo-secao">📊 Evolução: Hoje vs Ontem</h3>', unsafe_allow_html=True)
+            f'<h3 class="titulo-secao">📊 Evolução: {rotulo_atual} vs {rotulo_comparacao}</h3>', unsafe_allow_html=True)
 
         col1, col2 = st.columns([1, 1])
 
@@ -957,7 +1039,7 @@ if com_lider_hoje > 0:
             st.markdown(f"""
                 <div class="comparison-item">
                     <span>Total em Aberto:</span>
-                    <span>{metricas_hoje['total_em_aberto']:,} (hoje) vs {metricas_ontem['total_em_aberto']:,} (ontem)</span>
+                    <span>{metricas_hoje['total_em_aberto']:,} ({rotulo_atual}) vs {metricas_ontem['total_em_aberto']:,} ({rotulo_comparacao})</span>
                     <span class="delta-{delta_cor}">{deltas['delta_total']:+,}</span>
                 </div>
             """, unsafe_allow_html=True)
@@ -967,7 +1049,7 @@ if com_lider_hoje > 0:
             st.markdown(f"""
                 <div class="comparison-item">
                     <span>Em Atraso:</span>
-                    <span>{metricas_hoje['em_atraso']:,} (hoje) vs {metricas_ontem['em_atraso']:,} (ontem)</span>
+                    <span>{metricas_hoje['em_atraso']:,} ({rotulo_atual}) vs {metricas_ontem['em_atraso']:,} ({rotulo_comparacao})</span>
                     <span class="delta-{delta_cor}">{deltas['delta_atraso']:+,}</span>
                 </div>
             """, unsafe_allow_html=True)
@@ -977,7 +1059,7 @@ if com_lider_hoje > 0:
             st.markdown(f"""
                 <div class="comparison-item">
                     <span>% em Atraso:</span>
-                    <span>{metricas_hoje['perc_atraso']:.1f}% (hoje) vs {metricas_ontem['perc_atraso']:.1f}% (ontem)</span>
+                    <span>{metricas_hoje['perc_atraso']:.1f}% ({rotulo_atual}) vs {metricas_ontem['perc_atraso']:.1f}% ({rotulo_comparacao})</span>
                     <span class="delta-{delta_cor}">{deltas['delta_perc_atraso']:+.1f}%</span>
                 </div>
             """, unsafe_allow_html=True)
@@ -987,7 +1069,7 @@ if com_lider_hoje > 0:
             st.markdown(f"""
                 <div class="comparison-item">
                     <span>SLA Médio:</span>
-                    <span>{metricas_hoje['sla_medio']:.1f} (hoje) vs {metricas_ontem['sla_medio']:.1f} (ontem)</span>
+                    <span>{metricas_hoje['sla_medio']:.1f} ({rotulo_atual}) vs {metricas_ontem['sla_medio']:.1f} ({rotulo_comparacao})</span>
                     <span class="delta-{delta_cor}">{deltas['delta_sla_medio']:+.1f}</span>
                 </div>
             </div>
@@ -996,13 +1078,13 @@ if com_lider_hoje > 0:
         with col2:
             # Gráfico de comparação responsivo
             fig_comparacao, config_comparacao = criar_grafico_comparacao(
-                metricas_hoje, metricas_ontem)
+                metricas_hoje, metricas_ontem, rotulo_atual, rotulo_comparacao)
             if fig_comparacao:
                 st.plotly_chart(
                     fig_comparacao, use_container_width=True, config=config_comparacao)
 
     # Ranking vertical
-    if metricas_hoje['em_atraso'] > 0:
+    if metricas_atuais['em_atraso'] > 0:
         st.markdown(
             '<h3 class="titulo-secao">🏆 Ranking: Polos com Mais Ordens em Atraso (Hoje)</h3>', unsafe_allow_html=True)
 
@@ -1012,7 +1094,7 @@ if com_lider_hoje > 0:
             em_atraso_df = df_hoje_filtrado[sla_validos >= 2]
 
             if not em_atraso_df.empty:
-                ranking = em_atraso_df['Provider'].value_counts()
+                ranking = contar_valores(em_atraso_df['Provider'])
                 fig, config = criar_ranking_vertical(ranking)
 
                 if fig:
@@ -1020,7 +1102,7 @@ if com_lider_hoje > 0:
                         fig, use_container_width=True, config=config)
 
     # Análise do Último Tracking das Ordens em Aberto
-    if metricas_hoje['total_em_aberto'] > 0:
+    if metricas_atuais['total_em_aberto'] > 0:
         st.markdown(
             '<h3 class="titulo-secao">📋 Status das Ordens em Aberto (Último Tracking)</h3>', unsafe_allow_html=True)
 
@@ -1064,6 +1146,35 @@ if com_lider_hoje > 0:
         st.caption(
             f"Mostrando {min(max_registros, len(df_hoje_filtrado)):,} de {len(df_hoje_filtrado):,} registros")
 
+    # Histórico consolidado: só as tabelas agregadas, sem tocar no histórico
+    manifesto_visoes = carregar_manifesto(DIRETORIO_VISOES)
+    if manifesto_visoes is not None:
+        visoes_historico = carregar_visoes_historico(manifesto_visoes['versao'], manifesto_visoes)
+        visao_status = visoes_historico['status_tratativa']
+        visao_provider = visoes_historico['provider']
+        if lider_selecionado != 'TODOS' and not visao_provider.empty:
+            visao_provider = visao_provider[visao_provider['Provider'].isin(df_hoje_filtrado['Provider'].unique())]
+
+        st.markdown('<h3 class="titulo-secao">📚 Histórico Consolidado</h3>',
+                    unsafe_allow_html=True)
+
+        col1, col2 = st.columns(2)
+        with col1:
+            st.markdown("**Por Status da Tratativa**")
+            if not visao_status.empty:
+                st.dataframe(visao_status.sort_values('Quantidade', ascending=False),
+                             use_container_width=True)
+            else:
+                mostrar_mensagem_status('info', "Visão por status da tratativa não publicada")
+        with col2:
+            st.markdown("**Por Provider**")
+            if not visao_provider.empty:
+                st.dataframe(visao_provider.sort_values('Quantidade', ascending=False),
+                             use_container_width=True)
+            else:
+                mostrar_mensagem_status('info', "Nenhum provider do líder no histórico consolidado")
+        st.caption(f"Versão {manifesto_visoes['versao']} publicada em {manifesto_visoes['gerado_em']}")
+
     # Exportação
     st.markdown('<h3 class="titulo-secao">📥 Exportação</h3>',
                 unsafe_allow_html=True)
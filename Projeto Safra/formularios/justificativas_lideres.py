@@ -9,10 +9,16 @@ from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.base import MIMEBase
 from email import encoders
-import unicodedata
 
 sys.path.append(str(Path(__file__).parent.parent))
 from config.settings import config
+from src.cache_ingestao import obter_cache
+from src.utils import montar_colunas_leitura
+from src.normalizacao import normalizar_providers, normalizar_polos_sap
+from src.armazenamento_sqlite import ArmazemJustificativas
+
+# Pasta das planilhas gravadas uma a uma antes do banco (migradas no primeiro acesso)
+PASTA_JUSTIFICATIVAS_LEGADA = Path("data/justificativas")
 
 def aplicar_estilo_formulario():
     """CSS específico para o formulário"""
@@ -80,8 +86,8 @@ def calcular_semana_ano(data=None):
     if data is None:
         data = datetime.now()
     
-    semana = data.isocalendar()[1]
-    ano = data.year
+    # Ano ISO junto com a semana ISO: 30/12/2024 é a semana 1 de 2025
+    ano, semana, _ = data.isocalendar()
     
     # Calcular início e fim da semana
     inicio_semana = data - timedelta(days=data.weekday())
@@ -91,28 +97,6 @@ def calcular_semana_ano(data=None):
     
     return semana, ano, periodo
 
-def remover_acentos(texto):
-    if pd.isna(texto):
-        return ""
-    texto = str(texto)
-    return unicodedata.normalize('NFD', texto).encode('ascii', 'ignore').decode('ascii')
-
-def normalizar_provider(provider):
-    if pd.isna(provider):
-        return ""
-    provider_str = str(provider).strip().upper()
-    if provider_str.startswith('POLO '):
-        provider_str = provider_str[5:]
-    provider_str = remover_acentos(provider_str)
-    return provider_str
-
-def normalizar_polo_sap(polo_sap):
-    if pd.isna(polo_sap):
-        return ""
-    polo_str = str(polo_sap).strip().upper()
-    polo_str = remover_acentos(polo_str)
-    return polo_str
-
 def calcular_metricas_polo(df_polo):
     """Calcula métricas de um polo específico"""
     if df_polo.empty:
@@ -142,43 +126,27 @@ def calcular_metricas_polo(df_polo):
         'perc_atraso': perc_atraso
     }
 
-def salvar_justificativas_excel(dados_formulario):
-    """Salva justificativas em Excel na pasta compartilhada"""
-    
-    # Criar pasta se não existir
-    pasta_justificativas = Path("data/justificativas")
-    pasta_justificativas.mkdir(parents=True, exist_ok=True)
-    
-    # Nome do arquivo com timestamp
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M")
-    nome_arquivo = f"{timestamp}_{dados_formulario['lider'].replace(' ', '_')}_S{dados_formulario['semana']}.xlsx"
-    
-    caminho_arquivo = pasta_justificativas / nome_arquivo
-    
-    # Preparar dados para Excel
-    dados_excel = []
-    
-    for polo_info in dados_formulario['polos']:
-        dados_excel.append({
-            'Data': dados_formulario['data'],
-            'Semana': dados_formulario['semana'],
-            'Lider': dados_formulario['lider'],
-            'Polo': polo_info['nome'],
-            'Ordens_Em_Aberto': polo_info['metricas']['total_em_aberto'],
-            'Ordens_Em_Atraso': polo_info['metricas']['em_atraso'],
-            'Perc_Atraso': polo_info['metricas']['perc_atraso'],
-            'Justificativa': polo_info['justificativa'],
-            'Acao_Corretiva': polo_info['acao_corretiva'],
-            'Observacoes': dados_formulario['observacoes']
-        })
-    
-    # Salvar em Excel
-    df_excel = pd.DataFrame(dados_excel)
-    df_excel.to_excel(caminho_arquivo, index=False)
-    
-    return caminho_arquivo
+@st.cache_resource(show_spinner=False)
+def obter_armazem_justificativas():
+    """Armazém de justificativas (SQLite compartilhado com o log de exportações)"""
+    armazem = ArmazemJustificativas(config.PROCESSED_DIR / config.BANCO_OPERACIONAL)
+    try:
+        armazem.importar_planilhas(PASTA_JUSTIFICATIVAS_LEGADA)
+    except Exception as e:
+        # As planilhas que faltaram continuam na pasta e são migradas na próxima sessão
+        st.warning(f"⚠️ Planilhas antigas de justificativas não migradas: {e}")
+    return armazem
+
+def salvar_justificativas(dados_formulario, ano):
+    """Grava o envio no armazém de justificativas e devolve o id do envio"""
+    return obter_armazem_justificativas().registrar(dados_formulario, ano)
+
+def nome_planilha_justificativas(envio):
+    """Nome do .xlsx de um envio (mesmo padrão das planilhas gravadas antes do banco)"""
+    timestamp = envio['enviado_em'].strftime("%Y%m%d_%H%M")
+    return f"{timestamp}_{envio['lider'].replace(' ', '_')}_S{envio['semana']}.xlsx"
 
-def enviar_notificacao_email(dados_formulario, caminho_arquivo):
+def enviar_notificacao_email(dados_formulario, nome_anexo, conteudo_anexo):
     """Envia notificação por email (configurar conforme seu ambiente)"""
     
     try:
@@ -214,8 +182,7 @@ def enviar_notificacao_email(dados_formulario, caminho_arquivo):
 ⚠️ Polos com Atraso:
 {resumo_polos}
 
-📁 Arquivo: {caminho_arquivo.name}
-📂 Pasta: {caminho_arquivo.parent}
+📁 Anexo: {nome_anexo}
 
 💬 Observações: {dados_formulario['observacoes']}
 
@@ -225,15 +192,14 @@ Dashboard Safra - Sistema Automático
         
         msg.attach(MIMEText(corpo_email, 'plain'))
         
-        # Anexar Excel
-        with open(caminho_arquivo, "rb") as attachment:
-            part = MIMEBase('application', 'octet-stream')
-            part.set_payload(attachment.read())
+        # Anexar Excel (gerado em memória a partir do armazém)
+        part = MIMEBase('application', 'octet-stream')
+        part.set_payload(conteudo_anexo)
         
         encoders.encode_base64(part)
         part.add_header(
             'Content-Disposition',
-            f'attachment; filename= "{caminho_arquivo.name}"'
+            f'attachment; filename= "{nome_anexo}"'
         )
         msg.attach(part)
         
@@ -260,15 +226,22 @@ def carregar_dados_dashboard():
     
     # Fallback: carregar dados diretamente
     try:
-        df_hoje = pd.read_excel('data/input/Relatorio_Diario1.xlsx')
-        df_mapeamento = pd.read_excel('data/input/pagresolve_regionais.xlsx')
+        cache_ingestao = obter_cache(config.CACHE_DIR)
+        df_hoje = cache_ingestao.ler_excel(
+            'data/input/Relatorio_Diario1.xlsx',
+            colunas=montar_colunas_leitura(
+                config.TIPOS_DADOS, config.COLUNAS_CHAVE, config.COLUNAS_ATUALIZAR, config.COLUNAS_FEEDBACK
+            ),
+            tipos=config.TIPOS_DADOS
+        )
+        df_mapeamento = cache_ingestao.ler_excel('data/input/pagresolve_regionais.xlsx')
         
         # Excluir TEFTI
-        df_hoje = df_hoje[df_hoje['Provider'] != 'TEFTI'].copy()
+        df_hoje = df_hoje[~df_hoje['Provider'].isin(config.PROVIDERS_EXCLUIDOS)].copy()
         
         # Processar com líder
-        df_hoje['Provider_Normalizado'] = df_hoje['Provider'].apply(normalizar_provider)
-        df_mapeamento['Polo_SAP_Normalizado'] = df_mapeamento['Polo + SAP'].apply(normalizar_polo_sap)
+        df_hoje['Provider_Normalizado'] = normalizar_providers(df_hoje['Provider'])
+        df_mapeamento['Polo_SAP_Normalizado'] = normalizar_polos_sap(df_mapeamento['Polo + SAP'])
         
         df_hoje_com_lider = df_hoje.merge(
             df_mapeamento[['Polo_SAP_Normalizado', 'Líder PagResolve']],
@@ -355,6 +328,11 @@ if lider_selecionado:
     st.success(f"✅ Líder selecionado: **{lider_selecionado}**")
     st.info(f"🏢 Polos sob sua responsabilidade: **{len(polos_lider)}** polos")
     
+    ultimo_envio = obter_armazem_justificativas().ultimo_envio(lider_selecionado, ano, semana)
+    if ultimo_envio is not None:
+        st.warning(f"📌 Você já enviou justificativas nesta semana em "
+                   f"{ultimo_envio['enviado_em'].strftime('%d/%m/%Y %H:%M')} - um novo envio será registrado como atualização")
+    
     # SEÇÃO 2: Polos e Métricas
     st.markdown('<h3>🏢 Polos e Justificativas</h3>', unsafe_allow_html=True)
     
@@ -501,28 +479,31 @@ if lider_selecionado:
                     st.error(f"• {erro}")
             else:
                 try:
-                    # Salvar em Excel
-                    caminho_arquivo = salvar_justificativas_excel(dados_formulario)
+                    # Registrar no armazém de justificativas
+                    armazem = obter_armazem_justificativas()
+                    envio_id = salvar_justificativas(dados_formulario, ano)
+                    envio = armazem.obter_envio(envio_id)
                     
-                    # Enviar notificação por email
-                    email_enviado = enviar_notificacao_email(dados_formulario, caminho_arquivo)
+                    # Enviar notificação por email com a planilha gerada em memória
+                    nome_anexo = nome_planilha_justificativas(envio)
+                    conteudo_anexo = armazem.exportar_excel(envio_id)
+                    email_enviado = enviar_notificacao_email(dados_formulario, nome_anexo, conteudo_anexo)
                     
                     # Feedback de sucesso
                     st.success("✅ Justificativas enviadas com sucesso!")
-                    st.info(f"📁 Arquivo salvo: {caminho_arquivo.name}")
+                    st.info(f"🗃️ Envio nº {envio_id} registrado")
                     
                     if email_enviado:
                         st.success("📧 Notificação enviada por email!")
                     else:
-                        st.warning("⚠️ Arquivo salvo, mas email não configurado")
+                        st.warning("⚠️ Justificativas registradas, mas email não configurado")
                     
-                    # Mostrar informações do arquivo
+                    # Mostrar informações do envio
                     st.markdown(f"""
                     **📋 Detalhes do Envio:**
-                    - **Arquivo:** {caminho_arquivo.name}
-                    - **Localização:** {caminho_arquivo.parent}
-                    - **Tamanho:** {caminho_arquivo.stat().st_size} bytes
-                    - **Data/Hora:** {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}
+                    - **Envio:** nº {envio_id}
+                    - **Planilha:** {nome_anexo} ({len(conteudo_anexo):,} bytes)
+                    - **Data/Hora:** {envio['enviado_em'].strftime('%d/%m/%Y %H:%M:%S')}
                     """)
                     
                     # Limpar formulário após 3 segundos
@@ -558,7 +539,7 @@ if lider_selecionado:
         
         **4. Envio**
         - Revise o resumo antes de enviar
-        - O sistema salvará em Excel e enviará notificação
+        - O sistema registrará as justificativas e enviará notificação
         
         ### 🎯 Critérios de Obrigatoriedade
         - **🔴 Crítico (≥30%):** Justificativa e ação obrigatórias
@@ -568,39 +549,46 @@ if lider_selecionado:
         ### 📧 Notificações
         - Email automático será enviado para a gestão
         - Arquivo Excel anexado com todos os detalhes
-        - Histórico preservado na pasta compartilhada
+        - Histórico preservado no banco de justificativas (planilha de cada envio disponível no histórico)
         """)
     
     # SEÇÃO 6: Histórico (se disponível)
     with st.expander("📚 Histórico de Justificativas", expanded=False):
         try:
-            pasta_justificativas = Path("data/justificativas")
-            if pasta_justificativas.exists():
-                arquivos_historico = list(pasta_justificativas.glob("*.xlsx"))
+            armazem = obter_armazem_justificativas()
+            
+            # Conformidade da semana: líderes com e sem envio
+            conformidade = armazem.conformidade(ano, semana, lideres_disponiveis)
+            enviaram = int(conformidade['enviou'].sum())
+            st.write(f"**Semana {semana}:** {enviaram} de {len(conformidade)} líderes enviaram justificativas")
+            pendentes = conformidade.loc[~conformidade['enviou'], 'lider'].tolist()
+            if pendentes:
+                st.write(f"⏳ Pendentes: {', '.join(pendentes)}")
+            
+            envios_recentes = armazem.historico(limite=10)
+            
+            if not envios_recentes.empty:
+                st.write("**Últimas justificativas enviadas:**")
                 
-                if arquivos_historico:
-                    st.write("**Últimas justificativas enviadas:**")
-                    
-                    # Mostrar últimos 10 arquivos
-                    arquivos_recentes = sorted(arquivos_historico, key=lambda x: x.stat().st_mtime, reverse=True)[:10]
-                    
-                    for arquivo in arquivos_recentes:
-                        # Extrair informações do nome do arquivo
-                        nome_parts = arquivo.stem.split('_')
-                        if len(nome_parts) >= 3:
-                            data_envio = nome_parts[0]
-                            hora_envio = nome_parts[1]
-                            lider_nome = ' '.join(nome_parts[2:-1])
-                            semana_info = nome_parts[-1]
-                            
-                            data_formatada = f"{data_envio[:2]}/{data_envio[2:4]}/{data_envio[4:8]}"
-                            hora_formatada = f"{hora_envio[:2]}:{hora_envio[2:4]}"
-                            
-                            st.write(f"• {data_formatada} {hora_formatada} - {lider_nome} - {semana_info}")
-                else:
-                    st.info("Nenhuma justificativa anterior encontrada")
+                for envio in envios_recentes.itertuples(index=False):
+                    st.write(f"• {envio.enviado_em.strftime('%d/%m/%Y %H:%M')} - {envio.lider} - "
+                             f"S{envio.semana} ({envio.polos} polos)")
+                
+                # Planilha gerada só para o envio escolhido
+                indice_envio = st.selectbox(
+                    "Baixar planilha do envio:",
+                    range(len(envios_recentes)),
+                    format_func=lambda i: nome_planilha_justificativas(envios_recentes.iloc[i])
+                )
+                envio_escolhido = envios_recentes.iloc[indice_envio]
+                st.download_button(
+                    "📥 Download Excel",
+                    data=armazem.exportar_excel(envio_escolhido['id']),
+                    file_name=nome_planilha_justificativas(envio_escolhido),
+                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                )
             else:
-                st.info("Pasta de histórico não encontrada")
+                st.info("Nenhuma justificativa anterior encontrada")
                 
         except Exception as e:
             st.warning(f"Não foi possível carregar histórico: {e}")
@@ -26,7 +26,7 @@ def verificar_dependencias():
         print("Execute: python -m pip install pandas pytz openpyxl pyarrow")
         return False
 
-def executar_etl_seguro(arquivo_relatorio=None):
+def executar_etl_seguro(arquivo_relatorio=None, streaming=False, forcar=False):
     """Executa ETL com tratamento de erros robusto"""
     try:
         print("📊 Iniciando processamento ETL...")
@@ -44,21 +44,51 @@ def executar_etl_seguro(arquivo_relatorio=None):
                 'BACKUP_DIR': Path('data/backup'),
                 'LOGS_DIR': Path('logs'),
                 'RELATORIO_DIARIO': 'Relatorio_Diario.xlsx',
-                'DASHBOARD_DATA': 'dashboard_data.parquet'
+                'BASE_HISTORICA': 'safra_base_historica.parquet',
+                'DASHBOARD_DATA': 'dashboard_data.parquet',
+                'ARQUIVO_MAPEAMENTO': 'pagresolve_regionais.xlsx',
+                'MANIFESTO_EXECUCAO': 'manifesto_execucao.json',
+                'ARQUIVO_METRICAS': 'metricas_etl.jsonl'
             })()
             
             # Criar diretórios
             for dir_path in [config.INPUT_DIR, config.PROCESSED_DIR, config.BACKUP_DIR, config.LOGS_DIR]:
                 Path(dir_path).mkdir(parents=True, exist_ok=True)
         
+        # Pular a rodada quando entradas, configuração e saídas não mudaram
+        from src.manifesto_execucao import ManifestoExecucao, impressao_configuracao
+        from src.dados_dashboard import ler_token_versao
+        
+        arquivo_saida = config.PROCESSED_DIR / config.DASHBOARD_DATA
+        manifesto = ManifestoExecucao(config.PROCESSED_DIR / config.MANIFESTO_EXECUCAO)
+        impressao = manifesto.calcular_impressao({
+            'relatorio_diario': Path(arquivo_relatorio) if arquivo_relatorio else config.INPUT_DIR / config.RELATORIO_DIARIO,
+            'base_historica': config.PROCESSED_DIR / config.BASE_HISTORICA,
+            'mapeamento': config.INPUT_DIR / config.ARQUIVO_MAPEAMENTO
+        }, impressao_configuracao(config))
+        
+        if not forcar and manifesto.inalterado(impressao):
+            print("⏭️ Nada mudou desde a última execução - ETL não reexecutado (use --force para forçar)")
+            return True
+        
         # Tentar usar ETL completo, senão usar versão simplificada
+        # (o pipeline fica em src/etl/init.py: sem __init__.py, "from src.etl import" não o encontra)
         try:
-            from src.etl import executar_etl
+            from src.etl.init import executar_etl
             print("✅ Módulo ETL carregado")
-            return executar_etl(arquivo_relatorio)
+            sucesso = executar_etl(arquivo_relatorio, streaming=streaming)
         except Exception as e:
+            if streaming:
+                # A versão simplificada lê o relatório inteiro de uma vez: cair nela ignoraria o --streaming
+                print(f"❌ --streaming requer o ETL completo, que falhou: {e}")
+                return False
             print(f"⚠️ ETL completo não disponível, usando versão simplificada: {e}")
-            return executar_etl_simplificado(config, arquivo_relatorio)
+            sucesso = executar_etl_simplificado(config, arquivo_relatorio)
+        
+        if sucesso:
+            token = ler_token_versao(arquivo_saida) or {}
+            manifesto.registrar(impressao, {'dashboard_data': arquivo_saida}, {'dashboard_data': token.get('linhas', 0)})
+        return sucesso
             
     except Exception as e:
         print(f"❌ Erro no ETL: {e}")
@@ -70,8 +100,13 @@ def executar_etl_simplificado(config, arquivo_relatorio=None):
         import pandas as pd
         from datetime import datetime
         import pytz
+        from src.utils import calcular_dias_em_aberto_vetorizado
+        from src.classificacao import classificar_ordens
+        from src.dados_dashboard import publicar_dados_dashboard
+        from src.instrumentacao import MonitorEtapas
         
         print("🔄 Executando ETL simplificado...")
+        monitor = MonitorEtapas('simplificado', Path(config.LOGS_DIR) / config.ARQUIVO_METRICAS)
         
         # Determinar arquivo de entrada
         if arquivo_relatorio:
@@ -86,7 +121,9 @@ def executar_etl_simplificado(config, arquivo_relatorio=None):
         
         # Ler dados
         print(f"📖 Lendo dados de: {arquivo_entrada}")
-        df = pd.read_excel(arquivo_entrada)
+        with monitor.etapa('ler_relatorio') as etapa:
+            df = pd.read_excel(arquivo_entrada)
+            etapa['linhas_saida'] = len(df)
         print(f"📊 Registros lidos: {len(df)}")
         
         # Processamento básico
@@ -94,22 +131,25 @@ def executar_etl_simplificado(config, arquivo_relatorio=None):
         df['Data_Processamento'] = datetime.now(brasilia_tz)
         
         # Calcular dias em aberto (simplificado)
-        if 'Criação da Ordem' in df.columns:
-            df['Criação da Ordem'] = pd.to_datetime(df['Criação da Ordem'], errors='coerce')
-            hoje = datetime.now(brasilia_tz).date()
-            df['Dias_Em_Aberto'] = df['Criação da Ordem'].apply(
-                lambda x: (hoje - x.date()).days if pd.notna(x) else 0
-            )
-        else:
-            df['Dias_Em_Aberto'] = 5  # Valor padrão
+        with monitor.etapa('dias_em_aberto', len(df)) as etapa:
+            if 'Criação da Ordem' in df.columns:
+                df['Criação da Ordem'] = pd.to_datetime(df['Criação da Ordem'], errors='coerce')
+                df['Dias_Em_Aberto'] = calcular_dias_em_aberto_vetorizado(df['Criação da Ordem']).fillna(0)
+            else:
+                df['Dias_Em_Aberto'] = 5  # Valor padrão
+            etapa['linhas_saida'] = len(df)
         
         # Adicionar campos calculados
-        df['Status_SLA'] = df.apply(calcular_status_sla, axis=1)
-        df['Prioridade'] = df.apply(calcular_prioridade, axis=1)
+        with monitor.etapa('classificacao', len(df)) as etapa:
+            df = classificar_ordens(df, incluir_urgencia=False)
+            etapa['linhas_saida'] = len(df)
         
         # Salvar resultado
         arquivo_saida = config.PROCESSED_DIR / config.DASHBOARD_DATA
-        df.to_parquet(arquivo_saida, index=False)
+        with monitor.etapa('publicar', len(df)) as etapa:
+            publicar_dados_dashboard(df, arquivo_saida)
+            etapa['linhas_saida'] = len(df)
+        monitor.gravar(status='sucesso', linhas=len(df))
         print(f"💾 Dados salvos em: {arquivo_saida}")
         
         # Estatísticas
@@ -125,64 +165,13 @@ def executar_etl_simplificado(config, arquivo_relatorio=None):
         traceback.print_exc()
         return False
 
-def criar_arquivo_exemplo(caminho_arquivo):
-    """Cria arquivo de exemplo se não existir"""
-    import pandas as pd
-    from datetime import datetime, timedelta
+def criar_arquivo_exemplo(caminho_arquivo, n_ordens=500):
+    """Cria arquivo de exemplo se não existir (layout completo do Relatorio_Diario)"""
+    from src.gerador_sintetico import gerar_relatorio_diario, salvar
     
-    # Criar diretório se não existir
-    caminho_arquivo.parent.mkdir(parents=True, exist_ok=True)
-    
-    # Dados de exemplo mais realistas
-    dados_exemplo = pd.DataFrame({
-        'Ordem PagBank': [12345, 12346, 12347, 12348, 12349, 12350],
-        'Provider': ['POLO_A', 'POLO_B', 'POLO_A', 'POLO_C', 'POLO_B', 'POLO_A'],
-        'SLA Cliente': [5, 3, 7, 4, 6, 8],
-        'Status da Ordem': ['Em Aberto', 'Finalizado', 'Em Aberto', 'Em Aberto', 'Cancelado', 'Em Aberto'],
-        'Criação da Ordem': [
-            (datetime.now() - timedelta(days=3)).strftime('%d/%m/%Y'),
-            (datetime.now() - timedelta(days=1)).strftime('%d/%m/%Y'),
-            (datetime.now() - timedelta(days=5)).strftime('%d/%m/%Y'),
-            (datetime.now() - timedelta(days=2)).strftime('%d/%m/%Y'),
-            (datetime.now() - timedelta(days=7)).strftime('%d/%m/%Y'),
-            (datetime.now() - timedelta(days=10)).strftime('%d/%m/%Y')
-        ],
-        'Estado': ['SP', 'RJ', 'SP', 'MG', 'RJ', 'SP'],
-        'Cidade': ['São Paulo', 'Rio de Janeiro', 'Campinas', 'Belo Horizonte', 'Niterói', 'Santos'],
-        'CEP': ['01000-000', '20000-000', '13000-000', '30000-000', '24000-000', '11000-000'],
-        'Último Tracking': ['Em trânsito', 'Entregue', 'Saiu para entrega', 'Em separação', 'Cancelado', 'Aguardando coleta']
-    })
-    
-    dados_exemplo.to_excel(caminho_arquivo, index=False)
-    print(f"✅ Arquivo de exemplo criado: {caminho_arquivo}")
-
-def calcular_status_sla(row):
-    """Calcula status do SLA"""
-    try:
-        sla = row.get('SLA Cliente', 0)
-        dias_aberto = row.get('Dias_Em_Aberto', 0)
-        
-        if dias_aberto <= sla * 0.8:
-            return 'No Prazo'
-        elif dias_aberto <= sla:
-            return 'Atenção'
-        else:
-            return 'Vencido'
-    except:
-        return 'Indefinido'
-
-def calcular_prioridade(row):
-    """Calcula prioridade"""
-    try:
-        status_sla = row.get('Status_SLA', '')
-        if status_sla == 'Vencido':
-            return 'Alta'
-        elif status_sla == 'Atenção':
-            return 'Média'
-        else:
-            return 'Baixa'
-    except:
-        return 'Baixa'
+    dados_exemplo = gerar_relatorio_diario(n_ordens, fracao_sentinelas=0.01)
+    salvar(dados_exemplo, caminho_arquivo)
+    print(f"✅ Arquivo de exemplo criado: {caminho_arquivo} ({n_ordens} ordens sintéticas)")
 
 def iniciar_dashboard():
     """Inicia o dashboard Streamlit"""
@@ -232,6 +221,27 @@ def main():
         action="store_true",
         help="Executar apenas o dashboard (sem ETL)"
     )
+    parser.add_argument(
+        "--streaming",
+        action="store_true",
+        help="Ler o relatório diário em chunks de CHUNK_SIZE linhas"
+    )
+    parser.add_argument(
+        "--force",
+        "-f",
+        action="store_true",
+        help="Reexecutar o ETL mesmo sem mudanças desde a última execução"
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Perfilar o ETL com cProfile (.prof e resumo por tempo acumulado em logs/)"
+    )
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="Rastrear alocações com tracemalloc (maiores locais por etapa em logs/)"
+    )
     
     args = parser.parse_args()
     
@@ -249,9 +259,13 @@ def main():
             iniciar_dashboard()
             return
         
-        # Executar ETL
+        # Executar ETL (perfilado quando --profile / --trace-memory)
         logger.info("🚀 Iniciando pipeline ETL Safra")
-        sucesso = executar_etl_seguro(args.arquivo)
+        from src.perfilamento import PerfilExecucao
+        with PerfilExecucao(current_dir / "logs", perfilar=args.profile, rastrear_memoria=args.trace_memory) as perfil:
+            sucesso = executar_etl_seguro(args.arquivo, streaming=args.streaming, forcar=args.force)
+        for nome, arquivo in perfil.arquivos.items():
+            print(f"🔬 {nome}: {arquivo}")
         
         if sucesso:
             logger.info("✅ Pipeline ETL executado com sucesso!")
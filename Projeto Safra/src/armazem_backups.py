@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Armazém de backups do Consolidado: snapshots endereçados por conteúdo, comprimidos e com retenção
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import lzma
+import os
+import re
+import shutil
+import sys
+import tempfile
+import zipfile
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+sys.path.append(str(Path(__file__).parent.parent))
+from src.utils import arquivo_temporario, gravar_atomico, travar_arquivo
+
+Caminho = Union[str, Path]
+
+ARQUIVO_INDICE = "indice_backups.json"
+ARQUIVO_TRAVA = ".trava"
+PASTA_OBJETOS = "objetos"
+PASTA_LEGADOS = "legados_importados"  # cópias antigas já verificadas no armazém (podem ser apagadas)
+FORMATO_CARIMBO = "%Y%m%d_%H%M%S"
+TAMANHO_BLOCO = 1024 * 1024
+PRESET_LZMA = 1          # ~2x menor que o deflate do próprio xlsx com o mesmo custo de CPU (presets altos custam 30x mais)
+RETENCAO_PADRAO_DIAS = 30
+
+# Partes do xlsx que mudam a cada gravação mesmo com os mesmos dados (data de modificação do documento)
+MEMBROS_VOLATEIS = {'docProps/core.xml'}
+MEMBRO_ARQUIVO_INTEIRO = ''  # arquivos que não são zip viram um único objeto
+PADRAO_BACKUP_LEGADO = re.compile(r'_backup_(\d{8}_\d{6})\.xlsx$')
+
+
+def _blocos(arquivo) -> Iterator[bytes]:
+    return iter(lambda: arquivo.read(TAMANHO_BLOCO), b'')
+
+
+def _hash_conteudo(origem) -> str:
+    hash_conteudo = hashlib.sha256()
+    for bloco in _blocos(origem):
+        hash_conteudo.update(bloco)
+    return hash_conteudo.hexdigest()
+
+
+def _hashes_membros(arquivo: Path) -> Dict[str, str]:
+    """SHA-256 de cada parte do xlsx (ou do arquivo inteiro quando não é zip), sem as partes voláteis"""
+    if not zipfile.is_zipfile(arquivo):
+        with open(arquivo, 'rb') as origem:
+            return {MEMBRO_ARQUIVO_INTEIRO: _hash_conteudo(origem)}
+    with zipfile.ZipFile(arquivo) as pacote:
+        hashes = {}
+        for info in pacote.infolist():
+            if info.filename not in MEMBROS_VOLATEIS:
+                with pacote.open(info) as origem:
+                    hashes[info.filename] = _hash_conteudo(origem)
+        return hashes
+
+
+class ArmazemBackups:
+    """
+    Guarda cada versão do Consolidado como um snapshot: a lista das partes do xlsx, cada uma salva uma
+    única vez em objetos/ pelo SHA-256 do conteúdo descomprimido (xz). Partes que não mudaram entre
+    rodadas não ocupam espaço de novo e uma versão idêntica à última não gera snapshot.
+    """
+
+    def __init__(self, diretorio: Caminho):
+        self.diretorio = Path(diretorio)
+        self.pasta_objetos = self.diretorio / PASTA_OBJETOS
+        self.arquivo_indice = self.diretorio / ARQUIVO_INDICE
+        self.logger = logging.getLogger(__name__)
+
+    # ------------------------------------------------------------------ índice
+
+    def listar(self) -> List[Dict[str, Any]]:
+        """Snapshots do mais antigo ao mais recente"""
+        if not self.arquivo_indice.exists():
+            return []
+        with open(self.arquivo_indice, 'r', encoding='utf-8') as f:
+            return json.load(f)['snapshots']
+
+    def _gravar_indice(self, snapshots: List[Dict[str, Any]]) -> None:
+        """Substituição atômica do índice"""
+        gravar_atomico(self.arquivo_indice, {'snapshots': snapshots})
+
+    # ----------------------------------------------------------------- objetos
+
+    def _caminho_objeto(self, hash_conteudo: str) -> Path:
+        return self.pasta_objetos / hash_conteudo[:2] / f"{hash_conteudo}.xz"
+
+    def _guardar_objeto(self, abrir) -> Dict[str, Any]:
+        """
+        Hash do conteúdo em uma passada; só comprime quando o objeto ainda não existe
+        (abrir devolve um novo leitor binário a cada chamada)
+        """
+        hash_conteudo, tamanho = hashlib.sha256(), 0
+        with abrir() as origem:
+            for bloco in _blocos(origem):
+                hash_conteudo.update(bloco)
+                tamanho += len(bloco)
+        chave = hash_conteudo.hexdigest()
+
+        destino = self._caminho_objeto(chave)
+        novo = not destino.exists()
+        if novo:
+            with arquivo_temporario(destino) as temporario, abrir() as origem, \
+                    lzma.open(temporario, 'wb', preset=PRESET_LZMA) as saida:
+                shutil.copyfileobj(origem, saida, TAMANHO_BLOCO)
+
+        return {'objeto': chave, 'tamanho': tamanho, 'novo': novo}
+
+    def _objetos_referenciados(self, snapshots: List[Dict[str, Any]]) -> set:
+        return {membro['objeto'] for snapshot in snapshots for membro in snapshot['membros']}
+
+    @contextmanager
+    def _trava(self) -> Iterator[None]:
+        """
+        Exclusão mútua entre processos (arquivo criado com O_EXCL): criar_snapshot e podar não podem
+        se cruzar, senão a coleta de objetos apagaria partes de um snapshot ainda não indexado
+        """
+        with travar_arquivo(self.diretorio / ARQUIVO_TRAVA):
+            yield
+
+    @staticmethod
+    def _snapshot_anterior(snapshots: List[Dict[str, Any]], carimbo: str) -> Optional[Dict[str, Any]]:
+        """Snapshot imediatamente anterior (ou do mesmo carimbo) na ordem cronológica"""
+        anteriores = [snapshot for snapshot in snapshots if snapshot['carimbo'] <= carimbo]
+        return anteriores[-1] if anteriores else None
+
+    # ---------------------------------------------------------------- snapshots
+
+    def criar_snapshot(self, arquivo: Caminho, criado_em: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+        """
+        Registra a versão do arquivo em criado_em (None quando o conteúdo é igual ao do snapshot
+        anterior a essa data)
+        """
+        with self._trava():
+            return self._criar_snapshot(Path(arquivo), criado_em or datetime.now())
+
+    def _criar_snapshot(self, arquivo: Path, criado_em: datetime) -> Optional[Dict[str, Any]]:
+        carimbo = criado_em.strftime(FORMATO_CARIMBO)
+        snapshots = self.listar()
+
+        membros = []
+        if zipfile.is_zipfile(arquivo):
+            with zipfile.ZipFile(arquivo) as pacote:
+                for info in pacote.infolist():
+                    guardado = self._guardar_objeto(lambda info=info: pacote.open(info))
+                    membros.append({'nome': info.filename, 'compressao': info.compress_type,
+                                    'data': list(info.date_time), **guardado})
+        else:
+            guardado = self._guardar_objeto(lambda: open(arquivo, 'rb'))
+            membros.append({'nome': MEMBRO_ARQUIVO_INTEIRO, **guardado})
+
+        conteudo = hashlib.sha256(json.dumps(
+            [(membro['nome'], membro['objeto']) for membro in membros if membro['nome'] not in MEMBROS_VOLATEIS]
+        ).encode('utf-8')).hexdigest()
+
+        anterior = self._snapshot_anterior(snapshots, carimbo)
+        if anterior is not None and anterior['conteudo'] == conteudo:
+            self.logger.info(f"   ⏭️ Conteúdo idêntico ao backup {anterior['carimbo']} - snapshot não criado")
+            return None
+
+        carimbos = {snapshot['carimbo'] for snapshot in snapshots}
+        base, sufixo = carimbo, 1
+        while carimbo in carimbos:
+            sufixo += 1
+            carimbo = f"{base}-{sufixo}"
+
+        bytes_novos = sum(self._caminho_objeto(membro['objeto']).stat().st_size
+                          for membro in membros if membro.pop('novo'))
+        snapshot = {
+            'carimbo': carimbo,
+            'origem': arquivo.name,
+            'criado_em': criado_em.isoformat(timespec='seconds'),
+            'tamanho_original': arquivo.stat().st_size,
+            'bytes_novos': bytes_novos,
+            'conteudo': conteudo,
+            'membros': membros
+        }
+        self._gravar_indice(sorted(snapshots + [snapshot], key=lambda item: item['carimbo']))
+
+        self.logger.info(f"   ✅ Backup {carimbo}: {snapshot['tamanho_original'] / 1024:,.0f} KB originais, "
+                         f"{bytes_novos / 1024:,.0f} KB novos no armazém")
+        return snapshot
+
+    def localizar(self, carimbo: str) -> Dict[str, Any]:
+        """Snapshot pelo carimbo exato ou, para um prefixo (ex.: '20250624'), o mais recente que casar"""
+        snapshots = self.listar()
+        if not snapshots:
+            raise FileNotFoundError(f"Nenhum backup em {self.diretorio}")
+        if carimbo == 'ultimo':
+            return snapshots[-1]
+        candidatos = [snapshot for snapshot in snapshots if snapshot['carimbo'].startswith(carimbo)]
+        exatos = [snapshot for snapshot in candidatos if snapshot['carimbo'] == carimbo]
+        if not candidatos:
+            raise KeyError(f"Backup '{carimbo}' não encontrado")
+        return (exatos or candidatos)[-1]
+
+    def restaurar(self, carimbo: str, destino: Caminho) -> Path:
+        """Reconstrói o arquivo de um snapshot (as partes do xlsx voltam com a compressão e datas originais)"""
+        snapshot = self.localizar(carimbo)
+        destino = Path(destino)
+
+        membros = snapshot['membros']
+        with arquivo_temporario(destino) as temporario:
+            if len(membros) == 1 and membros[0]['nome'] == MEMBRO_ARQUIVO_INTEIRO:
+                with lzma.open(self._caminho_objeto(membros[0]['objeto']), 'rb') as origem, open(temporario, 'wb') as saida:
+                    shutil.copyfileobj(origem, saida, TAMANHO_BLOCO)
+            else:
+                with zipfile.ZipFile(temporario, 'w') as pacote:
+                    for membro in membros:
+                        info = zipfile.ZipInfo(membro['nome'], date_time=tuple(membro['data']))
+                        info.compress_type = membro['compressao']
+                        with lzma.open(self._caminho_objeto(membro['objeto']), 'rb') as origem, \
+                                pacote.open(info, 'w', force_zip64=membro['tamanho'] >= zipfile.ZIP64_LIMIT) as saida:
+                            shutil.copyfileobj(origem, saida, TAMANHO_BLOCO)
+
+        self.logger.info(f"♻️ Backup {snapshot['carimbo']} restaurado em {destino}")
+        return destino
+
+    def podar(self, dias_retencao: int = RETENCAO_PADRAO_DIAS, agora: Optional[datetime] = None) -> Dict[str, int]:
+        """
+        Remove snapshots mais antigos que a retenção (o mais recente é sempre mantido) e os objetos
+        que nenhum snapshot restante referencia
+        """
+        with self._trava():
+            return self._podar(dias_retencao, agora)
+
+    def _podar(self, dias_retencao: int, agora: Optional[datetime]) -> Dict[str, int]:
+        snapshots = self.listar()
+        limite = (agora or datetime.now()) - timedelta(days=dias_retencao)
+        mantidos = [snapshot for snapshot in snapshots[:-1]
+                    if datetime.fromisoformat(snapshot['criado_em']) >= limite] + snapshots[-1:]
+        if len(mantidos) != len(snapshots):
+            self._gravar_indice(mantidos)
+
+        referenciados = self._objetos_referenciados(mantidos)
+        objetos_removidos, bytes_liberados = 0, 0
+        if self.pasta_objetos.exists():
+            for objeto in self.pasta_objetos.glob('*/*.xz'):
+                if objeto.stem not in referenciados:
+                    bytes_liberados += objeto.stat().st_size
+                    objeto.unlink()
+                    objetos_removidos += 1
+
+        resultado = {'snapshots_removidos': len(snapshots) - len(mantidos), 'objetos_removidos': objetos_removidos,
+                     'bytes_liberados': bytes_liberados}
+        if objetos_removidos or resultado['snapshots_removidos']:
+            self.logger.info(f"   🧹 Retenção de {dias_retencao} dias: {resultado['snapshots_removidos']} snapshot(s) "
+                             f"e {objetos_removidos} objeto(s) removidos ({bytes_liberados / 1024:,.0f} KB)")
+        return resultado
+
+    def verificar(self, carimbo: str, arquivo: Caminho) -> bool:
+        """Restaura o snapshot em um temporário e confere, parte a parte, que reproduz o arquivo"""
+        self.diretorio.mkdir(parents=True, exist_ok=True)
+        with tempfile.TemporaryDirectory(dir=self.diretorio) as pasta:
+            restaurado = self.restaurar(carimbo, Path(pasta) / Path(arquivo).name)
+            return _hashes_membros(restaurado) == _hashes_membros(Path(arquivo))
+
+    def importar_legados(self) -> int:
+        """
+        Importa para o armazém as cópias Safra_Gerencial_backup_<carimbo>.xlsx do backup antigo. Cada
+        cópia só sai da pasta (para legados_importados/) depois de restaurada e conferida; as que
+        falharem ficam onde estão e são tentadas de novo na próxima execução.
+        """
+        if not self.diretorio.exists():
+            return 0
+        legados = sorted(
+            (correspondencia.group(1), arquivo) for arquivo in self.diretorio.glob('*_backup_*.xlsx')
+            if (correspondencia := PADRAO_BACKUP_LEGADO.search(arquivo.name))
+        )
+        importados = 0
+        for carimbo, arquivo in legados:
+            try:
+                # A data da cópia (não a da importação) é o que conta para a retenção
+                snapshot = self.criar_snapshot(arquivo, datetime.strptime(carimbo, FORMATO_CARIMBO)) \
+                    or self._snapshot_anterior(self.listar(), carimbo)
+                if snapshot is None or not self.verificar(snapshot['carimbo'], arquivo):
+                    self.logger.warning(f"⚠️ Backup legado {arquivo.name} não confere com o armazém - mantido")
+                    continue
+                destino = self.diretorio / PASTA_LEGADOS / arquivo.name
+                destino.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(arquivo, destino)
+                importados += 1
+            except Exception as e:
+                self.logger.warning(f"⚠️ Backup legado {arquivo.name} não importado: {e}")
+        if importados:
+            self.logger.info(f"   📦 {importados} backup(s) legado(s) importado(s) e conferido(s); "
+                             f"originais movidos para {PASTA_LEGADOS}/")
+        return importados
+
+    def uso_disco(self) -> int:
+        """Bytes ocupados pelos objetos do armazém"""
+        if not self.pasta_objetos.exists():
+            return 0
+        return sum(objeto.stat().st_size for objeto in self.pasta_objetos.glob('*/*.xz'))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Lista, restaura e poda os backups do Consolidado')
+    parser.add_argument('--diretorio', default=str(Path(__file__).parent.parent / 'backup'),
+                        help='Pasta do armazém (padrão: backup/ do projeto)')
+    comandos = parser.add_subparsers(dest='comando', required=True)
+    comandos.add_parser('listar', help='Lista os snapshots')
+    restaurar = comandos.add_parser('restaurar', help="Restaura um snapshot pelo carimbo (ou prefixo, ou 'ultimo')")
+    restaurar.add_argument('carimbo')
+    restaurar.add_argument('--destino', help='Arquivo de saída (padrão: <origem>_<carimbo>.xlsx na pasta atual)')
+    podar = comandos.add_parser('podar', help='Aplica a retenção')
+    podar.add_argument('--dias', type=int, default=RETENCAO_PADRAO_DIAS)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    armazem = ArmazemBackups(args.diretorio)
+
+    if args.comando == 'listar':
+        snapshots = armazem.listar()
+        for snapshot in snapshots:
+            print(f"{snapshot['carimbo']:<20} {snapshot['origem']:<45} "
+                  f"{snapshot['tamanho_original'] / 1024:>10,.0f} KB  (+{snapshot['bytes_novos'] / 1024:,.0f} KB)")
+        print(f"📦 {len(snapshots)} snapshot(s), {armazem.uso_disco() / 1024:,.0f} KB em disco")
+    elif args.comando == 'restaurar':
+        snapshot = armazem.localizar(args.carimbo)
+        destino = args.destino or f"{Path(snapshot['origem']).stem}_{snapshot['carimbo']}{Path(snapshot['origem']).suffix}"
+        armazem.restaurar(snapshot['carimbo'], destino)
+    else:
+        armazem.podar(args.dias)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
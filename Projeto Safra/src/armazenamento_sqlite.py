@@ -0,0 +1,387 @@
+import io
+import logging
+import re
+import sqlite3
+from contextlib import closing, contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+import pandas as pd
+
+Caminho = Union[str, Path]
+
+TIMEOUT_BLOQUEIO_S = 10.0   # espera por outro processo gravando antes de desistir
+FUSO_PADRAO = 'America/Sao_Paulo'
+
+ESQUEMA_EXPORTACOES = """
+CREATE TABLE IF NOT EXISTS exportacoes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    data_exportacao TEXT NOT NULL,          -- ISO 8601 em UTC: a ordem do texto é a ordem cronológica
+    polo_id TEXT NOT NULL,
+    quantidade_ordens INTEGER NOT NULL,
+    formato_exportacao TEXT NOT NULL,
+    usuario TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_exportacoes_data ON exportacoes (data_exportacao);
+"""
+
+# Arquivos do formato antigo já migrados: a marca é gravada na mesma transação que os dados
+ESQUEMA_MIGRACOES = """
+CREATE TABLE IF NOT EXISTS migracoes (
+    origem TEXT PRIMARY KEY,
+    migrado_em TEXT NOT NULL
+);
+"""
+
+
+@contextmanager
+def conectar(arquivo: Caminho) -> Iterator[sqlite3.Connection]:
+    """
+    Conexão curta com o banco local em modo WAL: leitores não bloqueiam o gravador e gravações
+    concorrentes (duas sessões do dashboard) esperam a vez em vez de falhar. Confirma ao sair do bloco.
+    """
+    arquivo = Path(arquivo)
+    arquivo.parent.mkdir(parents=True, exist_ok=True)
+    with closing(sqlite3.connect(arquivo, timeout=TIMEOUT_BLOQUEIO_S)) as conexao:
+        conexao.execute("PRAGMA journal_mode=WAL")
+        conexao.execute("PRAGMA synchronous=NORMAL")
+        with conexao:
+            yield conexao
+
+
+def para_texto_utc(momento: datetime) -> str:
+    """Data/hora com fuso em texto ISO UTC (sem fuso, assume o horário de Brasília)"""
+    momento = pd.Timestamp(momento)
+    if momento.tzinfo is None:
+        momento = momento.tz_localize(FUSO_PADRAO)
+    return momento.tz_convert('UTC').isoformat(timespec='microseconds')
+
+
+def de_texto_utc(serie: pd.Series, fuso: str = FUSO_PADRAO) -> pd.Series:
+    """Coluna de texto ISO UTC de volta para datetime no fuso informado"""
+    return pd.to_datetime(serie, utc=True, format='ISO8601').dt.tz_convert(fuso)
+
+
+def migracao_registrada(conexao: sqlite3.Connection, origem: str) -> bool:
+    """Se o arquivo antigo já entrou no banco"""
+    return conexao.execute("SELECT 1 FROM migracoes WHERE origem = ?", (origem,)).fetchone() is not None
+
+
+def registrar_migracao(conexao: sqlite3.Connection, origem: str) -> None:
+    conexao.execute("INSERT INTO migracoes (origem, migrado_em) VALUES (?, ?)",
+                    (origem, para_texto_utc(datetime.now(timezone.utc))))
+
+
+def marcar_migrado(arquivo: Path) -> None:
+    """Renomeia o arquivo antigo para .migrado (outra sessão pode já ter renomeado)"""
+    try:
+        arquivo.replace(arquivo.with_name(arquivo.name + '.migrado'))
+    except FileNotFoundError:
+        pass
+
+
+class AuditoriaExportacoes:
+    """Log de exportações do dashboard: uma inserção por exportação, consulta por período via índice"""
+
+    COLUNAS = ['data_exportacao', 'polo_id', 'quantidade_ordens', 'formato_exportacao', 'usuario']
+
+    def __init__(self, arquivo: Caminho):
+        self.arquivo = Path(arquivo)
+        self.logger = logging.getLogger(__name__)
+        self._esquema_criado = False
+
+    @contextmanager
+    def _conectar(self) -> Iterator[sqlite3.Connection]:
+        """Conexão com a tabela garantida (o banco só é criado no primeiro uso)"""
+        with conectar(self.arquivo) as conexao:
+            if not self._esquema_criado:
+                conexao.executescript(ESQUEMA_EXPORTACOES + ESQUEMA_MIGRACOES)
+                self._esquema_criado = True
+            yield conexao
+
+    def registrar(self, polo_id: str, quantidade_ordens: int, formato: str, usuario: str,
+                  momento: Optional[datetime] = None) -> None:
+        """Acrescenta uma exportação ao log (custo constante, independente do tamanho do histórico)"""
+        momento = momento or datetime.now(timezone.utc)
+        with self._conectar() as conexao:
+            conexao.execute(
+                "INSERT INTO exportacoes (data_exportacao, polo_id, quantidade_ordens, formato_exportacao, usuario) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (para_texto_utc(momento), str(polo_id), int(quantidade_ordens), formato, usuario)
+            )
+
+    def consultar(self, desde: datetime, fuso: str = FUSO_PADRAO) -> pd.DataFrame:
+        """Exportações a partir de 'desde', da mais recente para a mais antiga"""
+        with self._conectar() as conexao:
+            df = pd.read_sql_query(
+                f"SELECT {', '.join(self.COLUNAS)} FROM exportacoes "
+                "WHERE data_exportacao >= ? ORDER BY data_exportacao DESC",
+                conexao, params=(para_texto_utc(desde),)
+            )
+        df['data_exportacao'] = de_texto_utc(df['data_exportacao'], fuso)
+        return df
+
+    def importar_parquet(self, arquivo_parquet: Caminho) -> int:
+        """
+        Migra o histórico antigo (historico_exportacoes.parquet) numa única transação, que também grava
+        a marca da migração; o arquivo só é renomeado para .migrado depois do commit. Se a leitura ou a
+        inserção falhar, o Parquet continua no lugar e a próxima sessão tenta de novo. Um .migrado sem
+        marca (renomeado por versões anteriores antes de importar) também é importado, ignorando
+        registros que já estejam no banco.
+        """
+        arquivo_parquet = Path(arquivo_parquet)
+        origem = arquivo_parquet if arquivo_parquet.exists() else arquivo_parquet.with_name(arquivo_parquet.name + '.migrado')
+        if not origem.exists():
+            return 0
+        with self._conectar() as conexao:
+            ja_migrado = migracao_registrada(conexao, arquivo_parquet.name)
+        if ja_migrado:
+            marcar_migrado(arquivo_parquet)
+            return 0
+
+        historico = pd.read_parquet(origem)
+        registros = [
+            (para_texto_utc(linha.data_exportacao), str(linha.polo_id), int(linha.quantidade_ordens),
+             linha.formato_exportacao, linha.usuario)
+            for linha in historico.itertuples(index=False)
+        ]
+        with self._conectar() as conexao:
+            # Reserva a escrita antes de conferir a marca: duas sessões migrando ao mesmo tempo se enfileiram
+            conexao.execute("BEGIN IMMEDIATE")
+            if migracao_registrada(conexao, arquivo_parquet.name):
+                return 0
+            inseridos = conexao.executemany(
+                "INSERT INTO exportacoes (data_exportacao, polo_id, quantidade_ordens, formato_exportacao, usuario) "
+                "SELECT ?, ?, ?, ?, ? WHERE NOT EXISTS (SELECT 1 FROM exportacoes WHERE data_exportacao = ? "
+                "AND polo_id = ? AND quantidade_ordens = ? AND formato_exportacao = ? AND usuario = ?)",
+                [registro + registro for registro in registros]
+            ).rowcount
+            registrar_migracao(conexao, arquivo_parquet.name)
+        marcar_migrado(arquivo_parquet)
+
+        self.logger.info(f"🗃️ {inseridos:,} exportações migradas de {arquivo_parquet.name} para {self.arquivo.name}")
+        return inseridos
+
+
+ESQUEMA_JUSTIFICATIVAS = """
+CREATE TABLE IF NOT EXISTS envios_justificativas (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    enviado_em TEXT NOT NULL,               -- ISO 8601 em UTC
+    data TEXT NOT NULL,                     -- data exibida no formulário (dd/mm/aaaa)
+    ano INTEGER NOT NULL,
+    semana INTEGER NOT NULL,
+    periodo TEXT,
+    lider TEXT NOT NULL,
+    observacoes TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_envios_lider_semana ON envios_justificativas (lider, ano, semana, enviado_em);
+CREATE INDEX IF NOT EXISTS idx_envios_semana ON envios_justificativas (ano, semana);
+CREATE INDEX IF NOT EXISTS idx_envios_data ON envios_justificativas (enviado_em);
+
+CREATE TABLE IF NOT EXISTS justificativas_polos (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    envio_id INTEGER NOT NULL REFERENCES envios_justificativas (id),
+    polo TEXT NOT NULL,
+    ordens_em_aberto INTEGER,
+    ordens_em_atraso INTEGER,
+    perc_atraso REAL,
+    justificativa TEXT,
+    acao_corretiva TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_justificativas_envio ON justificativas_polos (envio_id);
+CREATE INDEX IF NOT EXISTS idx_justificativas_polo ON justificativas_polos (polo, envio_id);
+"""
+
+# Colunas da planilha de um envio (mesmo layout das planilhas gravadas antes do banco)
+COLUNAS_PLANILHA_JUSTIFICATIVAS = {
+    'data': 'Data', 'semana': 'Semana', 'lider': 'Lider', 'polo': 'Polo',
+    'ordens_em_aberto': 'Ordens_Em_Aberto', 'ordens_em_atraso': 'Ordens_Em_Atraso', 'perc_atraso': 'Perc_Atraso',
+    'justificativa': 'Justificativa', 'acao_corretiva': 'Acao_Corretiva', 'observacoes': 'Observacoes'
+}
+PADRAO_PLANILHA_LEGADA = re.compile(r'^(\d{8}_\d{4})_(.+)_S(\d+)$')
+
+
+class ArmazemJustificativas:
+    """
+    Justificativas semanais dos líderes: um envio (líder, semana, observações) com uma linha por polo.
+    Histórico, último envio do líder na semana e conformidade são consultas por índice; a planilha
+    de um envio é gerada sob demanda.
+    """
+
+    def __init__(self, arquivo: Caminho):
+        self.arquivo = Path(arquivo)
+        self.logger = logging.getLogger(__name__)
+        self._esquema_criado = False
+
+    @contextmanager
+    def _conectar(self) -> Iterator[sqlite3.Connection]:
+        """Conexão com as tabelas garantidas (o banco só é criado no primeiro uso)"""
+        with conectar(self.arquivo) as conexao:
+            if not self._esquema_criado:
+                conexao.executescript(ESQUEMA_JUSTIFICATIVAS + ESQUEMA_MIGRACOES)
+                self._esquema_criado = True
+            yield conexao
+
+    def registrar(self, dados_formulario: Dict[str, Any], ano: int, momento: Optional[datetime] = None) -> int:
+        """Grava o envio e as justificativas de cada polo numa única transação; devolve o id do envio"""
+        momento = momento or datetime.now(timezone.utc)
+        with self._conectar() as conexao:
+            return self._inserir_envio(conexao, dados_formulario, ano, momento)
+
+    @staticmethod
+    def _inserir_envio(conexao: sqlite3.Connection, dados_formulario: Dict[str, Any], ano: int,
+                       momento: datetime) -> int:
+        cursor = conexao.execute(
+            "INSERT INTO envios_justificativas (enviado_em, data, ano, semana, periodo, lider, observacoes) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (para_texto_utc(momento), dados_formulario['data'], int(ano), int(dados_formulario['semana']),
+             dados_formulario.get('periodo'), dados_formulario['lider'], dados_formulario.get('observacoes', ''))
+        )
+        envio_id = cursor.lastrowid
+        conexao.executemany(
+            "INSERT INTO justificativas_polos (envio_id, polo, ordens_em_aberto, ordens_em_atraso, perc_atraso, "
+            "justificativa, acao_corretiva) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                (envio_id, str(polo['nome']), int(polo['metricas']['total_em_aberto']),
+                 int(polo['metricas']['em_atraso']), float(polo['metricas']['perc_atraso']),
+                 polo['justificativa'], polo['acao_corretiva'])
+                for polo in dados_formulario['polos']
+            ]
+        )
+        return envio_id
+
+    def _consultar_envios(self, condicao: str, parametros: tuple, limite: Optional[int] = None,
+                          fuso: str = FUSO_PADRAO) -> pd.DataFrame:
+        consulta = (
+            "SELECT e.id, e.enviado_em, e.data, e.ano, e.semana, e.periodo, e.lider, e.observacoes, "
+            "(SELECT COUNT(*) FROM justificativas_polos j WHERE j.envio_id = e.id) AS polos "
+            f"FROM envios_justificativas e {condicao} ORDER BY e.enviado_em DESC"
+        )
+        if limite is not None:
+            consulta += f" LIMIT {int(limite)}"
+        with self._conectar() as conexao:
+            df = pd.read_sql_query(consulta, conexao, params=parametros)
+        df['enviado_em'] = de_texto_utc(df['enviado_em'], fuso)
+        return df
+
+    def historico(self, limite: int = 10, lider: Optional[str] = None) -> pd.DataFrame:
+        """Envios mais recentes (de um líder, se informado)"""
+        if lider is None:
+            return self._consultar_envios("", (), limite)
+        return self._consultar_envios("WHERE e.lider = ?", (lider,), limite)
+
+    def obter_envio(self, envio_id: int) -> Dict[str, Any]:
+        """Cabeçalho de um envio pelo id"""
+        return self._consultar_envios("WHERE e.id = ?", (int(envio_id),)).iloc[0].to_dict()
+
+    def ultimo_envio(self, lider: str, ano: int, semana: int) -> Optional[Dict[str, Any]]:
+        """Envio mais recente do líder na semana (None se ainda não enviou)"""
+        envios = self._consultar_envios("WHERE e.lider = ? AND e.ano = ? AND e.semana = ?",
+                                        (lider, int(ano), int(semana)), limite=1)
+        return None if envios.empty else envios.iloc[0].to_dict()
+
+    def conformidade(self, ano: int, semana: int, lideres: List[str]) -> pd.DataFrame:
+        """Para cada líder esperado: se enviou na semana, quantos envios e quando foi o último"""
+        with self._conectar() as conexao:
+            enviados = pd.read_sql_query(
+                "SELECT lider, COUNT(*) AS envios, MAX(enviado_em) AS ultimo_envio "
+                "FROM envios_justificativas WHERE ano = ? AND semana = ? GROUP BY lider",
+                conexao, params=(int(ano), int(semana))
+            )
+        resultado = pd.DataFrame({'lider': lideres}).merge(enviados, on='lider', how='left')
+        resultado['envios'] = resultado['envios'].fillna(0).astype(int)
+        resultado['enviou'] = resultado['envios'] > 0
+        resultado['ultimo_envio'] = de_texto_utc(resultado['ultimo_envio'])
+        return resultado.sort_values(['enviou', 'lider']).reset_index(drop=True)
+
+    def justificativas_polo(self, polo: str, limite: int = 20) -> pd.DataFrame:
+        """Justificativas mais recentes de um polo, com o líder e a semana do envio"""
+        with self._conectar() as conexao:
+            df = pd.read_sql_query(
+                "SELECT e.enviado_em, e.ano, e.semana, e.lider, j.ordens_em_aberto, j.ordens_em_atraso, "
+                "j.perc_atraso, j.justificativa, j.acao_corretiva "
+                "FROM justificativas_polos j JOIN envios_justificativas e ON e.id = j.envio_id "
+                f"WHERE j.polo = ? ORDER BY j.envio_id DESC LIMIT {int(limite)}",
+                conexao, params=(polo,)
+            )
+        df['enviado_em'] = de_texto_utc(df['enviado_em'])
+        return df
+
+    def planilha_envio(self, envio_id: int) -> pd.DataFrame:
+        """Linhas de um envio no layout da planilha de justificativas"""
+        with self._conectar() as conexao:
+            df = pd.read_sql_query(
+                f"SELECT {', '.join(COLUNAS_PLANILHA_JUSTIFICATIVAS)} "
+                "FROM justificativas_polos j JOIN envios_justificativas e ON e.id = j.envio_id "
+                "WHERE j.envio_id = ? ORDER BY j.id",
+                conexao, params=(int(envio_id),)
+            )
+        return df.rename(columns=COLUNAS_PLANILHA_JUSTIFICATIVAS)
+
+    def exportar_excel(self, envio_id: int) -> bytes:
+        """Planilha .xlsx de um envio, gerada em memória (download ou anexo de e-mail)"""
+        saida = io.BytesIO()
+        self.planilha_envio(envio_id).to_excel(saida, index=False)
+        return saida.getvalue()
+
+    def importar_planilhas(self, pasta: Caminho) -> int:
+        """
+        Migra as planilhas <aaaammdd_hhmm>_<lider>_S<semana>.xlsx gravadas antes do banco. Como no log de
+        exportações, cada planilha entra numa transação com a marca da migração e só depois é renomeada
+        para .migrado; sobras .migrado sem marca são importadas se o envio ainda não estiver no banco.
+        """
+        pasta = Path(pasta)
+        if not pasta.exists():
+            return 0
+
+        importadas = 0
+        for arquivo in sorted(pasta.glob('*.xlsx')) + sorted(pasta.glob('*.xlsx.migrado')):
+            original = arquivo.with_suffix('') if arquivo.suffix == '.migrado' else arquivo
+            correspondencia = PADRAO_PLANILHA_LEGADA.match(original.stem)
+            if correspondencia is None:
+                continue
+            with self._conectar() as conexao:
+                ja_migrado = migracao_registrada(conexao, original.name)
+            if ja_migrado:
+                marcar_migrado(original)
+                continue
+
+            linhas = pd.read_excel(arquivo)
+            primeira = linhas.iloc[0] if not linhas.empty else None
+            momento = pd.Timestamp(datetime.strptime(correspondencia.group(1), '%Y%m%d_%H%M')).tz_localize(FUSO_PADRAO)
+            # Ano e semana ISO: na virada do ano a semana 1 pode começar em dezembro (e a 52/53 terminar em janeiro)
+            ano, semana, _ = momento.isocalendar()
+            dados_formulario = None if primeira is None else {
+                'data': str(primeira['Data']),
+                'semana': semana,
+                'lider': str(primeira['Lider']),
+                'observacoes': '' if pd.isna(primeira['Observacoes']) else str(primeira['Observacoes']),
+                'polos': [
+                    {
+                        'nome': linha['Polo'],
+                        'metricas': {'total_em_aberto': linha['Ordens_Em_Aberto'], 'em_atraso': linha['Ordens_Em_Atraso'],
+                                     'perc_atraso': linha['Perc_Atraso']},
+                        'justificativa': '' if pd.isna(linha['Justificativa']) else str(linha['Justificativa']),
+                        'acao_corretiva': '' if pd.isna(linha['Acao_Corretiva']) else str(linha['Acao_Corretiva'])
+                    }
+                    for _, linha in linhas.iterrows()
+                ]
+            }
+            with self._conectar() as conexao:
+                conexao.execute("BEGIN IMMEDIATE")
+                if migracao_registrada(conexao, original.name):
+                    continue
+                ja_no_banco = dados_formulario is None or conexao.execute(
+                    "SELECT 1 FROM envios_justificativas WHERE lider = ? AND enviado_em = ?",
+                    (dados_formulario['lider'], para_texto_utc(momento))
+                ).fetchone() is not None
+                if not ja_no_banco:
+                    self._inserir_envio(conexao, dados_formulario, ano, momento)
+                    importadas += 1
+                registrar_migracao(conexao, original.name)
+            marcar_migrado(original)
+
+        if importadas:
+            self.logger.info(f"🗃️ {importadas} planilha(s) de justificativas migrada(s) para {self.arquivo.name}")
+        return importadas
@@ -0,0 +1,200 @@
+import pandas as pd
+import hashlib
+import json
+import logging
+import os
+import sys
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Union
+
+sys.path.append(str(Path(__file__).parent.parent))
+from src.utils import converter_tipos_seguros, gravar_atomico, travar_arquivo
+
+TAMANHO_BLOCO_HASH = 1024 * 1024
+TIPOS_INFERIDOS_MISTOS = {'mixed', 'mixed-integer', 'mixed-integer-float', 'bytes'}
+
+
+def calcular_hash_arquivo(caminho: Union[str, Path]) -> str:
+    """Calcula o SHA-256 do conteúdo de um arquivo lendo em blocos"""
+    hash_conteudo = hashlib.sha256()
+    with open(caminho, 'rb') as arquivo:
+        for bloco in iter(lambda: arquivo.read(TAMANHO_BLOCO_HASH), b''):
+            hash_conteudo.update(bloco)
+    return hash_conteudo.hexdigest()
+
+
+def preparar_para_parquet(df: pd.DataFrame) -> pd.DataFrame:
+    """Garante nomes de coluna texto e colunas object com tipo único"""
+    df.columns = [str(col) for col in df.columns]
+
+    for col in df.select_dtypes(include=['object']).columns:
+        tipo_inferido = pd.api.types.infer_dtype(df[col], skipna=True)
+        if tipo_inferido in TIPOS_INFERIDOS_MISTOS:
+            # Células mistas (ex.: números e '#N/D') viram texto; a tipagem final
+            # continua a cargo de converter_tipos_seguros
+            df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+
+    return df
+
+
+class CacheIngestao:
+    """Cache de ingestão: converte cada aba de workbook em Parquet uma única vez"""
+
+    ARQUIVO_INDICE = "indice.json"
+    ARQUIVO_TRAVA = ".trava"
+
+    def __init__(self, diretorio: Union[str, Path]):
+        self.diretorio = Path(diretorio)
+        self.diretorio.mkdir(parents=True, exist_ok=True)
+        self.logger = logging.getLogger(__name__)
+        self.hits = 0
+        self.misses = 0
+
+    def ler_excel(self, caminho: Union[str, Path], sheet_name: Union[str, int] = 0,
+                  colunas: Optional[List[str]] = None, tipos: Optional[Dict[str, List[str]]] = None,
+                  **kwargs_leitura) -> pd.DataFrame:
+        """Lê uma aba de Excel servindo do Parquet em cache quando o arquivo não mudou
+
+        colunas restringe a leitura às colunas informadas (as ausentes na aba são
+        ignoradas) e tipos aplica o mapa TIPOS_DADOS antes de gravar o Parquet, de
+        modo que as leituras seguintes já chegam projetadas e tipadas.
+        """
+        caminho = Path(caminho)
+        chave = self._gerar_chave(
+            caminho, sheet_name, {**kwargs_leitura, 'colunas': colunas, 'tipos': tipos}
+        )
+        estado = caminho.stat()
+
+        indice = self._carregar_indice()
+        entrada = indice.get(chave)
+
+        if entrada is not None and self._entrada_valida(entrada, caminho, estado, chave):
+            try:
+                df = pd.read_parquet(self.diretorio / entrada['parquet'])
+            except FileNotFoundError:
+                # Substituído por outro processo entre a leitura do índice e a do Parquet
+                df = None
+            if df is not None:
+                self.hits += 1
+                self._registrar_acesso('HIT', caminho, sheet_name)
+                return df
+
+        # Cache miss: parse do workbook e conversão para Parquet
+        self.misses += 1
+        self._registrar_acesso('MISS', caminho, sheet_name)
+
+        if colunas is not None:
+            colunas_usadas = set(colunas)
+            kwargs_leitura['usecols'] = lambda nome: str(nome) in colunas_usadas
+
+        df = pd.read_excel(caminho, sheet_name=sheet_name, **kwargs_leitura)
+        if tipos is not None:
+            df = converter_tipos_seguros(df, tipos)
+        df = preparar_para_parquet(df)
+
+        hash_conteudo = calcular_hash_arquivo(caminho)
+        nome_parquet = f"{chave}_{hash_conteudo[:16]}.parquet"
+
+        # O diretório é compartilhado pelo ETL e pelas sessões do dashboard: Parquet, índice e limpeza
+        # só mudam sob a trava, sobre o índice relido do disco (com as entradas dos outros processos)
+        with travar_arquivo(self.diretorio / self.ARQUIVO_TRAVA):
+            gravar_atomico(self.diretorio / nome_parquet, df)
+            indice = self._carregar_indice()
+            anterior = indice.get(chave)
+
+            # Evicção da versão anterior desta mesma aba
+            if anterior is not None and anterior.get('parquet') != nome_parquet:
+                (self.diretorio / anterior['parquet']).unlink(missing_ok=True)
+
+            indice[chave] = {
+                'arquivo': str(caminho.resolve()),
+                'aba': str(sheet_name),
+                'tamanho': estado.st_size,
+                'mtime_ns': estado.st_mtime_ns,
+                'hash': hash_conteudo,
+                'parquet': nome_parquet
+            }
+            self._remover_obsoletos(indice)
+            self._salvar_indice(indice)
+
+        return df
+
+    def resumo(self) -> Dict[str, int]:
+        """Retorna os contadores de hit/miss acumulados"""
+        return {'hits': self.hits, 'misses': self.misses}
+
+    def _gerar_chave(self, caminho: Path, sheet_name: Union[str, int], kwargs_leitura: Dict[str, Any]) -> str:
+        """Gera a chave da entrada a partir do caminho, aba e opções de leitura"""
+        identificador = json.dumps(
+            [str(caminho.resolve()), str(sheet_name), kwargs_leitura],
+            sort_keys=True, default=str, ensure_ascii=False
+        )
+        return hashlib.sha1(identificador.encode('utf-8')).hexdigest()[:20]
+
+    def _entrada_valida(self, entrada: Dict[str, Any], caminho: Path, estado: os.stat_result, chave: str) -> bool:
+        """Valida a entrada por tamanho/mtime e, se necessário, pelo hash do conteúdo"""
+        if entrada.get('tamanho') != estado.st_size:
+            return False
+
+        if entrada.get('mtime_ns') == estado.st_mtime_ns:
+            return True
+
+        # mtime mudou (cópia, sincronização do OneDrive): confirmar pelo conteúdo
+        if calcular_hash_arquivo(caminho) != entrada.get('hash'):
+            return False
+
+        with travar_arquivo(self.diretorio / self.ARQUIVO_TRAVA):
+            indice = self._carregar_indice()
+            if indice.get(chave, {}).get('hash') == entrada.get('hash'):
+                indice[chave]['mtime_ns'] = estado.st_mtime_ns
+                self._salvar_indice(indice)
+        return True
+
+    def _remover_obsoletos(self, indice: Dict[str, Any]) -> None:
+        """
+        Remove entradas cujo arquivo de origem sumiu e Parquets órfãos (chamado sob a trava: todo
+        Parquet gravado por outro processo já está no índice lido do disco)
+        """
+        for chave in [c for c, e in indice.items() if not Path(e['arquivo']).exists()]:
+            (self.diretorio / indice.pop(chave)['parquet']).unlink(missing_ok=True)
+            self.logger.info(f"🗑️ Cache de ingestão: entrada obsoleta removida ({chave})")
+
+        referenciados = {entrada['parquet'] for entrada in indice.values()}
+        for arquivo in self.diretorio.glob("*.parquet"):
+            if arquivo.name not in referenciados:
+                arquivo.unlink(missing_ok=True)
+
+    def _carregar_indice(self) -> Dict[str, Any]:
+        """Carrega o índice do cache (índice corrompido equivale a cache vazio)"""
+        arquivo_indice = self.diretorio / self.ARQUIVO_INDICE
+        if not arquivo_indice.exists():
+            return {}
+
+        try:
+            with open(arquivo_indice, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (json.JSONDecodeError, OSError) as e:
+            self.logger.warning(f"⚠️ Índice do cache de ingestão ilegível, recriando: {e}")
+            return {}
+
+    def _salvar_indice(self, indice: Dict[str, Any]) -> None:
+        """Salva o índice do cache de forma atômica"""
+        gravar_atomico(self.diretorio / self.ARQUIVO_INDICE, indice)
+
+    def _registrar_acesso(self, tipo: str, caminho: Path, sheet_name: Union[str, int]) -> None:
+        """Loga o acesso com os contadores acumulados"""
+        self.logger.info(
+            f"🗄️ Cache de ingestão {tipo}: {caminho.name} [{sheet_name}] "
+            f"(hits: {self.hits} | misses: {self.misses})"
+        )
+
+
+_caches: Dict[str, CacheIngestao] = {}
+
+
+def obter_cache(diretorio: Union[str, Path]) -> CacheIngestao:
+    """Retorna a instância compartilhada do cache para o diretório informado"""
+    chave = str(Path(diretorio).resolve())
+    if chave not in _caches:
+        _caches[chave] = CacheIngestao(diretorio)
+    return _caches[chave]
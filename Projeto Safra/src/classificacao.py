@@ -0,0 +1,83 @@
+import pandas as pd
+import numpy as np
+from typing import Tuple
+
+# Categorias ordenadas (da menor para a maior gravidade)
+CATEGORIAS_STATUS_SLA = ['Indefinido', 'No Prazo', 'Atenção', 'Vencido']
+CATEGORIAS_PRIORIDADE = ['Baixa', 'Média', 'Alta']
+NIVEIS_URGENCIA = [1, 2, 3, 4, 5]
+DESCRICOES_URGENCIA = ['⚪ NORMAL', '🔵 BAIXO', '🟡 MÉDIO', '🟠 ALTO', '🔴 CRÍTICO']
+
+
+def _coluna_float(df: pd.DataFrame, coluna: str, padrao: float) -> np.ndarray:
+    """Extrai a coluna como array float (NA vira NaN); coluna ausente usa o padrão"""
+    if coluna not in df.columns:
+        return np.full(len(df), padrao, dtype='float64')
+    return pd.to_numeric(df[coluna], errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+
+
+def classificar_status_sla(df: pd.DataFrame) -> pd.Series:
+    """Classifica o SLA (No Prazo / Atenção / Vencido) comparando Dias_Em_Aberto com SLA Cliente"""
+    dias = _coluna_float(df, 'Dias_Em_Aberto', 0)
+    sla = _coluna_float(df, 'SLA Cliente', 0)
+
+    codigos = np.select(
+        [np.isnan(dias) | np.isnan(sla), dias <= sla * 0.8, dias <= sla],
+        [0, 1, 2],
+        default=3
+    )
+    return pd.Series(
+        pd.Categorical.from_codes(codigos, categories=CATEGORIAS_STATUS_SLA, ordered=True),
+        index=df.index, name='Status_SLA'
+    )
+
+
+def classificar_prioridade(status_sla: pd.Series) -> pd.Series:
+    """Deriva a prioridade a partir do Status_SLA (Vencido → Alta, Atenção → Média)"""
+    codigos = np.select(
+        [(status_sla == 'Vencido').to_numpy(dtype=bool), (status_sla == 'Atenção').to_numpy(dtype=bool)],
+        [2, 1],
+        default=0
+    )
+    return pd.Series(
+        pd.Categorical.from_codes(codigos, categories=CATEGORIAS_PRIORIDADE, ordered=True),
+        index=status_sla.index, name='Prioridade'
+    )
+
+
+def classificar_urgencia(df: pd.DataFrame) -> Tuple[pd.Series, pd.Series]:
+    """Calcula Nivel_Urgencia (1-5) e Descricao_Urgencia em uma única passada vetorizada"""
+    dias = _coluna_float(df, 'Dias_Em_Aberto', 0)
+    sla = _coluna_float(df, 'SLA Cliente', 999)
+    if 'Status_SLA' in df.columns:
+        vencido = (df['Status_SLA'] == 'Vencido').to_numpy(dtype=bool)
+    else:
+        vencido = np.zeros(len(df), dtype=bool)
+
+    # Comparações com NaN resultam em False, caindo em NORMAL como no cálculo por linha
+    codigos = np.select(
+        [vencido | (dias > sla), dias >= sla * 0.9, dias >= sla * 0.7, dias >= sla * 0.5],
+        [4, 3, 2, 1],
+        default=0
+    )
+    nivel = pd.Series(
+        pd.Categorical.from_codes(codigos, categories=NIVEIS_URGENCIA, ordered=True),
+        index=df.index, name='Nivel_Urgencia'
+    )
+    descricao = pd.Series(
+        pd.Categorical.from_codes(codigos, categories=DESCRICOES_URGENCIA, ordered=True),
+        index=df.index, name='Descricao_Urgencia'
+    )
+    return nivel, descricao
+
+
+def classificar_ordens(df: pd.DataFrame, incluir_urgencia: bool = True) -> pd.DataFrame:
+    """Adiciona Status_SLA, Prioridade e (opcionalmente) as colunas de urgência ao DataFrame"""
+    df_copy = df.copy()
+    df_copy['Status_SLA'] = classificar_status_sla(df_copy)
+    df_copy['Prioridade'] = classificar_prioridade(df_copy['Status_SLA'])
+
+    if incluir_urgencia:
+        df_copy['Nivel_Urgencia'], df_copy['Descricao_Urgencia'] = classificar_urgencia(df_copy)
+
+    return df_copy
@@ -11,7 +11,13 @@ class Config:
         'saida': r"C:\Users\sbahia\OneDrive - UNIVERSO ONLINE S.A\Área de Trabalho\Ambiente PY\logins\Projeto Safra\data\Safra_Gerencial_Téc.Prop_17.06.xlsx",
         'backup_dir': r"C:\Users\sbahia\OneDrive - UNIVERSO ONLINE S.A\Área de Trabalho\Ambiente PY\logins\Projeto Safra\backup",
         'dashboard_data': r"C:\Users\sbahia\OneDrive - UNIVERSO ONLINE S.A\Área de Trabalho\Ambiente PY\logins\Projeto Safra\dashboard\dashboard_data.xlsx",
-        'logs': BASE_DIR / "logs" / "etl_log.log"
+        'logs': BASE_DIR / "logs" / "etl_log.log",
+        'cache_dir': BASE_DIR / "data" / "cache",
+        'historico_dir': BASE_DIR / "data" / "historico",
+        'visoes_dir': BASE_DIR / "data" / "processed" / "visoes",
+        'mapeamento': BASE_DIR / "data" / "input" / "pagresolve_regionais.xlsx",
+        'manifesto_execucao': BASE_DIR / "data" / "processed" / "manifesto_consolidacao.json",
+        'metricas': BASE_DIR / "logs" / "metricas_etl.jsonl"
     }
     
     PARAMETROS = {
@@ -19,7 +25,11 @@ class Config:
         'sheet_relatorio': 'Sheet1',  # Aba do relatório diário
         'sheet_saida': 'Consolidado',  # Nome da aba de saída
         'encoding': 'utf-8',
-        'date_format': '%d/%m/%Y'
+        'date_format': '%d/%m/%Y',
+        'exportar_consolidado_excel': True,  # Consolidado .xlsx gerado a partir do histórico particionado
+        'exportar_dashboard_excel': False,  # dashboard_data.xlsx (as visões Parquet são sempre publicadas)
+        'pular_execucao_inalterada': True,  # Não reexecuta se entradas, configuração e saídas não mudaram
+        'backup_retencao_dias': 30  # Snapshots do Consolidado mais antigos que isso são podados (o último fica sempre)
     }
     
     # Colunas de feedback que devem ser SEMPRE preservadas (não atualizar)
@@ -46,24 +56,28 @@ class Config:
     TIPOS_DADOS = {
         'numeros_inteiros': [
             'Ordem PagBank', 'Ordem SAP', 'SLA Cliente', 'SLA Logística',
-            'Cód. Último Tracking', 'Ordem Workfinity', 'SLA', 'SLA Tracking',
-            'Dias_Em_Aberto'
+            'Cód. Último Tracking', 'Ordem Workfinity', 'Dias_Em_Aberto'
         ],
         'datas': [
             'Criação da Ordem', 'Início Indoor', 'Data Últ. Tracking Indoor',
             'Início Transporte', 'Data Últ. Tracking Transporte', 'Data Tracking',
             'Data Coleta', 'Previsão do Gerenciador', 'Data_Status', 'Data_Feedback'
         ],
-        'textos': [
-            'CEP', 'Material', 'Código Rastreio', 'Provider',
+        # Texto de baixa cardinalidade (category): agrupado, filtrado e contado o tempo todo
+        'categorias': [
+            'Provider', 'SLA', 'SLA Tracking', 'Material',
             'Tipo da Ordem', 'Status da Ordem', 'Tipo Atendimento',
             'Transportadora', 'Status Operação', 'Último Tracking',
             'Status Integração', 'Estado', 'Região', 'Classif. Cidade',
             'Origem', 'Cidade', 'status_da_ordem', 'tipo_da_ordem',
             'Status Prazo 10 Dias', 'Status Prazo 10 Dias Tracking',
             'Status Prazo Tracking Entrada', 'classificacao da ordem',
-            'DAX_nam_opl', 'DAX_opl', 'operador_operacao', 'operador_operacao2',
-            'operador_operacao3', 'operador_sql', 'Status_Tratativa',
-            'Causa_Raiz', 'Feedback', 'Proxima_Acao', 'Alerta_SLA'
+            'DAX_nam_opl', "'DAX-ORDENS_LOGISTICA'[nam_opl]",
+            'operador_operacao', 'operador_operacao2', 'operador_operacao3', 'operador_sql',
+            'Status_Tratativa', 'Causa_Raiz', 'Proxima_Acao', 'Alerta_SLA'
+        ],
+        # Texto livre / códigos de alta cardinalidade (string[pyarrow])
+        'textos': [
+            'CEP', 'Código Rastreio', 'DAX_opl', "'DAX-ORDENS_LOGISTICA'[opl]", 'Feedback'
         ]
     }
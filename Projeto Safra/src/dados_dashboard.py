@@ -0,0 +1,113 @@
+import pandas as pd
+import json
+import logging
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+import pytz
+
+sys.path.append(str(Path(__file__).parent.parent))
+from src.cache_ingestao import preparar_para_parquet
+from src.snapshots_diarios import DIRETORIO_SNAPSHOTS, SnapshotsDiarios, carregar_mapeamento_lideres
+from src.utils import gravar_atomico
+
+SUFIXO_ANTERIOR = "_anterior"  # publicação inteira do dia anterior (formato antigo do comparativo)
+SUFIXO_VERSAO = ".versao.json"
+
+
+def _caminho_anterior(arquivo: Path) -> Path:
+    """Parquet com a publicação do dia anterior gravado antes dos snapshots diários"""
+    return arquivo.with_name(f"{arquivo.stem}{SUFIXO_ANTERIOR}{arquivo.suffix}")
+
+
+def _caminho_versao(arquivo: Path) -> Path:
+    """Arquivo com o token de versão da publicação"""
+    return arquivo.with_name(f"{arquivo.stem}{SUFIXO_VERSAO}")
+
+
+def ler_token_versao(arquivo: Union[str, Path]) -> Optional[Dict[str, Any]]:
+    """Lê o token de versão gravado pelo ETL (None se ainda não houver publicação)"""
+    arquivo_versao = _caminho_versao(Path(arquivo))
+    if not arquivo_versao.exists():
+        return None
+    try:
+        with open(arquivo_versao, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (json.JSONDecodeError, OSError):
+        return None
+
+
+def ler_versao_dados(arquivo: Union[str, Path]) -> str:
+    """Versão atual dos dados publicados, usada como chave de cache pelo dashboard"""
+    token = ler_token_versao(arquivo)
+    if token is not None:
+        return token['versao']
+
+    # Publicação anterior ao token: a data de modificação faz o papel de versão
+    arquivo = Path(arquivo)
+    return f"mtime:{arquivo.stat().st_mtime_ns}" if arquivo.exists() else ""
+
+
+def diretorio_snapshots(arquivo: Union[str, Path]) -> Path:
+    """Pasta dos snapshots diários, ao lado da publicação do dashboard"""
+    return Path(arquivo).parent / DIRETORIO_SNAPSHOTS
+
+
+def _registrar_snapshots(df: pd.DataFrame, arquivo: Path, hoje: str, token_atual: Dict[str, Any]) -> None:
+    """
+    Grava o snapshot do dia publicado. Publicações de outros dias ainda sem snapshot (a vigente e a
+    'anterior' do formato antigo) viram snapshot antes de serem substituídas; a 'anterior' é removida.
+    """
+    snapshots = SnapshotsDiarios(diretorio_snapshots(arquivo))
+    mapeamento = carregar_mapeamento_lideres()
+
+    data_vigente = token_atual.get('data_referencia')
+    if data_vigente is None and arquivo.exists():
+        data_vigente = datetime.fromtimestamp(arquivo.stat().st_mtime).date().isoformat()
+    anterior = _caminho_anterior(arquivo)
+    for data, origem in ((token_atual.get('data_anterior'), anterior), (data_vigente, arquivo)):
+        if data and data != hoje and origem.exists() and not snapshots.existe(data):
+            snapshots.registrar(pd.read_parquet(origem), data, mapeamento)
+    if anterior.exists():
+        anterior.unlink()
+
+    snapshots.registrar(df, hoje, mapeamento)
+
+
+def publicar_dados_dashboard(df: pd.DataFrame, arquivo: Union[str, Path]) -> Dict[str, Any]:
+    """
+    Publica o resultado do ETL para o dashboard e o snapshot do dia usado no comparativo entre
+    datas; o token é gravado por último.
+    """
+    arquivo = Path(arquivo)
+    arquivo.parent.mkdir(parents=True, exist_ok=True)
+    logger = logging.getLogger(__name__)
+
+    hoje = datetime.now(pytz.timezone('America/Sao_Paulo')).date().isoformat()
+    token_atual = ler_token_versao(arquivo) or {}
+
+    # Sem snapshot o dashboard só perde o comparativo: a publicação segue
+    try:
+        _registrar_snapshots(df, arquivo, hoje, token_atual)
+    except Exception as e:
+        logger.warning(f"⚠️ Snapshot diário não gravado: {e}")
+
+    gravar_atomico(arquivo, preparar_para_parquet(df.copy()))
+
+    token = {
+        'versao': datetime.now().strftime('%Y%m%d_%H%M%S_%f'),
+        'data_referencia': hoje,
+        'gerado_em': datetime.now().isoformat(timespec='seconds'),
+        'linhas': len(df)
+    }
+    gravar_atomico(_caminho_versao(arquivo), token)
+    logger.info(f"✅ Dados do dashboard publicados: {arquivo.name} (versão {token['versao']})")
+    return token
+
+
+def carregar_dados_dashboard(arquivo: Union[str, Path]) -> Dict[str, pd.DataFrame]:
+    """Carrega a publicação atual ('hoje'); outras datas vêm dos snapshots diários"""
+    arquivo = Path(arquivo)
+    return {'hoje': pd.read_parquet(arquivo) if arquivo.exists() else pd.DataFrame()}
@@ -0,0 +1,96 @@
+import logging
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple, Union
+
+import pandas as pd
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+
+Caminho = Union[str, Path]
+
+LINHAS_MAXIMAS_ABA = 1_048_576   # limite do Excel, cabeçalho incluído
+LINHAS_POR_BLOCO = 50_000        # linhas convertidas por vez: o pico de memória não cresce com o DataFrame
+TAMANHO_MAXIMO_NOME_ABA = 31
+
+logger = logging.getLogger(__name__)
+
+
+def nome_aba_continuacao(aba: str, parte: int) -> str:
+    """Nome da parte de uma aba que passou do limite de linhas ('Consolidado', 'Consolidado_2', ...)"""
+    if parte == 1:
+        return aba[:TAMANHO_MAXIMO_NOME_ABA]
+    sufixo = f"_{parte}"
+    return aba[:TAMANHO_MAXIMO_NOME_ABA - len(sufixo)] + sufixo
+
+
+def _linhas(df: pd.DataFrame, linhas_por_bloco: int) -> Iterator[Tuple]:
+    """Linhas como tuplas de valores Python, convertendo um bloco por vez (nulos viram células vazias)"""
+    for inicio in range(0, len(df), linhas_por_bloco):
+        bloco = df.iloc[inicio:inicio + linhas_por_bloco]
+        bloco = bloco.astype(object).where(bloco.notna(), None)
+        yield from bloco.itertuples(index=False, name=None)
+
+
+def escrever_excel_streaming(caminho: Caminho, abas: Dict[str, pd.DataFrame],
+                             linhas_por_bloco: int = LINHAS_POR_BLOCO,
+                             linhas_maximas_aba: int = LINHAS_MAXIMAS_ABA) -> Dict[str, List[str]]:
+    """
+    Grava as abas com o openpyxl em modo write-only: as linhas vão direto para o arquivo, sem montar
+    a grade de células em memória. Uma aba que passa de linhas_maximas_aba continua em <aba>_2, <aba>_3...
+    (cada parte com o cabeçalho). Devolve as abas efetivamente gravadas para cada DataFrame.
+    """
+    caminho = Path(caminho)
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    linhas_dados_aba = linhas_maximas_aba - 1
+    pasta = Workbook(write_only=True)
+    gravadas: Dict[str, List[str]] = {}
+
+    for aba, df in abas.items():
+        cabecalho = [str(coluna) for coluna in df.columns]
+        planilha = _criar_aba(pasta, nome_aba_continuacao(aba, 1), cabecalho)
+        gravadas[aba] = [planilha.title]
+
+        linhas_na_aba = 0
+        for linha in _linhas(df, linhas_por_bloco):
+            if linhas_na_aba == linhas_dados_aba:
+                planilha = _criar_aba(pasta, nome_aba_continuacao(aba, len(gravadas[aba]) + 1), cabecalho)
+                gravadas[aba].append(planilha.title)
+                linhas_na_aba = 0
+            planilha.append(linha)
+            linhas_na_aba += 1
+
+        if len(gravadas[aba]) > 1:
+            logger.info(f"   📑 Aba '{aba}' com {len(df):,} linhas dividida em {len(gravadas[aba])} abas: "
+                        f"{', '.join(gravadas[aba])}")
+
+    pasta.save(caminho)
+    return gravadas
+
+
+def _criar_aba(pasta: Workbook, nome: str, cabecalho: List[str]):
+    """Nova aba write-only já com o cabeçalho em negrito"""
+    planilha = pasta.create_sheet(nome)
+    celulas = []
+    for texto in cabecalho:
+        celula = WriteOnlyCell(planilha, value=texto)
+        celula.font = Font(bold=True)
+        celulas.append(celula)
+    planilha.append(celulas)
+    return planilha
+
+
+def abas_continuacao(caminho: Caminho, aba: str) -> List[str]:
+    """Abas que compõem uma aba gravada com divisão por limite de linhas, na ordem ([aba] se não foi dividida)"""
+    pasta = load_workbook(caminho, read_only=True)
+    try:
+        nomes = set(pasta.sheetnames)
+    finally:
+        pasta.close()
+
+    partes = [aba] if aba in nomes else []
+    parte = 2
+    while nome_aba_continuacao(aba, parte) in nomes:
+        partes.append(nome_aba_continuacao(aba, parte))
+        parte += 1
+    return partes
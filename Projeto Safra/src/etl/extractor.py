@@ -1,19 +1,34 @@
 import pandas as pd
 import logging
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterator, Callable, List
 import sys
 import os
+import openpyxl
 
 # Adicionar config ao path
 sys.path.append(str(Path(__file__).parent.parent.parent))
 from config.settings import config
+from src.cache_ingestao import obter_cache
+from src.utils import converter_tipos_seguros, limpar_dados_problematicos, montar_colunas_leitura
+
+VALORES_NULOS = ['', ' ', 'N/A', 'n/a', '#N/D', '#REF!', '#VALOR!']
+
+# Colunas efetivamente usadas pelo pipeline (chave, atualizadas, feedback e tipadas)
+COLUNAS_LEITURA = montar_colunas_leitura(
+    config.TIPOS_DADOS, config.COLUNAS_CHAVE, config.COLUNAS_ATUALIZAR, config.COLUNAS_FEEDBACK
+)
+
+# Estimativa conservadora de memória por célula em um chunk ainda não tipado
+BYTES_ESTIMADOS_POR_CELULA = 100
+FRACAO_MEMORIA_POR_CHUNK = 0.1
 
 class SafraExtractor:
     """Extrator de dados otimizado e robusto"""
     
     def __init__(self):
         self.logger = logging.getLogger(__name__)
+        self.cache = obter_cache(config.CACHE_DIR)
     
     def extrair_relatorio_diario(self, arquivo_path: Optional[str] = None) -> pd.DataFrame:
         """Extrai dados do relatório diário com validação robusta"""
@@ -26,10 +41,12 @@ class SafraExtractor:
             if not Path(arquivo_path).exists():
                 raise FileNotFoundError(f"Arquivo não encontrado: {arquivo_path}")
             
-            df = pd.read_excel(
+            df = self.cache.ler_excel(
                 arquivo_path,
                 sheet_name=0,
-                na_values=['', ' ', 'N/A', 'n/a', '#N/D', '#REF!', '#VALOR!'],
+                colunas=COLUNAS_LEITURA,
+                tipos=config.TIPOS_DADOS,
+                na_values=VALORES_NULOS,
                 keep_default_na=True
             )
             
@@ -46,6 +63,86 @@ class SafraExtractor:
             self.logger.error(f"❌ Erro ao extrair relatório diário: {e}")
             raise
     
+    def extrair_relatorio_diario_em_chunks(
+        self,
+        arquivo_path: Optional[str] = None,
+        processar_chunk: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None
+    ) -> Iterator[pd.DataFrame]:
+        """Extrai o relatório diário em chunks tipados sem materializar a planilha inteira"""
+        if arquivo_path is None:
+            arquivo_path = config.INPUT_DIR / config.RELATORIO_DIARIO
+        
+        if not Path(arquivo_path).exists():
+            raise FileNotFoundError(f"Arquivo não encontrado: {arquivo_path}")
+        
+        self.logger.info(f"🔄 Extraindo relatório diário em modo streaming: {arquivo_path}")
+        
+        workbook = openpyxl.load_workbook(arquivo_path, read_only=True, data_only=True)
+        try:
+            linhas = workbook.worksheets[0].iter_rows(values_only=True)
+            
+            cabecalho = next(linhas, None)
+            if cabecalho is None:
+                raise ValueError("Arquivo está vazio")
+            
+            # Projeção: apenas as posições das colunas usadas entram nos chunks
+            colunas_usadas = set(COLUNAS_LEITURA)
+            posicoes = [
+                i for i, col in enumerate(cabecalho)
+                if col is not None and str(col) in colunas_usadas
+            ]
+            colunas = [str(cabecalho[i]) for i in posicoes]
+            if 'Ordem PagBank' not in colunas:
+                raise ValueError("Coluna 'Ordem PagBank' não encontrada")
+            
+            tamanho_chunk = self._calcular_tamanho_chunk(len(colunas))
+            self.logger.info(f"   📦 Tamanho do chunk: {tamanho_chunk:,} linhas")
+            
+            buffer: List[tuple] = []
+            total_lidos = 0
+            total_emitidos = 0
+            
+            for linha in linhas:
+                if all(valor is None for valor in linha):
+                    continue
+                buffer.append(tuple(linha[i] if i < len(linha) else None for i in posicoes))
+                
+                if len(buffer) >= tamanho_chunk:
+                    chunk = self._montar_chunk(buffer, colunas, processar_chunk)
+                    total_lidos += len(buffer)
+                    total_emitidos += len(chunk)
+                    buffer = []
+                    if not chunk.empty:
+                        yield chunk
+            
+            if buffer:
+                chunk = self._montar_chunk(buffer, colunas, processar_chunk)
+                total_lidos += len(buffer)
+                total_emitidos += len(chunk)
+                if not chunk.empty:
+                    yield chunk
+            
+            self.logger.info(f"✅ Streaming concluído: {total_lidos:,} lidos → {total_emitidos:,} emitidos")
+            
+        finally:
+            workbook.close()
+    
+    def _calcular_tamanho_chunk(self, n_colunas: int) -> int:
+        """Limita CHUNK_SIZE para que um chunk caiba na fração de MAX_MEMORY_GB reservada a ele"""
+        orcamento_bytes = config.MAX_MEMORY_GB * 1024 ** 3 * FRACAO_MEMORIA_POR_CHUNK
+        limite_memoria = int(orcamento_bytes / (max(n_colunas, 1) * BYTES_ESTIMADOS_POR_CELULA))
+        return max(1, min(config.CHUNK_SIZE, limite_memoria))
+    
+    def _montar_chunk(self, linhas: List[tuple], colunas: List[str],
+                      processar_chunk: Optional[Callable[[pd.DataFrame], pd.DataFrame]]) -> pd.DataFrame:
+        """Monta o DataFrame do chunk e aplica o processamento (os sentinelas são limpos pelo kernel)"""
+        chunk = pd.DataFrame.from_records(linhas, columns=colunas)
+        
+        if processar_chunk is not None:
+            return processar_chunk(chunk)
+        
+        return converter_tipos_seguros(limpar_dados_problematicos(chunk), config.TIPOS_DADOS)
+    
     def extrair_base_historica(self) -> pd.DataFrame:
         """Extrai base histórica ou cria uma nova se não existir"""
         arquivo_historico = config.PROCESSED_DIR / config.BASE_HISTORICA
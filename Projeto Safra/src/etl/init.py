@@ -1,4 +1,5 @@
 import logging
+import pandas as pd
 from datetime import datetime
 from .extractor import SafraExtractor
 from .transform import SafraTransformer
@@ -8,6 +9,9 @@ from pathlib import Path
 # Adicionar config ao path
 sys.path.append(str(Path(__file__).parent.parent.parent))
 from config.settings import config
+from src.dados_dashboard import publicar_dados_dashboard
+from src.instrumentacao import MonitorEtapas
+from src.utils import concatenar_preservando_categorias
 
 class SafraETLPipeline:
     """Pipeline ETL baseado na estrutura real do Relatorio_Diario"""
@@ -18,38 +22,57 @@ class SafraETLPipeline:
         self.logger = logging.getLogger(__name__)
         self._setup_logging()
     
-    def executar_pipeline_completo(self, arquivo_relatorio: str = None) -> bool:
+    def executar_pipeline_completo(self, arquivo_relatorio: str = None, streaming: bool = False) -> bool:
         """Executa pipeline ETL usando apenas colunas existentes"""
         inicio = datetime.now()
         self.logger.info("🚀 Iniciando pipeline ETL Safra")
+        monitor = MonitorEtapas('pipeline', config.LOGS_DIR / config.ARQUIVO_METRICAS)
         
         try:
             # 1. Extração
             self.logger.info("📥 FASE 1: Extração de dados")
-            relatorio_diario = self.extractor.extrair_relatorio_diario(arquivo_relatorio)
-            base_historica = self.extractor.extrair_base_historica()
+            with monitor.etapa('carregar_diario') as etapa:
+                if streaming:
+                    # Limpeza, filtros e tipagem rodam por chunk: só o resultado filtrado fica em memória
+                    chunks = list(self.extractor.extrair_relatorio_diario_em_chunks(
+                        arquivo_relatorio, self.transformer.preparar_relatorio
+                    ))
+                    # Cada chunk tem as próprias categorias: sem unificá-las o concat devolveria object
+                    relatorio_diario = concatenar_preservando_categorias(chunks) if chunks else pd.DataFrame()
+                    if relatorio_diario.empty:
+                        raise ValueError("Nenhum registro restante após o processamento em chunks")
+                else:
+                    relatorio_diario = self.extractor.extrair_relatorio_diario(arquivo_relatorio)
+                etapa['linhas_saida'] = len(relatorio_diario)
+            with monitor.etapa('carregar_historico') as etapa:
+                base_historica = self.extractor.extrair_base_historica()
+                etapa['linhas_saida'] = len(base_historica)
             
             # 2. Transformação (apenas limpeza e padronização)
             self.logger.info("🔄 FASE 2: Limpeza e padronização")
             dados_processados = self.transformer.processar_dados_completo(
-                relatorio_diario, base_historica
+                relatorio_diario, base_historica, ja_preparado=streaming, monitor=monitor
             )
             
             # 3. Salvar dados processados
             self.logger.info("💾 FASE 3: Salvando dados processados")
             arquivo_saida = config.PROCESSED_DIR / config.DASHBOARD_DATA
-            dados_processados.to_parquet(arquivo_saida, index=False)
+            with monitor.etapa('salvar', len(dados_processados)) as etapa:
+                publicar_dados_dashboard(dados_processados, arquivo_saida)
+                etapa['linhas_saida'] = len(dados_processados)
             self.logger.info(f"✅ Dados salvos em: {arquivo_saida}")
             
             # 4. Relatório final
             tempo_execucao = datetime.now() - inicio
             self._gerar_relatorio_execucao(dados_processados, tempo_execucao)
+            monitor.gravar(status='sucesso', streaming=streaming)
             
             self.logger.info("✅ Pipeline ETL executado com sucesso!")
             return True
             
         except Exception as e:
             self.logger.error(f"💥 Erro crítico no pipeline: {e}")
+            monitor.gravar(status='erro', erro=str(e), streaming=streaming)
             return False
     
     def _setup_logging(self):
@@ -73,7 +96,7 @@ class SafraETLPipeline:
         if 'Provider' in df_final.columns:
             self.logger.info(f"   🏢 Providers únicos: {df_final['Provider'].nunique()}")
 
-def executar_etl(arquivo_relatorio: str = None) -> bool:
+def executar_etl(arquivo_relatorio: str = None, streaming: bool = False) -> bool:
     """Função principal para executar ETL"""
     pipeline = SafraETLPipeline()
-    return pipeline.executar_pipeline_completo(arquivo_relatorio)
+    return pipeline.executar_pipeline_completo(arquivo_relatorio, streaming=streaming)
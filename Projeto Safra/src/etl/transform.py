@@ -1,14 +1,15 @@
 import pandas as pd
-import numpy as np
 from datetime import datetime
 import pytz
 import logging
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 import sys
 from pathlib import Path
 
 sys.path.append(str(Path(__file__).parent.parent.parent))
 from config.settings import config
+from src.utils import converter_tipos_seguros, limpar_dados_problematicos
+from src.instrumentacao import MonitorEtapas, medir_etapa
 
 class SafraTransformer:
     """Transformador baseado APENAS nas colunas reais do Relatorio_Diario"""
@@ -18,29 +19,32 @@ class SafraTransformer:
         self.brasilia_tz = pytz.timezone('America/Sao_Paulo')
     
     def processar_dados_completo(self, relatorio_diario: pd.DataFrame, 
-                                base_historica: pd.DataFrame) -> pd.DataFrame:
+                                base_historica: pd.DataFrame,
+                                ja_preparado: bool = False,
+                                monitor: Optional[MonitorEtapas] = None) -> pd.DataFrame:
         """Processamento usando APENAS colunas existentes"""
         try:
             self.logger.info("🔄 Iniciando processamento com colunas reais")
             
-            # 1. Limpar e padronizar dados
-            relatorio_limpo = self._limpar_dados_reais(relatorio_diario.copy())
-            
-            # 2. Aplicar filtros básicos
-            relatorio_filtrado = self._aplicar_filtros_basicos(relatorio_limpo)
-            
-            # 3. Padronizar campos existentes
-            relatorio_processado = self._padronizar_campos_reais(relatorio_filtrado)
+            # 1-3. Limpar, filtrar e padronizar (já feito por chunk no modo streaming)
+            if ja_preparado:
+                relatorio_processado = relatorio_diario
+            else:
+                relatorio_processado = self.preparar_relatorio(relatorio_diario.copy(), monitor)
             
             # 4. Merge simples com histórico
-            if not base_historica.empty:
-                resultado = self._merge_simples(relatorio_processado, base_historica)
-            else:
-                resultado = relatorio_processado.copy()
-                self.logger.info("📝 Primeira execução - criando nova base")
+            with medir_etapa(monitor, 'merge', len(relatorio_processado) + len(base_historica)) as etapa:
+                if not base_historica.empty:
+                    resultado = self._merge_simples(relatorio_processado, base_historica)
+                else:
+                    resultado = relatorio_processado.copy()
+                    self.logger.info("📝 Primeira execução - criando nova base")
+                etapa['linhas_saida'] = len(resultado)
             
             # 5. Validações finais
-            resultado = self._validacoes_finais(resultado)
+            with medir_etapa(monitor, 'validacoes', len(resultado)) as etapa:
+                resultado = self._validacoes_finais(resultado)
+                etapa['linhas_saida'] = len(resultado)
             
             self.logger.info(f"✅ Processamento concluído: {len(resultado):,} registros")
             return resultado
@@ -49,6 +53,19 @@ class SafraTransformer:
             self.logger.error(f"❌ Erro no processamento: {e}")
             raise
     
+    def preparar_relatorio(self, df: pd.DataFrame, monitor: Optional[MonitorEtapas] = None) -> pd.DataFrame:
+        """Limpa, filtra e padroniza um relatório (ou um chunk dele)"""
+        with medir_etapa(monitor, 'limpeza', len(df)) as etapa:
+            relatorio_limpo = self._limpar_dados_reais(df)
+            etapa['linhas_saida'] = len(relatorio_limpo)
+        with medir_etapa(monitor, 'filtros', len(relatorio_limpo)) as etapa:
+            relatorio_filtrado = self._aplicar_filtros_basicos(relatorio_limpo)
+            etapa['linhas_saida'] = len(relatorio_filtrado)
+        with medir_etapa(monitor, 'conversao_tipos', len(relatorio_filtrado)) as etapa:
+            relatorio_padronizado = self._padronizar_campos_reais(relatorio_filtrado)
+            etapa['linhas_saida'] = len(relatorio_padronizado)
+        return relatorio_padronizado
+    
     def _limpar_dados_reais(self, df: pd.DataFrame) -> pd.DataFrame:
         """Limpeza usando apenas colunas que existem"""
         self.logger.info("🧹 Limpando dados reais")
@@ -56,17 +73,8 @@ class SafraTransformer:
         # Remover linhas completamente vazias
         df = df.dropna(how='all')
         
-        # Limpar campos de texto
-        for col in df.select_dtypes(include=['object']).columns:
-            df[col] = df[col].astype(str).str.strip()
-            df[col] = df[col].replace(['nan', 'None', '', 'NaT'], np.nan)
-        
-        # Padronizar Provider (campo crítico)
-        if 'Provider' in df.columns:
-            df['Provider'] = df['Provider'].str.strip()
-            self.logger.info("✅ Provider padronizado")
-        
-        return df
+        # Limpar campos de texto (inclui o Provider, campo crítico)
+        return limpar_dados_problematicos(df)
     
     def _aplicar_filtros_basicos(self, df: pd.DataFrame) -> pd.DataFrame:
         """Filtros básicos usando apenas colunas existentes"""
@@ -76,7 +84,7 @@ class SafraTransformer:
         
         # Filtrar TEFTI
         if 'Provider' in df.columns:
-            df = df[df['Provider'] != 'TEFTI']
+            df = df[~df['Provider'].isin(config.PROVIDERS_EXCLUIDOS)]
             self.logger.info("🚫 TEFTI removido")
         
         # Filtrar por SLA mínimo (se existir)
@@ -106,31 +114,8 @@ class SafraTransformer:
         return df
     
     def _converter_tipos_reais(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Conversão segura apenas das colunas que existem"""
-        
-        # Números inteiros (apenas se existirem)
-        colunas_int = ['Ordem PagBank', 'Ordem SAP', 'SLA Cliente', 'SLA Logística', 
-                      'Ordem Workfinity', 'Cód. Último Tracking']
-        for col in colunas_int:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce').astype('Int64')
-        
-        # Datas (apenas se existirem)
-        colunas_data = ['Criação da Ordem', 'Início Indoor', 'Data Últ. Tracking Indoor', 
-                       'Início Transporte', 'Data Últ. Tracking Transporte', 'Data Tracking', 
-                       'Data Coleta', 'Previsão do Gerenciador']
-        for col in colunas_data:
-            if col in df.columns:
-                df[col] = pd.to_datetime(df[col], errors='coerce', dayfirst=True)
-        
-        # Textos (apenas se existirem)
-        colunas_texto = ['Provider', 'Status da Ordem', 'Tipo da Ordem', 'Estado', 
-                        'Cidade', 'CEP', 'Transportadora', 'Último Tracking']
-        for col in colunas_texto:
-            if col in df.columns:
-                df[col] = df[col].astype('string')
-        
-        return df
+        """Conversão segura apenas das colunas que existem (já tipadas pelo extrator são puladas)"""
+        return converter_tipos_seguros(df, config.TIPOS_DADOS)
     
     def _merge_simples(self, relatorio_novo: pd.DataFrame, 
                       base_historica: pd.DataFrame) -> pd.DataFrame:
@@ -1,45 +1,151 @@
 import pandas as pd
 import numpy as np
+import json
 import logging
 from pathlib import Path
 from datetime import datetime
-from typing import Tuple, Dict, List
+from typing import Tuple, Dict, List, Set, Optional
 import warnings
-import shutil
+import sys
 warnings.filterwarnings('ignore')
 
 from config import Config
-from utils import setup_logging, limpar_dados_problematicos, converter_tipos_seguros, executar_validacoes, calcular_dias_em_aberto
+from utils import setup_logging, limpar_dados_problematicos, converter_tipos_seguros, executar_validacoes, calcular_dias_em_aberto_vetorizado, montar_colunas_leitura, gravar_atomico
+from cache_ingestao import obter_cache
+from upsert_ordens import upsert_ordens, diferencas_por_chave, sobrepor_por_chave
+from historico_particionado import HistoricoParticionado, COLUNA_PARTICAO, PARTICAO_SEM_DATA, calcular_mes_particao
+from visoes_dashboard import calcular_visoes, publicar_visoes, ARQUIVO_MANIFESTO, COLUNAS_VISOES
+from manifesto_execucao import ManifestoExecucao, impressao_configuracao
+from instrumentacao import MonitorEtapas
+from armazem_backups import ArmazemBackups
+from escritor_excel import escrever_excel_streaming, abas_continuacao
+
+ARQUIVO_CONSOLIDADO_ABSORVIDO = 'consolidado_absorvido.json'  # tamanho/mtime do Consolidado já refletido no histórico
 
 class SafraETLProcessor:
     
     def __init__(self):
         self.config = Config()
         setup_logging(self.config.CAMINHOS['logs'])
+        self.cache = obter_cache(self.config.CAMINHOS['cache_dir'])
+        self.historico = HistoricoParticionado(self.config.CAMINHOS['historico_dir'])
+        self.manifesto = ManifestoExecucao(self.config.CAMINHOS['manifesto_execucao'])
         
     def carregar_base_historica(self) -> pd.DataFrame:
         """Carrega a base histórica"""
         logging.info("📂 Carregando base histórica...")
         
         try:
-            df = pd.read_excel(
-                self.config.CAMINHOS['base_historica'],
-                sheet_name=self.config.PARAMETROS['sheet_base']
-            )
+            # Sem projeção: a base é regravada inteira no Consolidado
+            # (acima do limite de linhas do Excel ela continua em Consolidado_2, Consolidado_3...)
+            caminho = self.config.CAMINHOS['base_historica']
+            aba = self.config.PARAMETROS['sheet_base']
+            partes = [
+                self.cache.ler_excel(caminho, sheet_name=nome, tipos=self.config.TIPOS_DADOS)
+                for nome in abas_continuacao(caminho, aba) or [aba]
+            ]
+            df = pd.concat(partes, ignore_index=True) if len(partes) > 1 else partes[0]
             logging.info(f"✅ Base histórica carregada: {len(df):,} registros")
             return df
         except Exception as e:
             logging.error(f"❌ Erro ao carregar base histórica: {e}")
             raise
     
+    def migrar_base_historica(self) -> None:
+        """Primeira execução: migra o Consolidado do Excel para o store particionado"""
+        logging.info("🗃️ Histórico particionado vazio - migrando base do Consolidado...")
+        base = limpar_dados_problematicos(self.carregar_base_historica())
+        base = converter_tipos_seguros(base, self.config.TIPOS_DADOS, self.config.PARAMETROS['date_format'])
+        duplicatas = base['Ordem PagBank'].duplicated().sum()
+        if duplicatas > 0:
+            logging.warning(f"⚠️ Encontradas {duplicatas} duplicatas na base - removendo...")
+            base = base.drop_duplicates(subset=['Ordem PagBank'], keep='first')
+        self.historico.gravar(base)
+        self.registrar_consolidado_absorvido()
+    
+    def _estado_consolidado(self) -> Optional[List[int]]:
+        """Tamanho e mtime do Consolidado exportado (None se ainda não existir)"""
+        arquivo = Path(self.config.CAMINHOS['saida'])
+        if not arquivo.exists():
+            return None
+        info = arquivo.stat()
+        return [info.st_size, info.st_mtime_ns]
+    
+    def registrar_consolidado_absorvido(self) -> None:
+        """Guarda o estado do Consolidado cujo feedback já está no histórico (o que foi migrado ou exportado)"""
+        gravar_atomico(self.historico.diretorio / ARQUIVO_CONSOLIDADO_ABSORVIDO, {'consolidado': self._estado_consolidado()})
+    
+    def consolidado_editado(self) -> bool:
+        """Indica se o Consolidado mudou desde a última migração/exportação (edição dos líderes)"""
+        atual = self._estado_consolidado()
+        if atual is None:
+            return False
+        try:
+            with open(self.historico.diretorio / ARQUIVO_CONSOLIDADO_ABSORVIDO, 'r', encoding='utf-8') as f:
+                registrado = json.load(f).get('consolidado')
+        except (OSError, json.JSONDecodeError):
+            registrado = None
+        return atual != registrado
+    
+    def absorver_feedback_consolidado(self) -> Tuple[pd.DataFrame, Set[str]]:
+        """
+        O Consolidado é onde os líderes preenchem as COLUNAS_FEEDBACK: se ele mudou desde a última
+        exportação, devolve as ordens cujo feedback difere do histórico e os meses das suas partições
+        """
+        colunas = ['Ordem PagBank'] + self.config.COLUNAS_FEEDBACK
+        if not self.consolidado_editado():
+            return pd.DataFrame(columns=colunas), set()
+        
+        logging.info("✍️ Consolidado alterado desde a última exportação - lendo o feedback dos líderes...")
+        caminho = self.config.CAMINHOS['saida']
+        aba = self.config.PARAMETROS['sheet_saida']
+        partes = [
+            self.cache.ler_excel(caminho, sheet_name=nome, colunas=colunas, tipos=self.config.TIPOS_DADOS)
+            for nome in abas_continuacao(caminho, aba) or [aba]
+        ]
+        planilha = pd.concat(partes, ignore_index=True) if len(partes) > 1 else partes[0]
+        
+        # Só a chave, o feedback e a data de criação (que define a partição) são lidos do histórico
+        armazenado = self.historico.carregar(colunas=colunas + [COLUNA_PARTICAO])
+        edicoes = diferencas_por_chave(armazenado, planilha, self.config.COLUNAS_FEEDBACK)
+        if edicoes.empty:
+            meses = set()
+        elif COLUNA_PARTICAO in edicoes.columns:
+            meses = set(calcular_mes_particao(edicoes[COLUNA_PARTICAO]))
+        else:
+            meses = {PARTICAO_SEM_DATA}
+        
+        logging.info(f"✅ Feedback editado em {len(edicoes):,} ordens ({len(meses)} partições)")
+        return edicoes.drop(columns=[COLUNA_PARTICAO], errors='ignore'), meses
+    
+    def carregar_historico_afetado(self, relatorio: pd.DataFrame, edicoes_feedback: pd.DataFrame,
+                                   meses_feedback: Set[str]) -> Tuple[pd.DataFrame, Set[str]]:
+        """Carrega do histórico particionado apenas as partições tocadas pelo relatório ou pelo feedback editado"""
+        meses = self.historico.particoes_afetadas(relatorio) | meses_feedback
+        df = self.historico.carregar(meses)
+        if not edicoes_feedback.empty:
+            # Antes do upsert, que preserva as COLUNAS_FEEDBACK do histórico
+            df = sobrepor_por_chave(df, edicoes_feedback)
+        logging.info(f"✅ Histórico afetado carregado: {len(df):,} registros em {len(meses)} partições")
+        return df, meses
+    
+    def carregar_historico_completo(self, colunas: Optional[List[str]] = None) -> pd.DataFrame:
+        """Histórico inteiro para as saídas que o cobrem, com Dias_Em_Aberto recalculado para hoje"""
+        return self.processar_dias_em_aberto(self.historico.carregar(colunas=colunas))
+    
     def carregar_relatorio_diario(self) -> pd.DataFrame:
         """Carrega o relatório diário"""
         logging.info("📂 Carregando relatório diário...")
         
         try:
-            df = pd.read_excel(
+            df = self.cache.ler_excel(
                 self.config.CAMINHOS['relatorio_diario'],
-                sheet_name=self.config.PARAMETROS['sheet_relatorio']
+                sheet_name=self.config.PARAMETROS['sheet_relatorio'],
+                colunas=montar_colunas_leitura(
+                    self.config.TIPOS_DADOS, ['Ordem PagBank'],
+                    self.config.COLUNAS_ATUALIZAR, self.config.COLUNAS_FEEDBACK
+                ),
+                tipos=self.config.TIPOS_DADOS
             )
             logging.info(f"✅ Relatório diário carregado: {len(df):,} registros")
             return df
@@ -71,57 +177,6 @@ class SafraETLProcessor:
         logging.info(f"✅ Filtros aplicados: {registros_inicial:,} → {len(df_filtrado):,} registros")
         return df_filtrado
     
-    def processar_caixa3_otimizado(self, base_historica: pd.DataFrame, relatorio_filtrado: pd.DataFrame, em_ambos: set) -> pd.DataFrame:
-        """
-        Processa Caixa 3 com merge otimizado - CORRIGIDO para atualizar corretamente
-        """
-        logging.info("🔄 Processando Caixa 3 (atualizações) com merge otimizado...")
-        
-        if not em_ambos:
-            return pd.DataFrame()
-        
-        # Filtrar apenas registros que estão em ambos
-        base_para_merge = base_historica[base_historica['Ordem PagBank'].isin(em_ambos)].copy()
-        relatorio_para_merge = relatorio_filtrado[relatorio_filtrado['Ordem PagBank'].isin(em_ambos)].copy()
-        
-        # Fazer merge
-        merged = base_para_merge.merge(
-            relatorio_para_merge, 
-            on='Ordem PagBank', 
-            suffixes=('_hist', '_novo')
-        )
-        
-        # Criar DataFrame resultado com estrutura da base histórica
-        resultado = pd.DataFrame()
-        
-        # Para cada coluna da base histórica
-        for col in base_historica.columns:
-            col_hist = col + '_hist'
-            col_novo = col + '_novo'
-            
-            if col == 'Ordem PagBank':
-                # Chave principal - usar valor original
-                resultado[col] = merged[col]
-            elif col in self.config.COLUNAS_FEEDBACK:
-                # Colunas de feedback - SEMPRE preservar valor histórico
-                resultado[col] = merged[col_hist] if col_hist in merged.columns else merged.get(col, None)
-                logging.debug(f"   📋 Preservando feedback: {col}")
-            elif col in self.config.COLUNAS_ATUALIZAR and col_novo in merged.columns:
-                # Colunas para atualizar - usar valor do relatório diário
-                resultado[col] = merged[col_novo]
-                logging.debug(f"   🔄 Atualizando: {col}")
-            else:
-                # Outras colunas - usar valor histórico como padrão
-                resultado[col] = merged[col_hist] if col_hist in merged.columns else merged.get(col, None)
-        
-        logging.info(f"   ✅ Caixa 3 processada: {len(resultado):,} registros atualizados")
-        
-        # Log de colunas atualizadas
-        colunas_atualizadas = [col for col in self.config.COLUNAS_ATUALIZAR if col in resultado.columns]
-        logging.info(f"   📊 Colunas atualizadas: {len(colunas_atualizadas)} ({', '.join(colunas_atualizadas[:5])}...)")
-        
-        return resultado
-    
     def processar_dias_em_aberto(self, df: pd.DataFrame) -> pd.DataFrame:
         """Calcula dias em aberto para todos os registros usando data atual de Brasília"""
         logging.info("📅 Calculando dias em aberto com data atual de Brasília...")
@@ -129,8 +184,8 @@ class SafraETLProcessor:
         df_copy = df.copy()
         
         if 'Data_Status' in df_copy.columns:
-            # Aplicar cálculo para cada registro
-            df_copy['Dias_Em_Aberto'] = df_copy['Data_Status'].apply(calcular_dias_em_aberto)
+            # Cálculo vetorizado sobre a coluna inteira
+            df_copy['Dias_Em_Aberto'] = calcular_dias_em_aberto_vetorizado(df_copy['Data_Status'])
             
             # Log de estatísticas
             dias_calculados = df_copy['Dias_Em_Aberto'].notna().sum()
@@ -148,27 +203,22 @@ class SafraETLProcessor:
         return df_copy
     
     def criar_backup_inteligente(self) -> None:
-        """Cria backup em pasta separada sem alterar arquivo original"""
+        """Registra a versão atual do Consolidado no armazém de backups (sem cópia quando nada mudou) e aplica a retenção"""
         logging.info("📋 Criando backup inteligente...")
         
         try:
             arquivo_original = Path(self.config.CAMINHOS['saida'])
-            pasta_backup = Path(self.config.CAMINHOS['backup_dir'])
+            armazem = ArmazemBackups(self.config.CAMINHOS['backup_dir'])
             
-            # Criar pasta de backup se não existir
-            pasta_backup.mkdir(parents=True, exist_ok=True)
+            # Cópias .xlsx inteiras do esquema antigo entram no armazém uma única vez
+            armazem.importar_legados()
             
             if arquivo_original.exists():
-                # Nome do backup com timestamp
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                nome_backup = f"Safra_Gerencial_backup_{timestamp}.xlsx"
-                caminho_backup = pasta_backup / nome_backup
-                
-                # Copiar arquivo para backup
-                shutil.copy2(arquivo_original, caminho_backup)
-                logging.info(f"   ✅ Backup criado: {nome_backup}")
+                armazem.criar_snapshot(arquivo_original)
             else:
                 logging.info("   ℹ️ Arquivo original não existe - pulando backup")
+            
+            armazem.podar(self.config.PARAMETROS['backup_retencao_dias'])
                 
         except Exception as e:
             logging.warning(f"   ⚠️ Erro ao criar backup: {e}")
@@ -183,198 +233,201 @@ class SafraETLProcessor:
             
             arquivo_saida = Path(self.config.CAMINHOS['saida'])
             
-            # Salvar com nome correto da aba
-            with pd.ExcelWriter(arquivo_saida, engine='openpyxl') as writer:
-                df.to_excel(
-                    writer, 
-                    sheet_name=self.config.PARAMETROS['sheet_saida'],  # 'Consolidado'
-                    index=False
-                )
+            # Gravação em streaming com nome correto da aba ('Consolidado')
+            abas = escrever_excel_streaming(arquivo_saida, {self.config.PARAMETROS['sheet_saida']: df})
             
             logging.info(f"✅ Arquivo salvo: {arquivo_saida}")
-            logging.info(f"   📋 Aba: {self.config.PARAMETROS['sheet_saida']}")
+            logging.info(f"   📋 Aba: {', '.join(abas[self.config.PARAMETROS['sheet_saida']])}")
             
         except Exception as e:
             logging.error(f"❌ Erro ao salvar: {e}")
             raise
     
     def preparar_dados_dashboard(self, df: pd.DataFrame) -> None:
-        """Prepara datasets otimizados para dashboard com Status_Tratativa"""
+        """Publica as visões agregadas do dashboard em Parquet (com manifesto de versão)"""
         logging.info("📊 Preparando dados para dashboard...")
         
         try:
-            # Dataset agregado por Status_Tratativa (não Status da Ordem)
-            if 'Status_Tratativa' in df.columns:
-                status_summary = df.groupby('Status_Tratativa').agg({
-                    'Ordem PagBank': 'count',
-                    'SLA Cliente': 'mean',
-                    'Dias_Em_Aberto': 'mean'
-                }).reset_index()
-                status_summary.columns = ['Status_Tratativa', 'Quantidade', 'SLA_Medio', 'Dias_Aberto_Medio']
-            else:
-                status_summary = pd.DataFrame()
-            
-            # Dataset temporal
-            if 'Criação da Ordem' in df.columns:
-                df_temp = df.copy()
-                df_temp['Mes_Criacao'] = pd.to_datetime(df_temp['Criação da Ordem'], errors='coerce').dt.to_period('M')
-                temporal_summary = df_temp.groupby('Mes_Criacao').size().reset_index(name='Quantidade')
-            else:
-                temporal_summary = pd.DataFrame()
-            
-            # Dataset por região
-            if 'Região' in df.columns and 'Estado' in df.columns:
-                regional_summary = df.groupby(['Região', 'Estado']).size().reset_index(name='Quantidade')
-            else:
-                regional_summary = pd.DataFrame()
-            
-            # Dataset por provider
-            if 'Provider' in df.columns:
-                provider_summary = df.groupby('Provider').size().reset_index(name='Quantidade')
-            else:
-                provider_summary = pd.DataFrame()
-            
-            # Dataset de feedback (NOVO)
-            colunas_feedback = ['Ordem PagBank', 'Status_Tratativa', 'Feedback', 'Causa_Raiz', 'Data_Feedback', 'Proxima_Acao', 'Dias_Em_Aberto']
-            feedback_df = df[colunas_feedback].copy() if all(col in df.columns for col in colunas_feedback) else pd.DataFrame()
-            
-            # Salvar datasets para dashboard
-            dashboard_path = Path(self.config.CAMINHOS['dashboard_data'])
-            dashboard_path.parent.mkdir(parents=True, exist_ok=True)
-            
-            with pd.ExcelWriter(dashboard_path, engine='openpyxl') as writer:
-                if not status_summary.empty:
-                    status_summary.to_excel(writer, sheet_name='Status_Tratativa', index=False)
-                if not temporal_summary.empty:
-                    temporal_summary.to_excel(writer, sheet_name='Temporal', index=False)
-                if not regional_summary.empty:
-                    regional_summary.to_excel(writer, sheet_name='Regional', index=False)
-                if not provider_summary.empty:
-                    provider_summary.to_excel(writer, sheet_name='Provider', index=False)
-                if not feedback_df.empty:
-                    feedback_df.to_excel(writer, sheet_name='Feedback', index=False)
-                df.to_excel(writer, sheet_name='Dados_Completos', index=False)
-            
-            logging.info(f"✅ Dados do dashboard salvos: {dashboard_path}")
+            visoes = calcular_visoes(df)
+            manifesto = publicar_visoes(visoes, self.config.CAMINHOS['visoes_dir'])
+            logging.info(f"✅ Visões do dashboard publicadas: versão {manifesto['versao']} ({len(visoes)} agregados)")
+            
+            # Planilha multi-abas mantida apenas como exportação opcional
+            if self.config.PARAMETROS['exportar_dashboard_excel']:
+                dashboard_path = Path(self.config.CAMINHOS['dashboard_data'])
+                dashboard_path.parent.mkdir(parents=True, exist_ok=True)
+                
+                abas = {'status_tratativa': 'Status_Tratativa', 'temporal': 'Temporal', 'regional': 'Regional',
+                        'provider': 'Provider', 'feedback': 'Feedback'}
+                planilhas = {aba: visoes[nome] for nome, aba in abas.items() if nome in visoes and not visoes[nome].empty}
+                planilhas['Dados_Completos'] = df
+                escrever_excel_streaming(dashboard_path, planilhas)
+                
+                logging.info(f"✅ Dados do dashboard salvos: {dashboard_path}")
             
         except Exception as e:
             logging.error(f"❌ Erro ao preparar dados do dashboard: {e}")
     
-    def main(self) -> pd.DataFrame:
-        """Função principal que executa todo o pipeline ETL"""
+    def calcular_impressao_execucao(self) -> Dict:
+        """
+        Impressão das entradas da rodada (o Consolidado é uma saída: uma edição dos líderes muda sua
+        assinatura, força a nova rodada e o feedback é absorvido antes da reexportação)
+        """
+        entradas = {nome: self.config.CAMINHOS[nome] for nome in ('relatorio_diario', 'mapeamento')}
+        return self.manifesto.calcular_impressao(entradas, impressao_configuracao(self.config))
+    
+    def saidas_execucao(self) -> Dict[str, Path]:
+        """Arquivos gerados pela rodada, conferidos antes de pular uma execução"""
+        saidas = {f"historico_{mes}": arquivo for mes, arquivo in self.historico.arquivos().items()}
+        saidas['visoes'] = Path(self.config.CAMINHOS['visoes_dir']) / ARQUIVO_MANIFESTO
+        # Conferido mesmo sem a exportação: é onde os líderes editam o feedback
+        saidas['consolidado'] = Path(self.config.CAMINHOS['saida'])
+        if self.config.PARAMETROS['exportar_dashboard_excel']:
+            saidas['dashboard_excel'] = Path(self.config.CAMINHOS['dashboard_data'])
+        return saidas
+    
+    def main(self, forcar: bool = False) -> Optional[pd.DataFrame]:
+        """
+        Função principal que executa todo o pipeline ETL. Devolve os registros das partições
+        regravadas (None quando a rodada é pulada)
+        """
         
         logging.info("="*80)
         logging.info("🚀 INICIANDO PIPELINE ETL SAFRA GERENCIAL - VERSÃO CORRIGIDA")
         logging.info("="*80)
         
+        monitor = MonitorEtapas('consolidacao', self.config.CAMINHOS['metricas'])
+        impressao = self.calcular_impressao_execucao()
+        if self.config.PARAMETROS['pular_execucao_inalterada'] and not forcar and self.manifesto.inalterado(impressao):
+            logging.info("⏭️ Entradas, configuração e saídas inalteradas desde a última execução - pipeline não reexecutado")
+            monitor.gravar(status='pulada')
+            return None
+        
         try:
             # 1. EXTRAÇÃO
             logging.info("📥 FASE 1: EXTRAÇÃO DE DADOS")
-            base_historica = self.carregar_base_historica()
-            relatorio_diario = self.carregar_relatorio_diario()
+            with monitor.etapa('carregar_diario') as etapa:
+                relatorio_diario = self.carregar_relatorio_diario()
+                etapa['linhas_saida'] = len(relatorio_diario)
             
             # 2. TRANSFORMAÇÃO
             logging.info("🔄 FASE 2: TRANSFORMAÇÃO DE DADOS")
             
             # Aplicar filtros de negócio no relatório diário
-            relatorio_filtrado = self.aplicar_filtros_negocio(relatorio_diario)
+            with monitor.etapa('filtros', len(relatorio_diario)) as etapa:
+                relatorio_filtrado = self.aplicar_filtros_negocio(relatorio_diario)
+                etapa['linhas_saida'] = len(relatorio_filtrado)
             
             # Limpar dados problemáticos
-            base_historica = limpar_dados_problematicos(base_historica)
-            relatorio_filtrado = limpar_dados_problematicos(relatorio_filtrado)
-            
-            # Padronizar chave de união
-            base_historica['Ordem PagBank'] = base_historica['Ordem PagBank'].astype(str)
-            relatorio_filtrado['Ordem PagBank'] = relatorio_filtrado['Ordem PagBank'].astype(str)
-            
-            # LÓGICA CORRIGIDA DAS TRÊS CAIXAS
-            logging.info("📦 Aplicando lógica corrigida das três caixas...")
-            
-            chaves_historico = set(base_historica['Ordem PagBank'])
-            chaves_diario = set(relatorio_filtrado['Ordem PagBank'])
-            
-            # CAIXA 1: Ordens que só existem na base histórica (manter como estão)
-            so_historico = chaves_historico - chaves_diario
-            caixa1_historico_puro = base_historica[base_historica['Ordem PagBank'].isin(so_historico)].copy()
-            logging.info(f"   📦 Caixa 1 (só no histórico): {len(caixa1_historico_puro):,}")
-            
-            # CAIXA 2: Ordens que só existem no relatório diário (novas ordens)
-            so_diario = chaves_diario - chaves_historico
-            caixa2_novas_ordens = relatorio_filtrado[relatorio_filtrado['Ordem PagBank'].isin(so_diario)].copy()
-            logging.info(f"   📦 Caixa 2 (novas ordens): {len(caixa2_novas_ordens):,}")
-            
-            # CAIXA 3: Ordens que existem em ambos (atualizar com merge otimizado)
-            em_ambos = chaves_historico & chaves_diario
-            logging.info(f"   📦 Caixa 3 (para atualizar): {len(em_ambos):,}")
-            
-            # Processar Caixa 3 com merge otimizado
-            caixa3_df = self.processar_caixa3_otimizado(base_historica, relatorio_filtrado, em_ambos)
-            
-            # COMBINAR TODAS AS CAIXAS
-            logging.info("🔗 Combinando todas as caixas...")
-            
-            # Garantir que todas tenham as mesmas colunas
-            todas_colunas = set()
-            for df in [caixa1_historico_puro, caixa2_novas_ordens, caixa3_df]:
-                if not df.empty:
-                    todas_colunas.update(df.columns)
-            
-            # Adicionar colunas faltantes
-            for df in [caixa1_historico_puro, caixa2_novas_ordens, caixa3_df]:
-                if not df.empty:
-                    for col in todas_colunas:
-                        if col not in df.columns:
-                            df[col] = None
-            
-            # Combinar (sem duplicatas por design)
-            dataframes_validos = [df for df in [caixa1_historico_puro, caixa2_novas_ordens, caixa3_df] if not df.empty]
-            
-            if dataframes_validos:
-                resultado_final = pd.concat(dataframes_validos, ignore_index=True)
-            else:
-                raise ValueError("Nenhum dado válido para combinar!")
+            with monitor.etapa('limpeza', len(relatorio_filtrado)) as etapa:
+                relatorio_filtrado = limpar_dados_problematicos(relatorio_filtrado)
+                etapa['linhas_saida'] = len(relatorio_filtrado)
+            
+            # Apenas as partições tocadas pelo relatório ou pelo feedback editado no Consolidado são lidas
+            # e reescritas (o store já foi limpo antes de ser gravado; não há segunda passada de limpeza)
+            with monitor.etapa('carregar_historico') as etapa:
+                if not self.historico.existe():
+                    self.migrar_base_historica()
+                edicoes_feedback, meses_feedback = self.absorver_feedback_consolidado()
+                base_historica, meses_afetados = self.carregar_historico_afetado(
+                    relatorio_filtrado, edicoes_feedback, meses_feedback
+                )
+                registros_historico = self.historico.total_registros()
+                etapa['linhas_saida'] = len(base_historica)
+            
+            # LÓGICA DAS TRÊS CAIXAS: upsert indexado pela chave inteira
+            logging.info("📦 Aplicando lógica das três caixas (upsert por Ordem PagBank)...")
+            resultado_parcial, contagens = upsert_ordens(
+                base_historica, relatorio_filtrado,
+                self.config.COLUNAS_ATUALIZAR, self.config.COLUNAS_FEEDBACK,
+                monitor=monitor
+            )
+            # O upsert só vê as partições afetadas: as ordens das demais também são Caixa 1
+            contagens['caixa1_historico'] += registros_historico - len(base_historica)
+            # Conversão, dias em aberto e duplicatas só nas partições afetadas (as demais já estão no store)
+            with monitor.etapa('conversao_tipos_particoes', len(resultado_parcial)) as etapa:
+                resultado_parcial = converter_tipos_seguros(resultado_parcial, self.config.TIPOS_DADOS, self.config.PARAMETROS['date_format'])
+                etapa['linhas_saida'] = len(resultado_parcial)
             
             # CALCULAR DIAS EM ABERTO COM DATA ATUAL DE BRASÍLIA
-            resultado_final = self.processar_dias_em_aberto(resultado_final)
+            with monitor.etapa('dias_em_aberto', len(resultado_parcial)) as etapa:
+                resultado_parcial = self.processar_dias_em_aberto(resultado_parcial)
+                etapa['linhas_saida'] = len(resultado_parcial)
             
-            # Converter tipos de dados
-            logging.info("🔧 Convertendo tipos de dados...")
-            resultado_final = converter_tipos_seguros(resultado_final, self.config.TIPOS_DADOS)
+            duplicatas = resultado_parcial['Ordem PagBank'].duplicated().sum()
+            if duplicatas > 0:
+                logging.warning(f"⚠️ Encontradas {duplicatas} duplicatas - removendo...")
+                resultado_parcial = resultado_parcial.drop_duplicates(subset=['Ordem PagBank'], keep='first')
             
             # 3. CARGA
             logging.info("📤 FASE 3: CARGA DE DADOS")
-            self.salvar_resultado(resultado_final)
+            with monitor.etapa('salvar_historico', len(resultado_parcial)) as etapa:
+                self.historico.gravar(resultado_parcial, substituir=meses_afetados)
+                registros_finais = self.historico.total_registros()
+                etapa['linhas_saida'] = len(resultado_parcial)
+            
+            # Saídas que cobrem o histórico inteiro são montadas do store já tipado; Dias_Em_Aberto é
+            # relativo a hoje e é o único valor recalculado nas partições não regravadas
+            historico_completo = None
+            exportar_consolidado = self.config.PARAMETROS['exportar_consolidado_excel']
+            if exportar_consolidado or self.config.PARAMETROS['exportar_dashboard_excel']:
+                with monitor.etapa('carregar_historico_completo') as etapa:
+                    historico_completo = self.carregar_historico_completo()
+                    etapa['linhas_saida'] = len(historico_completo)
+            
+            # Consolidado em Excel passa a ser uma exportação opcional do histórico
+            if exportar_consolidado:
+                with monitor.etapa('salvar_consolidado', len(historico_completo)) as etapa:
+                    self.salvar_resultado(historico_completo)
+                    etapa['linhas_saida'] = len(historico_completo)
+            # O feedback do Consolidado (exportado agora ou editado e absorvido acima) está no histórico
+            self.registrar_consolidado_absorvido()
             
             # 4. VALIDAÇÕES
             logging.info("✅ FASE 4: VALIDAÇÕES")
-            duplicatas = resultado_final['Ordem PagBank'].duplicated().sum()
-            if duplicatas > 0:
-                logging.warning(f"⚠️ Encontradas {duplicatas} duplicatas - removendo...")
-                resultado_final = resultado_final.drop_duplicates(subset=['Ordem PagBank'], keep='first')
-            
-            executar_validacoes(resultado_final, base_historica, relatorio_filtrado)
+            with monitor.etapa('validacoes', len(resultado_parcial)) as etapa:
+                executar_validacoes(resultado_parcial, registros_historico, relatorio_filtrado, registros_finais)
+                etapa['linhas_saida'] = len(resultado_parcial)
             
             # 5. PREPARAR PARA DASHBOARD
             logging.info("📊 FASE 5: PREPARAÇÃO PARA DASHBOARD")
-            self.preparar_dados_dashboard(resultado_final)
+            dados_dashboard = historico_completo
+            if dados_dashboard is None:
+                dados_dashboard = self.carregar_historico_completo(COLUNAS_VISOES)
+            with monitor.etapa('dashboard', len(dados_dashboard)) as etapa:
+                self.preparar_dados_dashboard(dados_dashboard)
+                etapa['linhas_saida'] = len(dados_dashboard)
             
             # RELATÓRIO FINAL
             logging.info("="*80)
             logging.info("🎉 PIPELINE ETL EXECUTADO COM SUCESSO!")
             logging.info("="*80)
-            logging.info(f"📊 Total de registros processados: {len(resultado_final):,}")
-            logging.info(f"📦 Histórico puro: {len(caixa1_historico_puro):,}")
-            logging.info(f"📦 Novas ordens: {len(caixa2_novas_ordens):,}")
-            logging.info(f"📦 Atualizadas: {len(caixa3_df):,}")
+            logging.info(f"📊 Total de registros no histórico: {registros_finais:,}")
+            logging.info(f"📊 Registros regravados: {len(resultado_parcial):,} em {len(meses_afetados)} partições")
+            logging.info(f"📦 Histórico puro: {contagens['caixa1_historico']:,}")
+            logging.info(f"📦 Novas ordens: {contagens['caixa2_novas']:,}")
+            logging.info(f"📦 Atualizadas: {contagens['caixa3_atualizadas']:,}")
             logging.info(f"🕒 Processado em: {datetime.now().strftime('%d/%m/%Y às %H:%M:%S')}")
             logging.info("="*80)
             
-            return resultado_final
+            linhas = {
+                'relatorio_diario': len(relatorio_diario),
+                'relatorio_filtrado': len(relatorio_filtrado),
+                'resultado_final': registros_finais,
+                'resultado_particoes': len(resultado_parcial),
+                'feedback_editado': len(edicoes_feedback),
+                **contagens
+            }
+            self.manifesto.registrar(impressao, self.saidas_execucao(), linhas)
+            monitor.gravar(status='sucesso', linhas=linhas)
+            
+            return resultado_parcial
             
         except Exception as e:
             logging.error(f"❌ Erro no pipeline ETL: {str(e)}")
+            monitor.gravar(status='erro', erro=str(e))
             raise
 
 if __name__ == "__main__":
     processor = SafraETLProcessor()
-    resultado = processor.main()
+    resultado = processor.main(forcar='--force' in sys.argv)
@@ -0,0 +1,397 @@
+#!/usr/bin/env python3
+"""
+Gerador de dados sintéticos no formato do Relatorio_Diario e do Consolidado (base histórica)
+para testes de volume (10 mil a 10 milhões de ordens)
+"""
+
+import argparse
+import logging
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pandas.api.types import union_categoricals
+
+sys.path.append(str(Path(__file__).parent.parent))
+from src.cache_ingestao import preparar_para_parquet
+from src.escritor_excel import escrever_excel_streaming
+
+LIMITE_LINHAS_EXCEL = 1_048_575  # linhas de dados por aba (1.048.576 menos o cabeçalho)
+PRIMEIRA_ORDEM = 40_000_000
+LINHAS_POR_BLOCO_PARQUET = 1_000_000
+SENTINELAS = ['#N/D', '#REF!', '#VALOR!', '']
+
+# Colunas do Relatorio_Diario, na ordem do arquivo real
+COLUNAS_RELATORIO = [
+    'Ordem PagBank', 'Ordem SAP', 'Tipo da Ordem', 'Status da Ordem', 'Tipo Atendimento', 'Material',
+    "'DAX-ORDENS_LOGISTICA'[nam_opl]", 'Transportadora', 'Criação da Ordem', 'Início Indoor',
+    'Data Últ. Tracking Indoor', 'Início Transporte', 'Data Últ. Tracking Transporte', 'SLA Cliente',
+    'SLA Logística', 'Status Operação', 'Cód. Último Tracking', 'Último Tracking', 'Data Tracking',
+    'Data Coleta', 'Código Rastreio', 'Status Integração', 'Ordem Workfinity', 'Provider', 'Estado',
+    'Região', 'Classif. Cidade', 'Origem', 'CEP', 'Cidade', 'Previsão do Gerenciador', 'status_da_ordem',
+    'tipo_da_ordem', 'SLA', 'SLA Tracking', 'Status Prazo 10 Dias', 'Status Prazo 10 Dias Tracking',
+    'Status Prazo Tracking Entrada', 'classificacao da ordem', "'DAX-ORDENS_LOGISTICA'[opl]",
+    'operador_operacao', 'operador_operacao2', 'operador_sql'
+]
+
+# Colunas que só existem no Consolidado (tratativa dos líderes)
+COLUNAS_BASE_EXTRAS = [
+    'operador_operacao3', 'Status_Tratativa', 'Data_Status', 'Causa_Raiz', 'Feedback',
+    'Data_Feedback', 'Proxima_Acao', 'Dias_Em_Aberto', 'Alerta_SLA'
+]
+
+# Colunas que mudam entre um dia e outro para a mesma ordem
+COLUNAS_VOLATEIS = ['Cód. Último Tracking', 'Último Tracking', 'Data Tracking', 'Status da Ordem', 'status_da_ordem']
+
+# Distribuições aproximadas das observadas nos relatórios reais
+ESTADOS = {
+    'SP': ('Sudeste', 0.49, ['São Paulo', 'Campinas', 'Guarulhos', 'Santo André', 'Osasco', 'Santos']),
+    'RJ': ('Sudeste', 0.23, ['Rio de Janeiro', 'Niterói', 'Duque de Caxias', 'Nova Iguaçu']),
+    'RS': ('Sul', 0.08, ['Porto Alegre', 'Canoas', 'São Leopoldo', 'Caxias do Sul']),
+    'PR': ('Sul', 0.07, ['Curitiba', 'Londrina', 'Maringá']),
+    'MG': ('Sudeste', 0.04, ['Belo Horizonte', 'Contagem', 'Mateus Leme']),
+    'SC': ('Sul', 0.03, ['Florianópolis', 'Joinville', 'Blumenau']),
+    'BA': ('Nordeste', 0.02, ['Salvador', 'Feira de Santana']),
+    'PE': ('Nordeste', 0.01, ['Recife', 'Olinda']),
+    'CE': ('Nordeste', 0.01, ['Fortaleza', 'Caucaia']),
+    'GO': ('Centro-Oeste', 0.01, ['Goiânia', 'Anápolis']),
+    'DF': ('Centro-Oeste', 0.005, ['Brasília']),
+    'AM': ('Norte', 0.005, ['Manaus'])
+}
+TIPOS_ORDEM = {'Troca Leitor': 0.62, 'Adesão': 0.28, 'Instalação de Comodato': 0.09, 'Troca de Chip': 0.01}
+CODIGOS_TIPO_ORDEM = {'Troca Leitor': 'TS', 'Adesão': 'A', 'Instalação de Comodato': 'IA', 'Troca de Chip': 'EI'}
+STATUS_ORDEM = {'Aberta': 0.99, 'Preparando cadastro': 0.006, 'Aguardando parceiro': 0.004}
+CODIGOS_STATUS_ORDEM = {'Aberta': 'O', 'Preparando cadastro': 'H', 'Aguardando parceiro': 'T'}
+TIPOS_ATENDIMENTO = {'Técnico': 0.99, 'Expresso': 0.01}
+MATERIAIS = {
+    'Moderninha Pro 2 S ATV': 0.25, 'Moderninha Smart 2 ATV': 0.22, 'Minizinha NFC 2 ATV': 0.12,
+    'Moderninha Pro 2 SP930 ATV': 0.09, 'Minizinha Chip 3 ATV': 0.08, 'Moderninha Plus 2 ATV': 0.07,
+    'Moderninha X ATV': 0.06, 'Minizinha Chip 2 ATV': 0.05, 'Moderninha Pro 2 ATV': 0.04, 'Chip 4G': 0.02
+}
+OPERADORES = {'OPL - MEMPHIS': ('5511', 0.92), 'MEMPHIS MATRIZ': ('5502', 0.08)}
+TRANSPORTADORAS = {'PagResolve': 0.97, 'Técnico Próprio': 0.03}
+TRACKINGS = {
+    'Nova': (1100, 0.70), 'Reencaminhado': (1240, 0.10), 'Em tratativa': (1220, 0.09),
+    'Em campo': (1200, 0.065), 'Reagendado': (1230, 0.03), 'Ausente': (1250, 0.015)
+}
+STATUS_INTEGRACAO = {
+    'Não se aplica': 0.97, 'Erro tipo atendimento na Ordem': 0.015,
+    'Erro de integração': 0.01, 'Aguardando Parceiro': 0.005
+}
+CLASSIFICACOES_CIDADE = {'Capital': 0.55, 'Região Metropolitana': 0.25, 'Interior': 0.20}
+ORIGENS = {None: 0.74, 'SITE': 0.16, 'POLO LT': 0.03, 'POLO VIRTUAL': 0.03, 'MGM': 0.02, 'APP': 0.02}
+STATUS_TRATATIVA = {
+    None: 0.61, 'Finalizada - Sucesso': 0.19, 'Em Aberto': 0.16,
+    'Finalizada - Insucesso': 0.03, 'Em Tratativa': 0.01
+}
+QUANTIDADE_POLOS = 70
+FRACAO_TEFTI = 0.05
+DIAS_ATE_PREVISAO = 10
+DIAS_PRAZO = 10
+
+
+def _categorico(codigos: np.ndarray, categorias: List) -> pd.Categorical:
+    """Coluna categórica a partir dos códigos (-1 = vazio): memória de 1 byte/linha mesmo com 10 milhões de ordens"""
+    return pd.Categorical.from_codes(codigos, categories=categorias)
+
+
+def _sortear(rng: np.random.Generator, distribuicao: Dict, n: int) -> pd.Categorical:
+    """Sorteia n valores segundo os pesos da distribuição (chave None = célula vazia)"""
+    valores = list(distribuicao.keys())
+    pesos = np.array([p[-1] if isinstance(p, tuple) else p for p in distribuicao.values()], dtype=float)
+    categorias = [v for v in valores if v is not None]
+    codigos = np.array([categorias.index(v) if v is not None else -1 for v in valores], dtype='int8')
+    return _categorico(codigos[rng.choice(len(valores), size=n, p=pesos / pesos.sum())], categorias)
+
+
+def _mapear(categorico: pd.Categorical, mapa: Dict) -> pd.Categorical:
+    """Aplica um mapeamento de/para às categorias, sem passar pelas linhas"""
+    destinos = list(dict.fromkeys(mapa[c] for c in categorico.categories))
+    codigos = np.array([destinos.index(mapa[c]) for c in categorico.categories] + [-1], dtype='int8')
+    return _categorico(codigos[categorico.codes], destinos)
+
+
+def _catalogo_polos() -> Tuple[List[str], np.ndarray]:
+    """Nomes de polos no padrão 'Polo UF Unidade n - Pnnn' e pesos com cauda longa (Zipf)"""
+    ufs = list(ESTADOS.keys())
+    polos = [f"Polo {ufs[i % len(ufs)]} Unidade {i // len(ufs) + 1} - P{i + 1:03d}" for i in range(QUANTIDADE_POLOS)]
+    pesos = 1 / np.arange(1, QUANTIDADE_POLOS + 1)
+    return polos + ['TEFTI'], np.append(pesos / pesos.sum() * (1 - FRACAO_TEFTI), FRACAO_TEFTI)
+
+
+def _rotular_sla(dias: np.ndarray) -> pd.Categorical:
+    """Faixas de SLA como no relatório ('0', '1', '2', '3', '4 a 7', '8 a 10', '11 a 20', '> 20')"""
+    faixas = ['0', '1', '2', '3', '4 a 7', '8 a 10', '11 a 20', '> 20']
+    codigos = np.select([dias <= 3, dias <= 7, dias <= 10, dias <= 20], [dias, 4, 5, 6], default=7)
+    return _categorico(codigos.astype('int8'), faixas)
+
+
+def _injetar_sentinelas(df: pd.DataFrame, rng: np.random.Generator, fracao: float) -> None:
+    """Troca uma fração das células de texto por marcadores do Excel (#N/D, #REF!, ...)"""
+    if fracao <= 0:
+        return
+    for col in ['Provider', 'Cidade', 'Material', 'Último Tracking', 'Status Integração', 'Origem']:
+        if col not in df.columns:
+            continue
+        mascara = rng.random(len(df)) < fracao
+        if not mascara.any():
+            continue
+        coluna = df[col].astype('category')
+        categorias = coluna.cat.categories.union(pd.Index(SENTINELAS), sort=False)
+        codigos = coluna.cat.set_categories(categorias).cat.codes.to_numpy().copy()
+        codigos[mascara] = rng.choice(categorias.get_indexer(SENTINELAS), size=int(mascara.sum()))
+        df[col] = _categorico(codigos, categorias)
+
+
+def _gerar_trackings(rng: np.random.Generator, criacao: pd.Series) -> Dict[str, Any]:
+    """Último tracking (código e descrição) e a data dele, sempre depois da criação"""
+    n = len(criacao)
+    trackings = _sortear(rng, TRACKINGS, n)
+    sem_tracking = rng.random(n) < 0.01
+    codigos = np.array([TRACKINGS[t][0] for t in trackings.categories] + [np.nan])[trackings.codes]
+    codigos[sem_tracking] = np.nan
+    data_tracking = criacao + pd.to_timedelta(rng.integers(1, 72 * 3600, n), unit='s')
+    return {
+        'Cód. Último Tracking': codigos,
+        'Último Tracking': _categorico(np.where(sem_tracking, -1, trackings.codes), trackings.categories),
+        'Data Tracking': data_tracking.where(~sem_tracking).to_numpy()
+    }
+
+
+def _gerar_cidades(rng: np.random.Generator, estados: pd.Categorical) -> pd.Categorical:
+    """Cidade sorteada dentro do estado de cada ordem (capital com mais peso)"""
+    cidades = [cidade for _, _, nomes in ESTADOS.values() for cidade in nomes]
+    codigos = np.full(len(estados), -1, dtype='int16')
+    for codigo_uf, uf in enumerate(estados.categories):
+        mascara = estados.codes == codigo_uf
+        nomes = ESTADOS[uf][2]
+        pesos = np.array([0.55] + [0.45 / max(len(nomes) - 1, 1)] * (len(nomes) - 1))[:len(nomes)]
+        sorteio = rng.choice(len(nomes), size=int(mascara.sum()), p=pesos / pesos.sum())
+        codigos[mascara] = cidades.index(nomes[0]) + sorteio
+    return _categorico(codigos, cidades)
+
+
+def _gerar_ordens(rng: np.random.Generator, chaves: np.ndarray, criacao: pd.Series,
+                  data_referencia: pd.Timestamp) -> pd.DataFrame:
+    """Gera as colunas do Relatorio_Diario para as chaves e datas de criação informadas"""
+    n = len(chaves)
+    sequencia = chaves - PRIMEIRA_ORDEM
+
+    estados = _sortear(rng, {uf: peso for uf, (_, peso, _) in ESTADOS.items()}, n)
+    polos, pesos_polos = _catalogo_polos()
+    tipos = _sortear(rng, TIPOS_ORDEM, n)
+    status = _sortear(rng, STATUS_ORDEM, n)
+    operadores = _sortear(rng, OPERADORES, n)
+    transportadoras = _sortear(rng, TRANSPORTADORAS, n)
+
+    dias_sla = np.clip((data_referencia - criacao.dt.normalize()).dt.days.to_numpy(), 0, None)
+    rotulos_sla = _rotular_sla(dias_sla)
+    prazo = _categorico((dias_sla > DIAS_PRAZO).astype('int8'), ['Dentro do Prazo', 'Fora do Prazo'])
+    em_cadastro = (status.codes == list(status.categories).index('Preparando cadastro')).astype('int8')
+
+    ordem_sap = (5_005_000_000 + sequencia).astype(float)
+    ordem_sap[rng.random(n) < 0.01] = np.nan
+
+    df = pd.DataFrame({
+        'Ordem PagBank': chaves.astype('int64'),
+        'Ordem SAP': ordem_sap,
+        'Tipo da Ordem': tipos,
+        'Status da Ordem': status,
+        'Tipo Atendimento': _sortear(rng, TIPOS_ATENDIMENTO, n),
+        'Material': _sortear(rng, MATERIAIS, n),
+        "'DAX-ORDENS_LOGISTICA'[nam_opl]": operadores,
+        'Transportadora': transportadoras,
+        'Criação da Ordem': criacao.to_numpy(),
+        'Início Indoor': np.nan,
+        'Data Últ. Tracking Indoor': np.nan,
+        'Início Transporte': criacao.dt.normalize().to_numpy(),
+        'Data Últ. Tracking Transporte': np.nan,
+        'SLA Cliente': dias_sla,
+        'SLA Logística': dias_sla,
+        'Status Operação': _categorico(em_cadastro, ['Transporte', 'Cadastro']),
+        **_gerar_trackings(rng, criacao),
+        'Data Coleta': np.nan,
+        'Código Rastreio': ordem_sap,
+        'Status Integração': _sortear(rng, STATUS_INTEGRACAO, n),
+        'Ordem Workfinity': (3_400_000 + sequencia).astype(float),
+        'Provider': _categorico(rng.choice(len(polos), size=n, p=pesos_polos).astype('int16'), polos),
+        'Estado': estados,
+        'Região': _mapear(estados, {uf: regiao for uf, (regiao, _, _) in ESTADOS.items()}),
+        'Classif. Cidade': _sortear(rng, CLASSIFICACOES_CIDADE, n),
+        'Origem': _sortear(rng, ORIGENS, n),
+        'CEP': rng.integers(1_000_000, 99_999_999, n),
+        'Cidade': _gerar_cidades(rng, estados),
+        'Previsão do Gerenciador': (criacao.dt.normalize() + pd.Timedelta(days=DIAS_ATE_PREVISAO)).to_numpy(),
+        'status_da_ordem': _mapear(status, CODIGOS_STATUS_ORDEM),
+        'tipo_da_ordem': _mapear(tipos, CODIGOS_TIPO_ORDEM),
+        'SLA': rotulos_sla,
+        'SLA Tracking': rotulos_sla,
+        'Status Prazo 10 Dias': prazo,
+        'Status Prazo 10 Dias Tracking': prazo,
+        'Status Prazo Tracking Entrada': np.nan,
+        'classificacao da ordem': _categorico(np.zeros(n, dtype='int8'), ['Saída']),
+        "'DAX-ORDENS_LOGISTICA'[opl]": np.array([int(OPERADORES[o][0]) for o in operadores.categories])[operadores.codes],
+        'operador_operacao': transportadoras,
+        'operador_operacao2': transportadoras,
+        'operador_sql': transportadoras
+    })
+    return df[COLUNAS_RELATORIO]
+
+
+def _datas_criacao(rng: np.random.Generator, n: int, data_referencia: pd.Timestamp, dias_media: float,
+                   dias_maximo: int) -> pd.Series:
+    """Datas de criação concentradas nos dias mais recentes (distribuição exponencial)"""
+    dias = np.minimum(rng.exponential(dias_media, n).astype(int), dias_maximo)
+    segundos = rng.integers(8 * 3600, 20 * 3600, n)
+    return pd.Series(data_referencia - pd.to_timedelta(dias, unit='D') + pd.to_timedelta(segundos, unit='s'))
+
+
+def _referencia(data_referencia: Optional[Union[str, datetime]]) -> pd.Timestamp:
+    """Data de referência do relatório (hoje quando não informada)"""
+    return pd.Timestamp(data_referencia or datetime.now()).normalize()
+
+
+def _concatenar(partes: List[pd.DataFrame]) -> pd.DataFrame:
+    """Concatena mantendo as colunas categóricas (pd.concat cairia para object com categorias diferentes)"""
+    for col in partes[0].columns:
+        if all(isinstance(parte[col].dtype, pd.CategoricalDtype) for parte in partes):
+            categorias = union_categoricals([parte[col] for parte in partes]).categories
+            for parte in partes:
+                parte[col] = parte[col].cat.set_categories(categorias)
+    return pd.concat(partes, ignore_index=True)
+
+
+def gerar_base_historica(n_ordens: int, data_referencia: Optional[Union[str, datetime]] = None,
+                         dias_historico: int = 180, fracao_sentinelas: float = 0.005,
+                         semente: int = 42) -> pd.DataFrame:
+    """Base histórica no layout do Consolidado: colunas do relatório + tratativa dos líderes"""
+    rng = np.random.default_rng(semente)
+    referencia = _referencia(data_referencia)
+    chaves = PRIMEIRA_ORDEM + np.arange(n_ordens, dtype='int64')
+    criacao = _datas_criacao(rng, n_ordens, referencia, dias_historico / 4, dias_historico)
+
+    df = _gerar_ordens(rng, chaves, criacao, referencia)
+    transportadoras = df['operador_operacao'].array
+    df['operador_operacao3'] = _categorico(
+        np.where(rng.random(n_ordens) < 0.8, -1, transportadoras.codes), transportadoras.categories)
+
+    status_tratativa = _sortear(rng, STATUS_TRATATIVA, n_ordens)
+    tratada = status_tratativa.codes >= 0
+    finalizada = np.isin(status_tratativa.codes, status_tratativa.categories.get_indexer(
+        ['Finalizada - Sucesso', 'Finalizada - Insucesso']))
+    data_status = criacao.dt.normalize() + pd.to_timedelta(rng.integers(0, 15, n_ordens), unit='D')
+
+    # Poucas datas distintas: formata cada uma só uma vez
+    codigos_data, datas = pd.factorize(data_status)
+    textos = ['Finalizado com sucesso ' + d for d in datas.strftime('%d.%m')]
+
+    df['Status_Tratativa'] = status_tratativa
+    df['Data_Status'] = data_status.where(tratada).to_numpy()
+    df['Causa_Raiz'] = _categorico(np.where(tratada, 0, -1), ['Outros(descrever)'])
+    df['Feedback'] = _categorico(np.where(finalizada, codigos_data, -1), textos)
+    df['Data_Feedback'] = data_status.where(finalizada & (rng.random(n_ordens) < 0.15)).to_numpy()
+    df['Proxima_Acao'] = _categorico(
+        np.where(finalizada & (rng.random(n_ordens) < 0.05), 0, -1), ['Finalizados não refletidos no B.I'])
+    df['Dias_Em_Aberto'] = np.where(tratada, (referencia - data_status).dt.days.clip(lower=0), np.nan)
+    df['Alerta_SLA'] = np.nan
+
+    _injetar_sentinelas(df, rng, fracao_sentinelas)
+    return df[COLUNAS_RELATORIO + COLUNAS_BASE_EXTRAS]
+
+
+def gerar_relatorio_diario(n_ordens: int, base_historica: Optional[pd.DataFrame] = None,
+                           sobreposicao: float = 0.3, data_referencia: Optional[Union[str, datetime]] = None,
+                           fracao_sentinelas: float = 0.005, semente: int = 43) -> pd.DataFrame:
+    """
+    Relatório diário com n_ordens linhas; a fração 'sobreposicao' reaproveita ordens da base
+    (mesmos dados estáticos, tracking novo) e o restante são ordens novas
+    """
+    rng = np.random.default_rng(semente)
+    referencia = _referencia(data_referencia)
+
+    n_sobrepostas = 0
+    partes = []
+    if base_historica is not None and len(base_historica) and sobreposicao > 0:
+        n_sobrepostas = min(int(round(n_ordens * sobreposicao)), len(base_historica))
+        escolhidas = rng.choice(len(base_historica), size=n_sobrepostas, replace=False)
+        existentes = base_historica.iloc[np.sort(escolhidas)][COLUNAS_RELATORIO].reset_index(drop=True)
+        criacao = pd.to_datetime(existentes['Criação da Ordem'], errors='coerce').fillna(referencia)
+        for col, valores in _gerar_trackings(rng, criacao).items():
+            existentes[col] = valores
+        partes.append(existentes)
+
+    # Ordens novas começam depois da maior chave da base
+    inicio = PRIMEIRA_ORDEM if base_historica is None or base_historica.empty \
+        else int(pd.to_numeric(base_historica['Ordem PagBank'], errors='coerce').max()) + 1
+    n_novas = n_ordens - n_sobrepostas
+    chaves = inicio + np.arange(n_novas, dtype='int64')
+    partes.append(_gerar_ordens(rng, chaves, _datas_criacao(rng, n_novas, referencia, 3, 30), referencia))
+
+    df = _concatenar(partes)
+    df = df.iloc[rng.permutation(len(df))].reset_index(drop=True)
+    _injetar_sentinelas(df, rng, fracao_sentinelas)
+    return df
+
+
+def salvar(df: pd.DataFrame, caminho: Union[str, Path], aba: str = 'Sheet1') -> Path:
+    """Grava em .xlsx, .csv ou .parquet conforme a extensão do arquivo"""
+    caminho = Path(caminho)
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    formato = caminho.suffix.lower()
+
+    if formato == '.xlsx':
+        if len(df) > LIMITE_LINHAS_EXCEL:
+            raise ValueError(f"{len(df):,} linhas excedem o limite de uma aba do Excel ({LIMITE_LINHAS_EXCEL:,})")
+        escrever_excel_streaming(caminho, {aba: df})
+    elif formato == '.csv':
+        df.to_csv(caminho, index=False, encoding='utf-8-sig', sep=';', date_format='%d/%m/%Y %H:%M:%S')
+    elif formato == '.parquet':
+        # Em blocos de linhas: converter 10 milhões de ordens para Arrow de uma vez dobra o pico de memória
+        escritor = None
+        try:
+            for inicio in range(0, max(len(df), 1), LINHAS_POR_BLOCO_PARQUET):
+                bloco = preparar_para_parquet(df.iloc[inicio:inicio + LINHAS_POR_BLOCO_PARQUET].copy())
+                tabela = pa.Table.from_pandas(bloco, preserve_index=False)
+                if escritor is None:
+                    escritor = pq.ParquetWriter(caminho, tabela.schema)
+                escritor.write_table(tabela.cast(escritor.schema))
+        finally:
+            if escritor is not None:
+                escritor.close()
+    else:
+        raise ValueError(f"Formato não suportado: {formato} (use .xlsx, .csv ou .parquet)")
+
+    logging.getLogger(__name__).info(f"💾 {len(df):,} linhas gravadas em {caminho}")
+    return caminho
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Gerador de Relatorio_Diario e base histórica sintéticos')
+    parser.add_argument('--historico', type=int, default=100_000, help='Ordens na base histórica')
+    parser.add_argument('--diario', type=int, default=10_000, help='Ordens no relatório diário')
+    parser.add_argument('--sobreposicao', type=float, default=0.3, help='Fração do diário já presente na base')
+    parser.add_argument('--sentinelas', type=float, default=0.005, help='Fração de células com #N/D, #REF!, ...')
+    parser.add_argument('--formato', choices=['xlsx', 'csv', 'parquet'], default='parquet', help='Formato de saída')
+    parser.add_argument('--saida', default='data/sintetico', help='Diretório de saída')
+    parser.add_argument('--data-referencia', default=None, help='Data do relatório (AAAA-MM-DD, padrão: hoje)')
+    parser.add_argument('--semente', type=int, default=42, help='Semente do gerador aleatório')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    base = gerar_base_historica(args.historico, args.data_referencia, fracao_sentinelas=args.sentinelas,
+                                semente=args.semente)
+    diario = gerar_relatorio_diario(args.diario, base, args.sobreposicao, args.data_referencia,
+                                    fracao_sentinelas=args.sentinelas, semente=args.semente + 1)
+
+    saida = Path(args.saida)
+    salvar(base, saida / f"base_historica_{args.historico}.{args.formato}", aba='Consolidado')
+    salvar(diario, saida / f"relatorio_diario_{args.diario}.{args.formato}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+import pandas as pd
+import numpy as np
+import pyarrow.parquet as pq
+import json
+import logging
+import shutil
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Union
+
+sys.path.append(str(Path(__file__).parent.parent))
+from src.cache_ingestao import preparar_para_parquet
+from src.utils import gravar_atomico
+
+COLUNA_PARTICAO = 'Criação da Ordem'
+CHAVE_PADRAO = 'Ordem PagBank'
+PARTICAO_SEM_DATA = 'sem_data'
+ARQUIVO_PARTICAO = 'dados.parquet'
+ARQUIVO_INDICE = 'indice_particoes.json'  # linhas e faixa de chaves de cada partição
+
+
+def calcular_mes_particao(datas: pd.Series) -> pd.Series:
+    """Mapeia a data de criação para a partição mensal 'YYYY-MM' (nulas vão para 'sem_data')"""
+    datas = pd.to_datetime(datas, errors='coerce', dayfirst=True)
+    if datas.dt.tz is not None:
+        datas = datas.dt.tz_localize(None)
+    meses = datas.dt.strftime('%Y-%m')
+    return meses.fillna(PARTICAO_SEM_DATA).astype(str)
+
+
+class HistoricoParticionado:
+    """Base histórica em Parquet particionada por mês de criação da ordem (mes=YYYY-MM)"""
+
+    def __init__(self, diretorio: Union[str, Path], chave: str = CHAVE_PADRAO):
+        self.diretorio = Path(diretorio)
+        self.diretorio.mkdir(parents=True, exist_ok=True)
+        self.chave = chave
+        self.logger = logging.getLogger(__name__)
+
+    def existe(self) -> bool:
+        """Indica se o store já possui alguma partição gravada"""
+        return bool(self.listar_particoes())
+
+    def listar_particoes(self) -> List[str]:
+        """Lista os meses com partição gravada"""
+        return sorted(
+            pasta.name.split('=', 1)[1]
+            for pasta in self.diretorio.glob('mes=*')
+            if (pasta / ARQUIVO_PARTICAO).exists()
+        )
+
+    def arquivos(self) -> Dict[str, Path]:
+        """Arquivo Parquet de cada partição gravada"""
+        return {mes: self._caminho_particao(mes) for mes in self.listar_particoes()}
+
+    def carregar(self, meses: Optional[Iterable[str]] = None, colunas: Optional[List[str]] = None) -> pd.DataFrame:
+        """Carrega as partições informadas (todas quando meses é None); colunas ausentes de uma partição vêm nulas"""
+        meses = self.listar_particoes() if meses is None else sorted(set(meses))
+        partes = []
+        for mes in meses:
+            arquivo = self._caminho_particao(mes)
+            if arquivo.exists():
+                existentes = colunas if colunas is None else \
+                    [col for col in colunas if col in pq.read_schema(arquivo).names]
+                partes.append(pd.read_parquet(arquivo, columns=existentes))
+
+        if not partes:
+            return pd.DataFrame(columns=colunas) if colunas else pd.DataFrame()
+        return pd.concat(partes, ignore_index=True)
+
+    def resumo_particoes(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Linhas e faixa de chaves (mín/máx) de cada partição, lidas do índice persistido. Entradas
+        ausentes ou de arquivos alterados fora do gravar (tamanho/mtime diferentes) são refeitas.
+        """
+        indice = self._ler_indice()
+        resumo = {}
+        for mes in self.listar_particoes():
+            entrada = indice.get(mes)
+            if entrada is None or entrada.get('arquivo') != self._assinatura_arquivo(mes):
+                chaves = pd.read_parquet(self._caminho_particao(mes), columns=[self.chave])[self.chave]
+                entrada = self._resumir_particao(mes, chaves)
+            resumo[mes] = entrada
+
+        if resumo != indice:
+            self._gravar_indice(resumo)
+        return resumo
+
+    def total_registros(self) -> int:
+        """Total de registros do histórico (sem ler as partições)"""
+        return sum(entrada['linhas'] for entrada in self.resumo_particoes().values())
+
+    def particoes_afetadas(self, relatorio: pd.DataFrame) -> Set[str]:
+        """Partições tocadas pelo relatório: as das ordens já existentes e as dos meses das novas"""
+        chaves_relatorio = pd.to_numeric(relatorio[self.chave], errors='coerce').dropna()
+        chaves_relatorio = np.unique(chaves_relatorio.to_numpy(dtype='int64'))
+        meses = set(calcular_mes_particao(relatorio[COLUNA_PARTICAO])) if COLUNA_PARTICAO in relatorio.columns else {PARTICAO_SEM_DATA}
+
+        # Uma ordem existente pertence à partição em que já está gravada. A faixa de chaves do
+        # índice descarta as partições que não podem contê-la; só as demais têm a chave lida
+        for mes, resumo in self.resumo_particoes().items():
+            if mes in meses or resumo['chave_min'] is None:
+                continue
+            inicio = np.searchsorted(chaves_relatorio, resumo['chave_min'], side='left')
+            fim = np.searchsorted(chaves_relatorio, resumo['chave_max'], side='right')
+            if fim == inicio:
+                continue
+            chaves_particao = pd.read_parquet(self._caminho_particao(mes), columns=[self.chave])[self.chave]
+            if pd.to_numeric(chaves_particao, errors='coerce').isin(chaves_relatorio[inicio:fim]).any():
+                meses.add(mes)
+
+        return meses
+
+    def gravar(self, df: pd.DataFrame, substituir: Optional[Iterable[str]] = None) -> List[str]:
+        """
+        Grava o DataFrame particionado por mês; partições em substituir que ficarem
+        sem registros são removidas. Retorna os meses gravados.
+        """
+        df = preparar_para_parquet(df.copy())
+        meses_df = calcular_mes_particao(df[COLUNA_PARTICAO]) if COLUNA_PARTICAO in df.columns \
+            else pd.Series(PARTICAO_SEM_DATA, index=df.index)
+
+        indice = self._ler_indice()
+        gravados = []
+        for mes, particao in df.groupby(meses_df.to_numpy(), sort=True):
+            gravar_atomico(self._caminho_particao(mes), particao.reset_index(drop=True))
+            indice[mes] = self._resumir_particao(mes, particao[self.chave] if self.chave in particao.columns
+                                                 else pd.Series(pd.NA, index=particao.index))
+            gravados.append(mes)
+
+        for mes in set(substituir or []) - set(gravados):
+            pasta = self._caminho_particao(mes).parent
+            indice.pop(mes, None)
+            if pasta.exists():
+                shutil.rmtree(pasta)
+                self.logger.info(f"🗑️ Partição vazia removida: mes={mes}")
+        self._gravar_indice(indice)
+
+        self.logger.info(f"💾 Histórico particionado: {len(gravados)} partições gravadas ({len(df):,} registros)")
+        return gravados
+
+    def _caminho_particao(self, mes: str) -> Path:
+        """Caminho do arquivo Parquet de uma partição"""
+        return self.diretorio / f"mes={mes}" / ARQUIVO_PARTICAO
+
+    def _assinatura_arquivo(self, mes: str) -> List[int]:
+        """Tamanho e mtime do arquivo da partição: detectam uma partição alterada fora do gravar"""
+        info = self._caminho_particao(mes).stat()
+        return [info.st_size, info.st_mtime_ns]
+
+    def _resumir_particao(self, mes: str, chaves: pd.Series) -> Dict[str, Any]:
+        """Entrada do índice de uma partição a partir da coluna chave (uma posição por registro)"""
+        validas = pd.to_numeric(chaves, errors='coerce').dropna()
+        return {
+            'linhas': len(chaves),
+            'chave_min': int(validas.min()) if len(validas) else None,
+            'chave_max': int(validas.max()) if len(validas) else None,
+            'arquivo': self._assinatura_arquivo(mes)
+        }
+
+    def _ler_indice(self) -> Dict[str, Dict[str, Any]]:
+        """Índice persistido das partições (vazio se ainda não existir ou estiver corrompido)"""
+        arquivo = self.diretorio / ARQUIVO_INDICE
+        if not arquivo.exists():
+            return {}
+        try:
+            with open(arquivo, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (json.JSONDecodeError, OSError):
+            return {}
+
+    def _gravar_indice(self, indice: Dict[str, Dict[str, Any]]) -> None:
+        """Grava o índice em arquivo temporário e substitui de forma atômica"""
+        gravar_atomico(self.diretorio / ARQUIVO_INDICE, dict(sorted(indice.items())))
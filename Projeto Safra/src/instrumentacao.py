@@ -0,0 +1,157 @@
+import json
+import logging
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Union
+
+try:
+    import psutil
+except ImportError:  # Sem psutil as etapas continuam medidas, só sem RSS
+    psutil = None
+
+INTERVALO_AMOSTRAGEM = 0.05  # segundos entre amostras de RSS durante uma etapa
+BYTES_POR_MB = 1024 ** 2
+TOP_ALOCACOES_ETAPA = 15     # locais de alocação guardados por etapa quando o tracemalloc está ativo
+
+# Observadores de etapas concluídas (ex.: o perfilamento do main.py)
+_observadores: List[Callable[[Dict[str, Any]], None]] = []
+
+
+@contextmanager
+def observar_etapas(observador: Callable[[Dict[str, Any]], None]) -> Iterator[None]:
+    """Chama o observador com a medição de cada etapa concluída enquanto o bloco estiver ativo"""
+    _observadores.append(observador)
+    try:
+        yield
+    finally:
+        _observadores.remove(observador)
+
+
+def maiores_alocacoes(estatisticas: List[Any], quantidade: int) -> List[Dict[str, Any]]:
+    """Resume estatísticas do tracemalloc (Statistic ou StatisticDiff) em locais de alocação serializáveis"""
+    alocacoes = []
+    # As alocações dos próprios snapshots (módulo tracemalloc) não interessam
+    relevantes = [estatistica for estatistica in estatisticas if estatistica.traceback[0].filename != tracemalloc.__file__]
+    for estatistica in relevantes[:quantidade]:
+        quadro = estatistica.traceback[0]
+        alocacoes.append({
+            'local': f"{quadro.filename}:{quadro.lineno}",
+            'kb': round(getattr(estatistica, 'size_diff', estatistica.size) / 1024, 1),
+            'blocos': getattr(estatistica, 'count_diff', estatistica.count)
+        })
+    return alocacoes
+
+
+class _AmostradorMemoria(threading.Thread):
+    """Amostra o RSS do processo em segundo plano para capturar o pico de uma etapa"""
+
+    def __init__(self, processo: Any, intervalo: float):
+        super().__init__(daemon=True)
+        self.processo = processo
+        self.intervalo = intervalo
+        self.inicio = self.pico = processo.memory_info().rss
+        self._parar = threading.Event()
+
+    def run(self) -> None:
+        while not self._parar.wait(self.intervalo):
+            self.pico = max(self.pico, self.processo.memory_info().rss)
+
+    def parar(self) -> int:
+        """Encerra a amostragem e devolve o RSS final"""
+        self._parar.set()
+        self.join()
+        fim = self.processo.memory_info().rss
+        self.pico = max(self.pico, fim)
+        return fim
+
+
+class MonitorEtapas:
+    """Mede as etapas de uma execução (tempo de parede, CPU, pico de RSS, linhas) e grava um registro JSON"""
+
+    def __init__(self, pipeline: str, arquivo_metricas: Optional[Union[str, Path]] = None,
+                 intervalo_amostragem: float = INTERVALO_AMOSTRAGEM):
+        self.pipeline = pipeline
+        self.arquivo_metricas = Path(arquivo_metricas) if arquivo_metricas else None
+        self.intervalo_amostragem = intervalo_amostragem
+        self.processo = psutil.Process() if psutil is not None else None
+        self.etapas: List[Dict[str, Any]] = []
+        self.logger = logging.getLogger(__name__)
+        self.inicio = datetime.now()
+        self._inicio_parede = time.perf_counter()
+        self._inicio_cpu = time.process_time()
+
+    @contextmanager
+    def etapa(self, nome: str, linhas_entrada: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Mede o bloco; quem chama preenche medicao['linhas_saida']"""
+        medicao = {'etapa': nome, 'linhas_entrada': linhas_entrada, 'linhas_saida': None}
+        amostrador = None
+        if self.processo is not None:
+            amostrador = _AmostradorMemoria(self.processo, self.intervalo_amostragem)
+            amostrador.start()
+        # Com tracemalloc ativo (main.py --trace-memory), guarda os locais que mais alocaram na etapa
+        snapshot_inicio = None
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+            snapshot_inicio = tracemalloc.take_snapshot()
+        inicio_parede, inicio_cpu = time.perf_counter(), time.process_time()
+
+        try:
+            yield medicao
+        except Exception as e:
+            medicao['erro'] = str(e)
+            raise
+        finally:
+            medicao['tempo_s'] = round(time.perf_counter() - inicio_parede, 4)
+            medicao['cpu_s'] = round(time.process_time() - inicio_cpu, 4)
+            if amostrador is not None:
+                fim = amostrador.parar()
+                medicao['rss_inicio_mb'] = round(amostrador.inicio / BYTES_POR_MB, 1)
+                medicao['rss_pico_mb'] = round(amostrador.pico / BYTES_POR_MB, 1)
+                medicao['rss_fim_mb'] = round(fim / BYTES_POR_MB, 1)
+            if snapshot_inicio is not None and tracemalloc.is_tracing():
+                medicao['tracemalloc_pico_mb'] = round(tracemalloc.get_traced_memory()[1] / BYTES_POR_MB, 1)
+                diferencas = tracemalloc.take_snapshot().compare_to(snapshot_inicio, 'lineno')
+                medicao['alocacoes'] = maiores_alocacoes(diferencas, TOP_ALOCACOES_ETAPA)
+            self.etapas.append(medicao)
+            for observador in list(_observadores):
+                observador(medicao)
+            self.logger.info(
+                f"⏱️ {nome}: {medicao['tempo_s']:.2f}s (CPU {medicao['cpu_s']:.2f}s)"
+                f" | pico RSS {medicao.get('rss_pico_mb', '-')} MB"
+                f" | linhas {medicao['linhas_entrada']} → {medicao['linhas_saida']}"
+            )
+
+    def registro(self, status: str, **extras: Any) -> Dict[str, Any]:
+        """Registro consolidado da execução"""
+        picos = [etapa['rss_pico_mb'] for etapa in self.etapas if 'rss_pico_mb' in etapa]
+        return {
+            'pipeline': self.pipeline,
+            'inicio': self.inicio.isoformat(timespec='seconds'),
+            'status': status,
+            'tempo_total_s': round(time.perf_counter() - self._inicio_parede, 4),
+            'cpu_total_s': round(time.process_time() - self._inicio_cpu, 4),
+            'rss_pico_mb': max(picos) if picos else None,
+            'etapas': self.etapas,
+            **extras
+        }
+
+    def gravar(self, status: str = 'sucesso', **extras: Any) -> Dict[str, Any]:
+        """Acrescenta o registro da execução ao arquivo de métricas (uma linha JSON por execução)"""
+        registro = self.registro(status, **extras)
+        if self.arquivo_metricas is not None:
+            self.arquivo_metricas.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.arquivo_metricas, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(registro, ensure_ascii=False, default=str) + '\n')
+            self.logger.info(f"📈 Métricas da execução gravadas em: {self.arquivo_metricas.name}")
+        return registro
+
+
+def medir_etapa(monitor: Optional[MonitorEtapas], nome: str, linhas_entrada: Optional[int] = None):
+    """monitor.etapa quando há monitor; caso contrário um contexto vazio (funções reutilizáveis fora do ETL)"""
+    if monitor is None:
+        return nullcontext({})
+    return monitor.etapa(nome, linhas_entrada)
@@ -0,0 +1,96 @@
+import hashlib
+import json
+import logging
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+import pytz
+
+sys.path.append(str(Path(__file__).parent.parent))
+from src.cache_ingestao import calcular_hash_arquivo
+from src.utils import gravar_atomico
+
+Caminho = Union[str, Path]
+
+
+def impressao_configuracao(config: Any) -> str:
+    """Hash dos atributos em maiúsculas da configuração (listas de colunas, tipos, parâmetros, caminhos)"""
+    atributos = {**vars(type(config)), **vars(config)}
+    publicos = {nome: valor for nome, valor in atributos.items() if nome.isupper()}
+    serializado = json.dumps(publicos, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(serializado.encode('utf-8')).hexdigest()
+
+
+def _estado_arquivo(caminho: Caminho) -> Optional[Dict[str, int]]:
+    """Tamanho e mtime de uma saída (None se ela não existir mais)"""
+    caminho = Path(caminho)
+    if not caminho.exists():
+        return None
+    estado = caminho.stat()
+    return {'tamanho': estado.st_size, 'mtime_ns': estado.st_mtime_ns}
+
+
+class ManifestoExecucao:
+    """Manifesto da última execução do ETL: permite pular a rodada quando nada mudou"""
+
+    def __init__(self, arquivo: Caminho):
+        self.arquivo = Path(arquivo)
+        self.logger = logging.getLogger(__name__)
+
+    def calcular_impressao(self, entradas: Dict[str, Caminho], configuracao: str) -> Dict[str, Any]:
+        """
+        Impressão digital da rodada: hash do conteúdo de cada entrada, hash da configuração
+        e data de referência (Dias_Em_Aberto muda a cada dia mesmo com as mesmas entradas)
+        """
+        return {
+            'entradas': {
+                nome: {
+                    'caminho': str(caminho),
+                    'hash': calcular_hash_arquivo(caminho) if Path(caminho).exists() else None
+                }
+                for nome, caminho in entradas.items()
+            },
+            'configuracao': configuracao,
+            'data_referencia': datetime.now(pytz.timezone('America/Sao_Paulo')).date().isoformat()
+        }
+
+    def carregar(self) -> Optional[Dict[str, Any]]:
+        """Lê o manifesto da última execução (None se não houver ou estiver corrompido)"""
+        if not self.arquivo.exists():
+            return None
+        try:
+            with open(self.arquivo, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (json.JSONDecodeError, OSError):
+            return None
+
+    def inalterado(self, impressao: Dict[str, Any]) -> bool:
+        """Entradas, configuração e data iguais às da última execução e saídas ainda intactas"""
+        anterior = self.carregar()
+        if anterior is None or anterior.get('impressao') != impressao:
+            return False
+
+        for nome, saida in anterior.get('saidas', {}).items():
+            if _estado_arquivo(saida['caminho']) != saida['estado']:
+                self.logger.info(f"🔄 Saída '{nome}' alterada ou ausente desde a última execução")
+                return False
+        return True
+
+    def registrar(self, impressao: Dict[str, Any], saidas: Dict[str, Caminho], linhas: Dict[str, int]) -> Dict[str, Any]:
+        """Grava o manifesto da execução concluída (substituição atômica)"""
+        manifesto = {
+            'impressao': impressao,
+            'saidas': {
+                nome: {'caminho': str(caminho), 'estado': _estado_arquivo(caminho)}
+                for nome, caminho in saidas.items()
+            },
+            'linhas': {nome: int(total) for nome, total in linhas.items()},
+            'executado_em': datetime.now().isoformat(timespec='seconds')
+        }
+
+        gravar_atomico(self.arquivo, manifesto)
+
+        self.logger.info(f"🧾 Manifesto da execução gravado: {self.arquivo.name}")
+        return manifesto
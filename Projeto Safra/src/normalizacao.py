@@ -0,0 +1,65 @@
+import pandas as pd
+import numpy as np
+import unicodedata
+from functools import lru_cache
+from typing import Any, Callable
+
+# Limite do memo: providers e polos distintos são algumas centenas
+TAMANHO_MEMO = 4096
+
+
+def remover_acentos(texto: Any) -> str:
+    """Remove acentos de uma string usando normalização Unicode"""
+    if pd.isna(texto):
+        return ""
+    return _remover_acentos_texto(str(texto))
+
+
+@lru_cache(maxsize=TAMANHO_MEMO)
+def _remover_acentos_texto(texto: str) -> str:
+    return unicodedata.normalize('NFD', texto).encode('ascii', 'ignore').decode('ascii')
+
+
+@lru_cache(maxsize=TAMANHO_MEMO)
+def _normalizar_provider_texto(texto: str) -> str:
+    provider_str = texto.strip().upper()
+    if provider_str.startswith('POLO '):
+        provider_str = provider_str[5:]
+    return _remover_acentos_texto(provider_str)
+
+
+@lru_cache(maxsize=TAMANHO_MEMO)
+def _normalizar_polo_sap_texto(texto: str) -> str:
+    return _remover_acentos_texto(texto.strip().upper())
+
+
+def normalizar_provider(provider: Any) -> str:
+    """Normaliza o nome do provider removendo o prefixo 'POLO ' e acentos"""
+    if pd.isna(provider):
+        return ""
+    return _normalizar_provider_texto(str(provider))
+
+
+def normalizar_polo_sap(polo_sap: Any) -> str:
+    """Normaliza o nome do polo SAP removendo acentos"""
+    if pd.isna(polo_sap):
+        return ""
+    return _normalizar_polo_sap_texto(str(polo_sap))
+
+
+def normalizar_serie(serie: pd.Series, normalizador: Callable[[Any], str]) -> pd.Series:
+    """Normaliza apenas os valores distintos da série e devolve o resultado pelos códigos"""
+    codigos, unicos = pd.factorize(serie)
+    # Código -1 (nulo) aponta para o último elemento: string vazia
+    normalizados = np.array([normalizador(valor) for valor in unicos] + [""], dtype=object)
+    return pd.Series(normalizados[codigos], index=serie.index, name=serie.name)
+
+
+def normalizar_providers(serie: pd.Series) -> pd.Series:
+    """Versão vetorizada de normalizar_provider para uma coluna inteira"""
+    return normalizar_serie(serie, normalizar_provider)
+
+
+def normalizar_polos_sap(serie: pd.Series) -> pd.Series:
+    """Versão vetorizada de normalizar_polo_sap para uma coluna inteira"""
+    return normalizar_serie(serie, normalizar_polo_sap)
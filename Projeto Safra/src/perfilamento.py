@@ -0,0 +1,114 @@
+import cProfile
+import io
+import logging
+import pstats
+import sys
+import tracemalloc
+from contextlib import ExitStack
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+sys.path.append(str(Path(__file__).parent.parent))
+from src.instrumentacao import BYTES_POR_MB, maiores_alocacoes, observar_etapas
+
+TOP_FUNCOES = 40          # linhas do resumo do cProfile
+TOP_ALOCACOES = 25        # locais de alocação no resumo final do tracemalloc
+QUADROS_TRACEMALLOC = 1   # só o local da alocação: mais quadros deixam a execução bem mais lenta
+
+
+class PerfilExecucao:
+    """
+    Perfilamento opcional de uma execução (main.py --profile / --trace-memory)
+
+    --profile grava o .prof do cProfile e um resumo por tempo acumulado; --trace-memory grava
+    os locais que mais alocaram em cada etapa medida pelo MonitorEtapas e ao final da execução
+    """
+
+    def __init__(self, diretorio: Union[str, Path], perfilar: bool = False, rastrear_memoria: bool = False,
+                 top_funcoes: int = TOP_FUNCOES):
+        self.diretorio = Path(diretorio)
+        self.perfilar = perfilar
+        self.rastrear_memoria = rastrear_memoria
+        self.top_funcoes = top_funcoes
+        self.carimbo = datetime.now().strftime('%Y%m%d_%H%M%S')
+        self.etapas: List[Dict[str, Any]] = []
+        self.arquivos: Dict[str, Path] = {}
+        self.logger = logging.getLogger(__name__)
+        self._perfil: Optional[cProfile.Profile] = None
+        self._pilha = ExitStack()
+
+    def __enter__(self) -> 'PerfilExecucao':
+        if self.rastrear_memoria:
+            tracemalloc.start(QUADROS_TRACEMALLOC)
+            self._pilha.enter_context(observar_etapas(self.etapas.append))
+        if self.perfilar:
+            self._perfil = cProfile.Profile()
+            self._perfil.enable()
+        return self
+
+    def __exit__(self, *excecao: Any) -> bool:
+        # Os relatórios são gravados mesmo quando a execução falha: é quando mais se precisa deles
+        if self._perfil is not None:
+            self._perfil.disable()
+            self._gravar_perfil()
+        if self.rastrear_memoria:
+            self._pilha.close()
+            self._gravar_memoria()
+            tracemalloc.stop()
+        return False
+
+    def _caminho(self, prefixo: str, extensao: str) -> Path:
+        self.diretorio.mkdir(parents=True, exist_ok=True)
+        return self.diretorio / f"{prefixo}_{self.carimbo}.{extensao}"
+
+    def _gravar_perfil(self) -> None:
+        """Grava o .prof (abre no snakeviz/pstats) e o resumo por tempo acumulado e por tempo próprio"""
+        arquivo_prof = self._caminho('perfil', 'prof')
+        self._perfil.dump_stats(arquivo_prof)
+
+        resumo = io.StringIO()
+        estatisticas = pstats.Stats(self._perfil, stream=resumo).strip_dirs()
+        resumo.write(f"Perfil da execução {self.carimbo} - top {self.top_funcoes} por tempo acumulado\n")
+        estatisticas.sort_stats('cumulative').print_stats(self.top_funcoes)
+        resumo.write(f"\nTop {self.top_funcoes} por tempo próprio\n")
+        estatisticas.sort_stats('tottime').print_stats(self.top_funcoes)
+
+        arquivo_txt = self._caminho('perfil', 'txt')
+        arquivo_txt.write_text(resumo.getvalue(), encoding='utf-8')
+        self.arquivos.update(perfil=arquivo_prof, resumo_perfil=arquivo_txt)
+        self.logger.info(f"🔬 Perfil gravado: {arquivo_prof.name} (resumo em {arquivo_txt.name})")
+
+    def _gravar_memoria(self) -> None:
+        """Grava os maiores locais de alocação por etapa e os ainda vivos ao final da execução"""
+        atual, pico = tracemalloc.get_traced_memory()
+        # Cada etapa zera o pico do tracemalloc: o pico da execução é o maior entre os das etapas
+        pico = max([pico] + [etapa.get('tracemalloc_pico_mb', 0) * BYTES_POR_MB for etapa in self.etapas])
+        final = maiores_alocacoes(tracemalloc.take_snapshot().statistics('lineno'), TOP_ALOCACOES)
+
+        linhas = [
+            f"Rastreamento de memória da execução {self.carimbo}",
+            f"Pico rastreado: {pico / BYTES_POR_MB:,.1f} MB | Ao final: {atual / BYTES_POR_MB:,.1f} MB", ""
+        ]
+        for etapa in self.etapas:
+            linhas.append(f"== Etapa {etapa['etapa']}: {etapa.get('tempo_s', 0):.2f}s | "
+                          f"pico rastreado {etapa.get('tracemalloc_pico_mb', '-')} MB | "
+                          f"linhas {etapa.get('linhas_entrada')} → {etapa.get('linhas_saida')} ==")
+            linhas += [_formatar_alocacao(alocacao, sinal=True) for alocacao in etapa.get('alocacoes', [])]
+            linhas.append("")
+        if not self.etapas:
+            linhas += ["(nenhuma etapa medida pelo MonitorEtapas nesta execução)", ""]
+
+        linhas.append(f"== Top {TOP_ALOCACOES} locais com memória ainda alocada ao final ==")
+        linhas += [_formatar_alocacao(alocacao) for alocacao in final]
+
+        arquivo = self._caminho('memoria', 'txt')
+        arquivo.write_text('\n'.join(linhas) + '\n', encoding='utf-8')
+        self.arquivos['memoria'] = arquivo
+        self.logger.info(f"🧠 Rastreamento de memória gravado: {arquivo.name} (pico {pico / BYTES_POR_MB:,.1f} MB)")
+
+
+def _formatar_alocacao(alocacao: Dict[str, Any], sinal: bool = False) -> str:
+    """Linha do relatório de memória (com sinal quando é a variação dentro de uma etapa)"""
+    formato_kb, formato_blocos = ('>+14,.1f', '>+10,') if sinal else ('>14,.1f', '>10,')
+    return f"  {alocacao['kb']:{formato_kb}} KB  {alocacao['blocos']:{formato_blocos}} blocos  {alocacao['local']}"
@@ -0,0 +1,152 @@
+import logging
+import sys
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+sys.path.append(str(Path(__file__).parent.parent))
+from config.settings import config
+from src.cache_ingestao import obter_cache
+from src.normalizacao import normalizar_providers, normalizar_polos_sap
+from src.utils import gravar_atomico
+
+Caminho = Union[str, Path]
+
+DIRETORIO_SNAPSHOTS = "snapshots"
+SLA_ATRASO = 2  # SLA Cliente a partir do qual a ordem conta como em atraso (mesma regra de calcular_metricas_safra)
+COLUNAS_CHAVE_SNAPSHOT = ['Ordem PagBank', 'Provider', 'Lider', 'SLA Cliente']
+CHAVE_TOTAL = 'TODOS'
+METRICAS_VAZIAS = {'total_em_aberto': 0, 'em_atraso': 0, 'perc_atraso': 0.0, 'sla_medio': 0.0}
+
+
+def associar_lideres(df: pd.DataFrame, df_map: pd.DataFrame) -> pd.DataFrame:
+    """Acrescenta a coluna Lider pelo mesmo join Provider normalizado x 'Polo + SAP' do dashboard"""
+    mapa = df_map[['Polo + SAP', 'Líder PagResolve']].copy()
+    mapa['Polo_SAP_Normalizado'] = normalizar_polos_sap(mapa['Polo + SAP'])
+    return df.assign(Provider_Normalizado=normalizar_providers(df['Provider'])).merge(
+        mapa[['Polo_SAP_Normalizado', 'Líder PagResolve']],
+        left_on='Provider_Normalizado',
+        right_on='Polo_SAP_Normalizado',
+        how='left'
+    ).rename(columns={'Líder PagResolve': 'Lider'}).drop(columns=['Provider_Normalizado', 'Polo_SAP_Normalizado'])
+
+
+def calcular_agregados(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Somas por nível (total, líder e polo) das quais saem as métricas do dashboard: total em aberto,
+    em atraso e soma/quantidade de SLA válido (o % e a média são derivados na leitura)
+    """
+    sla = pd.to_numeric(df['SLA Cliente'], errors='coerce') if 'SLA Cliente' in df.columns \
+        else pd.Series(float('nan'), index=df.index)
+    base = pd.DataFrame({
+        'total_em_aberto': 1,
+        'em_atraso': (sla >= SLA_ATRASO).astype('int64'),
+        'qtd_sla': sla.notna().astype('int64'),
+        'soma_sla': sla.fillna(0)
+    }, index=df.index)
+
+    partes = [base.sum().to_frame().T.assign(nivel='total', chave=CHAVE_TOTAL)]
+    for nivel, coluna in (('lider', 'Lider'), ('polo', 'Provider')):
+        if coluna in df.columns:
+            grupos = base.groupby(df[coluna].astype('string'), observed=True, dropna=True).sum()
+            partes.append(grupos.rename_axis('chave').reset_index().assign(nivel=nivel))
+
+    agregados = pd.concat(partes, ignore_index=True)
+    agregados[['total_em_aberto', 'em_atraso', 'qtd_sla']] = agregados[
+        ['total_em_aberto', 'em_atraso', 'qtd_sla']].astype('int64')
+    agregados['soma_sla'] = agregados['soma_sla'].astype('float64')
+    return agregados[['nivel', 'chave', 'total_em_aberto', 'em_atraso', 'qtd_sla', 'soma_sla']]
+
+
+def metricas_de_agregado(linha: Dict[str, Any]) -> Dict[str, float]:
+    """Métricas no formato de calcular_metricas_safra a partir de uma linha de agregados"""
+    total, qtd_sla = int(linha['total_em_aberto']), int(linha['qtd_sla'])
+    if total == 0:
+        return dict(METRICAS_VAZIAS)
+    em_atraso = int(linha['em_atraso']) if qtd_sla else 0
+    return {
+        'total_em_aberto': total,
+        'em_atraso': em_atraso,
+        'perc_atraso': round(em_atraso / total * 100, 1),
+        'sla_medio': round(linha['soma_sla'] / qtd_sla, 1) if qtd_sla else 0.0
+    }
+
+
+class SnapshotsDiarios:
+    """
+    Snapshot compacto de cada dia publicado: colunas-chave das ordens (chaves_<data>.parquet) e os
+    agregados por líder e por polo (agregados_<data>.parquet). O comparativo do dashboard lê só duas
+    linhas de agregados, para quaisquer duas datas, sem reabrir o relatório bruto de outro dia.
+    """
+
+    def __init__(self, diretorio: Caminho):
+        self.diretorio = Path(diretorio)
+        self.logger = logging.getLogger(__name__)
+
+    def _caminho(self, tipo: str, data: Union[str, date]) -> Path:
+        return self.diretorio / f"{tipo}_{pd.Timestamp(data).date().isoformat()}.parquet"
+
+    def registrar(self, df: pd.DataFrame, data: Union[str, date],
+                  df_map: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+        """
+        Grava (ou substitui, numa nova rodada do mesmo dia) o snapshot da data. As ordens dos
+        providers excluídos ficam de fora, como no dashboard; sem mapeamento não há agregados por líder.
+        """
+        df = df[~df['Provider'].isin(config.PROVIDERS_EXCLUIDOS)] if 'Provider' in df.columns else df
+        if df_map is not None and not df_map.empty and 'Provider' in df.columns:
+            df = associar_lideres(df, df_map)
+
+        chaves = df[[coluna for coluna in COLUNAS_CHAVE_SNAPSHOT if coluna in df.columns]].copy()
+        for coluna in ('Provider', 'Lider'):
+            if coluna in chaves.columns:
+                chaves[coluna] = chaves[coluna].astype('string').astype('category')
+        if 'SLA Cliente' in chaves.columns:
+            chaves['SLA Cliente'] = pd.to_numeric(chaves['SLA Cliente'], errors='coerce').astype('Int32')
+
+        agregados = calcular_agregados(df)
+        gravar_atomico(self._caminho('chaves', data), chaves)
+        gravar_atomico(self._caminho('agregados', data), agregados)
+
+        self.logger.info(f"📸 Snapshot de {pd.Timestamp(data).date().isoformat()}: {len(chaves):,} ordens, "
+                         f"{len(agregados):,} agregados")
+        return agregados
+
+    def datas(self) -> List[str]:
+        """Datas com snapshot, da mais recente para a mais antiga"""
+        if not self.diretorio.exists():
+            return []
+        return sorted((arquivo.stem[len('agregados_'):] for arquivo in self.diretorio.glob('agregados_*.parquet')),
+                      reverse=True)
+
+    def existe(self, data: Union[str, date]) -> bool:
+        return self._caminho('agregados', data).exists()
+
+    def metricas(self, data: Union[str, date], lider: Optional[str] = None,
+                 polo: Optional[str] = None) -> Optional[Dict[str, float]]:
+        """
+        Métricas de uma data para o total, um líder ou um polo (None se a data não tiver snapshot).
+        Um líder ou polo sem ordens na data tem métricas zeradas.
+        """
+        caminho = self._caminho('agregados', data)
+        if not caminho.exists():
+            return None
+        nivel, chave = ('polo', polo) if polo is not None else \
+            ('lider', lider) if lider not in (None, CHAVE_TOTAL) else ('total', CHAVE_TOTAL)
+        linhas = pq.read_table(caminho, filters=[('nivel', '=', nivel), ('chave', '=', str(chave))]).to_pylist()
+        return metricas_de_agregado(linhas[0]) if linhas else dict(METRICAS_VAZIAS)
+
+    def chaves(self, data: Union[str, date]) -> pd.DataFrame:
+        """Colunas-chave das ordens de uma data (vazio se não houver snapshot)"""
+        caminho = self._caminho('chaves', data)
+        return pd.read_parquet(caminho) if caminho.exists() else pd.DataFrame(columns=COLUNAS_CHAVE_SNAPSHOT)
+
+
+def carregar_mapeamento_lideres(arquivo: Optional[Caminho] = None) -> Optional[pd.DataFrame]:
+    """Mapeamento Polo + SAP -> Líder (None se o arquivo não existir)"""
+    arquivo = Path(arquivo) if arquivo is not None else config.INPUT_DIR / config.ARQUIVO_MAPEAMENTO
+    if not arquivo.exists():
+        return None
+    return obter_cache(config.CACHE_DIR).ler_excel(arquivo)
@@ -0,0 +1,145 @@
+import pandas as pd
+import logging
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+sys.path.append(str(Path(__file__).parent.parent))
+from src.instrumentacao import MonitorEtapas, medir_etapa
+
+CHAVE_PADRAO = 'Ordem PagBank'
+
+
+def normalizar_chave(serie: pd.Series) -> pd.Series:
+    """Converte a chave para inteiro anulável (textos como '123.0' também são aceitos)"""
+    if serie.dtype == 'Int64':
+        return serie
+    return pd.to_numeric(serie, errors='coerce').astype('Int64')
+
+
+def upsert_ordens(base_historica: pd.DataFrame, relatorio: pd.DataFrame,
+                  colunas_atualizar: List[str], colunas_feedback: List[str],
+                  chave: str = CHAVE_PADRAO,
+                  monitor: Optional[MonitorEtapas] = None) -> Tuple[pd.DataFrame, Dict[str, int]]:
+    """
+    Aplica o relatório diário sobre a base histórica pela chave inteira (lógica das três caixas)
+
+    Caixa 1: só no histórico (mantidas), Caixa 2: só no diário (inseridas),
+    Caixa 3: em ambos (COLUNAS_ATUALIZAR vêm do diário, COLUNAS_FEEDBACK e demais do histórico).
+    Com monitor, a separação das caixas e o merge da Caixa 3 são medidos como etapas.
+    """
+    logger = logging.getLogger(__name__)
+
+    with medir_etapa(monitor, 'tres_caixas', len(base_historica) + len(relatorio)) as etapa:
+        base = base_historica.copy()
+        diario = relatorio.copy()
+        base[chave] = normalizar_chave(base[chave])
+        diario[chave] = normalizar_chave(diario[chave])
+
+        # Chaves repetidas no diário: vale a primeira ocorrência (mesmo critério da validação final)
+        duplicadas = diario[chave].duplicated(keep='first') & diario[chave].notna()
+        if duplicadas.any():
+            logger.warning(f"⚠️ {int(duplicadas.sum()):,} chaves duplicadas no relatório diário - mantendo a primeira")
+            diario = diario[~duplicadas]
+
+        # Índice do diário pela chave: uma única busca posiciona cada ordem do histórico
+        com_chave = diario[chave].notna().to_numpy()
+        diario_indexado = diario[com_chave]
+        posicoes = pd.Index(diario_indexado[chave]).get_indexer(base[chave])
+        em_ambos = posicoes >= 0
+
+        # CAIXA 1: só no histórico
+        caixa1 = base[~em_ambos]
+
+        # CAIXA 2: só no diário (chaves nulas nunca casam e entram como novas)
+        novas = ~diario[chave].isin(base[chave].dropna()).to_numpy()
+        caixa2 = diario[novas]
+        etapa['linhas_saida'] = len(caixa1) + len(caixa2) + int(em_ambos.sum())
+
+    # CAIXA 3: em ambos - atualização alinhada em uma única atribuição
+    with medir_etapa(monitor, 'merge_caixa3', int(em_ambos.sum())) as etapa:
+        caixa3 = base[em_ambos].copy()
+        colunas_update = [
+            col for col in colunas_atualizar
+            if col in caixa3.columns and col in diario.columns and col not in colunas_feedback and col != chave
+        ]
+        if colunas_update and not caixa3.empty:
+            atualizacoes = diario_indexado[colunas_update].iloc[posicoes[em_ambos]]
+            caixa3[colunas_update] = atualizacoes.set_axis(caixa3.index)
+        etapa['linhas_saida'] = len(caixa3)
+
+    contagens = {
+        'caixa1_historico': len(caixa1),
+        'caixa2_novas': len(caixa2),
+        'caixa3_atualizadas': len(caixa3),
+        'duplicadas_diario': int(duplicadas.sum())
+    }
+    logger.info(f"   📦 Caixa 1 (só no histórico): {contagens['caixa1_historico']:,}")
+    logger.info(f"   📦 Caixa 2 (novas ordens): {contagens['caixa2_novas']:,}")
+    logger.info(f"   📦 Caixa 3 (atualizadas): {contagens['caixa3_atualizadas']:,}")
+    logger.info(f"   📊 Colunas atualizadas: {len(colunas_update)} ({', '.join(colunas_update[:5])}...)")
+
+    caixas = [df for df in [caixa1, caixa2, caixa3] if not df.empty]
+    if not caixas:
+        raise ValueError("Nenhum dado válido para combinar!")
+
+    # concat alinha as colunas e preenche as ausentes com nulo
+    resultado = pd.concat(caixas, ignore_index=True)
+    return resultado, contagens
+
+
+def _valores_diferentes(atual: pd.Series, novo: pd.Series) -> pd.Series:
+    """Compara duas colunas valor a valor (nulos e textos vazios são iguais entre si; datas pelo instante)"""
+    if pd.api.types.is_datetime64_any_dtype(atual) or pd.api.types.is_datetime64_any_dtype(novo):
+        atual = pd.to_datetime(atual, errors='coerce', dayfirst=True)
+        novo = pd.to_datetime(novo, errors='coerce', dayfirst=True)
+    else:
+        atual = atual.astype(object).astype('string').str.strip().replace('', pd.NA)
+        novo = novo.astype(object).astype('string').str.strip().replace('', pd.NA)
+    iguais = (atual == novo).fillna(False) | (atual.isna() & novo.isna())
+    return ~iguais.astype(bool)
+
+
+def diferencas_por_chave(atual: pd.DataFrame, novo: pd.DataFrame, colunas: List[str],
+                         chave: str = CHAVE_PADRAO) -> pd.DataFrame:
+    """
+    Linhas de novo cujas colunas diferem das de atual para a mesma chave (chaves que só existem em
+    novo são ignoradas; na repetida vale a primeira ocorrência). Devolve a chave, as colunas de novo
+    e as demais colunas de atual
+    """
+    novo = novo.assign(**{chave: normalizar_chave(novo[chave])})
+    novo = novo[novo[chave].notna() & ~novo[chave].duplicated(keep='first')]
+    atual = atual.assign(**{chave: normalizar_chave(atual[chave])})
+    colunas = [col for col in colunas if col in novo.columns and col != chave]
+
+    posicoes = pd.Index(novo[chave]).get_indexer(atual[chave])
+    em_ambos = posicoes >= 0
+    comparado = novo[[chave] + colunas].iloc[posicoes[em_ambos]].reset_index(drop=True)
+    referencia = atual[em_ambos].reset_index(drop=True)
+
+    diferente = pd.Series(False, index=comparado.index)
+    for col in colunas:
+        valores_atuais = referencia[col] if col in referencia.columns else pd.Series(pd.NA, index=referencia.index)
+        diferente |= _valores_diferentes(valores_atuais, comparado[col])
+
+    extras = referencia.drop(columns=[chave] + colunas, errors='ignore')
+    return pd.concat([comparado, extras], axis=1)[diferente.to_numpy()].reset_index(drop=True)
+
+
+def sobrepor_por_chave(base: pd.DataFrame, valores: pd.DataFrame, chave: str = CHAVE_PADRAO) -> pd.DataFrame:
+    """Substitui, nas linhas de base com chave presente em valores, as demais colunas de valores"""
+    base = base.copy()
+    valores = valores.assign(**{chave: normalizar_chave(valores[chave])}).drop_duplicates(subset=[chave])
+    posicoes = pd.Index(valores[chave]).get_indexer(normalizar_chave(base[chave]))
+    alvo = posicoes >= 0
+    if not alvo.any():
+        return base
+
+    for col in valores.columns.drop(chave):
+        if col not in base.columns:
+            base[col] = pd.Series(pd.NA, index=base.index, dtype=object)
+        elif isinstance(base[col].dtype, pd.CategoricalDtype):
+            # O valor novo pode não estar entre as categorias; a tipagem é refeita depois
+            base[col] = base[col].astype(object)
+        base.loc[alvo, col] = valores[col].iloc[posicoes[alvo]].to_numpy()
+    return base
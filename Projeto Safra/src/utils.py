@@ -1,10 +1,30 @@
 import pandas as pd
 import numpy as np
+import json
 import logging
-from typing import Dict, List, Any, Optional
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Any, Iterator, Optional, Tuple, Union
 from pathlib import Path
 from datetime import datetime
 import pytz
+from pandas.api.types import union_categoricals
+
+# Texto livre armazenado em Arrow (preservado no Parquet)
+TIPO_TEXTO = 'string[pyarrow]'
+
+# Marcadores de erro/vazio do Excel tratados como nulo (comparados após o strip)
+VALORES_PROBLEMATICOS = ['#N/D', '#REF!', '#VALOR!', 'N/A', 'n/a', '', 'nan']
+
+# Formatos candidatos para as colunas de data (o dominante é detectado por coluna)
+FORMATOS_DATA = ['%d/%m/%Y', '%d/%m/%Y %H:%M:%S', '%d/%m/%Y %H:%M', '%Y-%m-%d', '%Y-%m-%d %H:%M:%S']
+AMOSTRA_DETECCAO_FORMATO = 200
+CAMINHOS_DATA = ['datetime', 'formato', 'inferencia', 'invalidas']
+
+# Trava entre processos (ETL e sessões do dashboard compartilham caches e armazéns em disco)
+ESPERA_TRAVA_S = 60
+TRAVA_EXPIRADA_S = 600   # trava mais velha que isso é de um processo que morreu sem liberá-la
 
 def setup_logging(log_path: str) -> None:
     """Configura o sistema de logging"""
@@ -20,6 +40,78 @@ def setup_logging(log_path: str) -> None:
         ]
     )
 
+@contextmanager
+def travar_arquivo(trava: Path, espera_s: float = ESPERA_TRAVA_S) -> Iterator[None]:
+    """
+    Exclusão mútua entre processos: o arquivo de trava é criado com O_EXCL e apagado ao sair do bloco.
+    Uma trava abandonada (processo que morreu) é removida depois de TRAVA_EXPIRADA_S.
+    """
+    trava = Path(trava)
+    trava.parent.mkdir(parents=True, exist_ok=True)
+    limite = time.monotonic() + espera_s
+    while True:
+        try:
+            descritor = os.open(trava, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - trava.stat().st_mtime > TRAVA_EXPIRADA_S:
+                    logging.warning(f"⚠️ Trava expirada removida: {trava}")
+                    trava.unlink()
+                    continue
+            except FileNotFoundError:
+                continue
+            if time.monotonic() > limite:
+                raise TimeoutError(f"{trava.parent} em uso por outro processo ({trava})")
+            time.sleep(0.1)
+    try:
+        os.write(descritor, str(os.getpid()).encode('ascii'))
+        os.close(descritor)
+        yield
+    finally:
+        trava.unlink(missing_ok=True)
+
+@contextmanager
+def arquivo_temporario(destino: Path) -> Iterator[Path]:
+    """
+    Caminho temporário ao lado do destino; ao sair do bloco sem erro, substitui o destino de forma
+    atômica (quem lê vê a versão anterior ou a nova, nunca uma gravação pela metade)
+    """
+    destino = Path(destino)
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    temporario = destino.with_name(f".{destino.name}.{os.getpid()}.tmp")
+    try:
+        yield temporario
+        os.replace(temporario, destino)
+    finally:
+        temporario.unlink(missing_ok=True)
+
+def gravar_atomico(destino: Path, conteudo: Union[pd.DataFrame, Dict[str, Any], List[Any]]) -> None:
+    """Grava Parquet (DataFrame) ou JSON em arquivo temporário e substitui de forma atômica"""
+    with arquivo_temporario(destino) as temporario:
+        if isinstance(conteudo, pd.DataFrame):
+            conteudo.to_parquet(temporario, index=False)
+        else:
+            with open(temporario, 'w', encoding='utf-8') as f:
+                json.dump(conteudo, f, ensure_ascii=False, indent=2)
+
+def calcular_dias_em_aberto_vetorizado(serie: pd.Series, hoje: Optional[datetime] = None) -> pd.Series:
+    """Calcula dias em aberto de uma coluna inteira com a data atual de Brasília obtida uma única vez"""
+    if hoje is None:
+        hoje = datetime.now(pytz.timezone('America/Sao_Paulo'))
+    hoje = pd.Timestamp(hoje.date() if isinstance(hoje, datetime) else hoje)
+
+    datas = pd.to_datetime(serie, errors='coerce', dayfirst=True)
+    # Formatos mistos: reprocessa só o que falhou na inferência do formato
+    falhas = datas.isna() & serie.notna()
+    if falhas.any() and datas.dt.tz is None:
+        datas[falhas] = pd.to_datetime(serie[falhas], errors='coerce', dayfirst=True, format='mixed')
+    if datas.dt.tz is not None:
+        datas = datas.dt.tz_convert('America/Sao_Paulo').dt.tz_localize(None)
+
+    dias = (hoje - datas.dt.normalize()).dt.days
+    return dias.clip(lower=0).astype('Int64')
+
 def calcular_dias_em_aberto(data_status):
     """
     Calcula dias em aberto usando data atual de Brasília
@@ -50,44 +142,176 @@ def calcular_dias_em_aberto(data_status):
         return None
 
 def limpar_dados_problematicos(df: pd.DataFrame) -> pd.DataFrame:
-    """Remove valores problemáticos antes da conversão"""
+    """Remove valores problemáticos e espaços extras em uma passada, só nas colunas de texto"""
+    
+    df_limpo = df.copy(deep=False)
+    for col in df.columns[[_coluna_texto(tipo) for tipo in df.dtypes]]:
+        df_limpo[col] = _limpar_coluna_texto(df[col])
+    
+    return df_limpo
+
+def _coluna_texto(tipo) -> bool:
+    """Colunas que podem conter células de texto (numéricas e datas são puladas)"""
+    return tipo == object or isinstance(tipo, (pd.StringDtype, pd.CategoricalDtype))
+
+def _limpar_coluna_texto(serie: pd.Series) -> pd.Series:
+    """Strip + troca dos marcadores por nulo; células não-texto ficam intactas (sem astype(str))"""
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        if not _coluna_texto(serie.cat.categories.dtype):
+            return serie
+        # Limpa só as categorias e remapeia os códigos (categorias iguais após o strip são fundidas)
+        categorias = _limpar_coluna_texto(pd.Series(serie.cat.categories))
+        mapa_codigos, unicas = pd.factorize(categorias)
+        codigos = np.append(mapa_codigos, -1)[serie.cat.codes.to_numpy()]
+        return pd.Series(pd.Categorical.from_codes(codigos, unicas, ordered=serie.cat.ordered),
+                         index=serie.index, name=serie.name)
+    
+    if serie.dtype == object and pd.api.types.infer_dtype(serie, skipna=True) not in ('string', 'mixed', 'mixed-integer'):
+        return serie
+    
+    texto = serie.str.strip()
+    # Em colunas object mistas o .str devolve nulo para números/datas: esses valores são mantidos
+    limpa = serie.where(texto.isna(), texto) if serie.dtype == object else texto
+    return limpa.mask(texto.isin(VALORES_PROBLEMATICOS))
+
+def montar_colunas_leitura(tipos_map: Dict, *grupos_colunas: List[str]) -> List[str]:
+    """Lista, sem repetição, das colunas usadas pelo pipeline (grupos + colunas tipadas)"""
+    colunas = [col for grupo in grupos_colunas for col in grupo]
+    colunas += [col for grupo in tipos_map.values() for col in grupo]
+    return list(dict.fromkeys(colunas))
+
+def detectar_formato_data(textos: pd.Series, formatos: List[str]) -> Optional[str]:
+    """Formato que converte mais valores de uma amostra da coluna (None se nenhum servir)"""
+    amostra = textos.head(AMOSTRA_DETECCAO_FORMATO)
+    acertos = {fmt: pd.to_datetime(amostra, format=fmt, errors='coerce').notna().sum() for fmt in formatos}
+    melhor = max(acertos, key=acertos.get) if acertos else None
+    return melhor if melhor is not None and acertos[melhor] > 0 else None
+
+def converter_datas(serie: pd.Series, formato_preferido: Optional[str] = None) -> Tuple[pd.Series, Dict[str, int]]:
+    """
+    Converte uma coluna de datas processando só os valores distintos: datetimes diretos,
+    textos pelo formato dominante e apenas as sobras pela inferência lenta (dayfirst).
+    Retorna a série convertida e quantas células passaram por cada caminho.
+    """
+    contagens = dict.fromkeys(CAMINHOS_DATA, 0)
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie, contagens
+    if not _coluna_texto(serie.dtype):
+        # Numéricas (ex.: colunas vazias lidas como float) seguem a conversão padrão
+        datas = pd.to_datetime(serie, errors='coerce')
+        contagens['datetime'] = int(datas.notna().sum())
+        return datas, contagens
     
-    # Substituir valores problemáticos por NaN
-    valores_problematicos = ['#N/D', '#REF!', '#VALOR!', 'N/A', 'n/a', '', ' ', 'nan']
+    codigos, unicos = pd.factorize(serie)
+    unicos = pd.Series(unicos, dtype=object)
+    convertidos = pd.Series(pd.NaT, index=unicos.index, dtype='datetime64[us]')
+    caminhos = np.full(len(unicos), CAMINHOS_DATA.index('invalidas'))
     
-    df_limpo = df.replace(valores_problematicos, np.nan)
+    eh_texto = unicos.map(lambda valor: isinstance(valor, str)).astype(bool)
+    if (~eh_texto).any():
+        convertidos[~eh_texto] = pd.to_datetime(unicos[~eh_texto], errors='coerce')
+        caminhos[(~eh_texto & convertidos.notna()).to_numpy()] = CAMINHOS_DATA.index('datetime')
     
-    # Remover espaços em branco extras
-    for col in df_limpo.select_dtypes(include=['object']).columns:
-        df_limpo[col] = df_limpo[col].astype(str).str.strip()
-        df_limpo[col] = df_limpo[col].replace('nan', np.nan)
+    # Formato dominante primeiro; as sobras ainda tentam os demais formatos explícitos
+    sobras = unicos[eh_texto].str.strip()
+    formatos = list(dict.fromkeys([formato_preferido] + FORMATOS_DATA)) if formato_preferido else FORMATOS_DATA
+    while len(sobras):
+        formato = detectar_formato_data(sobras, formatos)
+        if formato is None:
+            break
+        formatos = [fmt for fmt in formatos if fmt != formato]
+        convertidos[sobras.index] = pd.to_datetime(sobras, format=formato, errors='coerce')
+        caminhos[sobras.index[convertidos[sobras.index].notna()]] = CAMINHOS_DATA.index('formato')
+        sobras = sobras[convertidos[sobras.index].isna()]
     
-    return df_limpo
+    # O que não casou com nenhum formato vai para o caminho lento, ainda só sobre valores distintos
+    if len(sobras):
+        convertidos[sobras.index] = pd.to_datetime(sobras, errors='coerce', dayfirst=True, format='mixed')
+        caminhos[sobras.index[convertidos[sobras.index].notna()]] = CAMINHOS_DATA.index('inferencia')
+    
+    validos = codigos >= 0
+    for caminho, total in zip(CAMINHOS_DATA, np.bincount(caminhos[codigos[validos]], minlength=len(CAMINHOS_DATA))):
+        contagens[caminho] = int(total)
+    
+    valores = np.append(convertidos.to_numpy(), np.datetime64('NaT', 'us'))
+    return pd.Series(valores[codigos], index=serie.index, name=serie.name), contagens
 
-def converter_tipos_seguros(df: pd.DataFrame, tipos_map: Dict) -> pd.DataFrame:
+def converter_tipos_seguros(df: pd.DataFrame, tipos_map: Dict, formato_data: Optional[str] = None) -> pd.DataFrame:
     """Conversão segura de tipos com máxima performance"""
     
     df_copy = df.copy()
     
+    # Colunas já tipadas na leitura (cache de ingestão) são puladas
+    
     # Números inteiros
     for col in tipos_map['numeros_inteiros']:
-        if col in df_copy.columns:
+        if col in df_copy.columns and df_copy[col].dtype != 'Int64':
             df_copy[col] = pd.to_numeric(df_copy[col], errors='coerce').astype('Int64')
     
     # Datas
+    contagens_datas = dict.fromkeys(CAMINHOS_DATA, 0)
     for col in tipos_map['datas']:
-        if col in df_copy.columns:
-            df_copy[col] = pd.to_datetime(df_copy[col], errors='coerce', dayfirst=True)
+        if col in df_copy.columns and not pd.api.types.is_datetime64_any_dtype(df_copy[col]):
+            df_copy[col], contagens = converter_datas(df_copy[col], formato_data)
+            for caminho, total in contagens.items():
+                contagens_datas[caminho] += total
+    if any(contagens_datas.values()):
+        logging.info(f"📅 Datas: {contagens_datas['formato']:,} por formato explícito, "
+                     f"{contagens_datas['datetime']:,} já datetime, {contagens_datas['inferencia']:,} por inferência, "
+                     f"{contagens_datas['invalidas']:,} inválidas")
     
-    # Textos
+    # Categorias (texto de baixa cardinalidade)
+    for col in tipos_map.get('categorias', []):
+        if col in df_copy.columns and not isinstance(df_copy[col].dtype, pd.CategoricalDtype):
+            df_copy[col] = _converter_para_texto(df_copy[col]).astype('category')
+    
+    # Textos livres
     for col in tipos_map['textos']:
-        if col in df_copy.columns:
-            df_copy[col] = df_copy[col].astype('string')
+        if col in df_copy.columns and df_copy[col].dtype != TIPO_TEXTO:
+            df_copy[col] = _converter_para_texto(df_copy[col])
     
     return df_copy
 
-def executar_validacoes(resultado: pd.DataFrame, base_original: pd.DataFrame, relatorio: pd.DataFrame) -> None:
-    """Executa validações de integridade dos dados"""
+def _converter_para_texto(serie: pd.Series) -> pd.Series:
+    """Converte para string[pyarrow]; códigos lidos como float (ex.: Código Rastreio) não viram '123.0'"""
+    if pd.api.types.is_float_dtype(serie) and (serie.dropna() % 1 == 0).all():
+        serie = serie.astype('Int64')
+    return serie.astype(TIPO_TEXTO)
+
+def concatenar_preservando_categorias(partes: List[pd.DataFrame]) -> pd.DataFrame:
+    """Concatena partes tipadas separadamente (chunks) sem que as colunas category caiam para object"""
+    for col in partes[0].columns:
+        if all(col in parte.columns and isinstance(parte[col].dtype, pd.CategoricalDtype) for parte in partes):
+            categorias = union_categoricals([parte[col] for parte in partes]).categories
+            for parte in partes:
+                parte[col] = parte[col].cat.set_categories(categorias)
+    return pd.concat(partes, ignore_index=True)
+
+def contar_valores(serie: pd.Series) -> pd.Series:
+    """value_counts sem as categorias ausentes (em colunas category as contagens zero também aparecem)"""
+    contagem = serie.value_counts()
+    return contagem[contagem > 0]
+
+def relatorio_memoria(antes: pd.DataFrame, depois: pd.DataFrame) -> pd.DataFrame:
+    """Bytes por coluna antes e depois da tipagem (memory_usage deep), do maior consumo para o menor"""
+    relatorio = pd.DataFrame({
+        'tipo_antes': antes.dtypes.astype(str),
+        'tipo_depois': depois.dtypes.reindex(antes.columns).astype(str),
+        'bytes_antes': antes.memory_usage(deep=True, index=False),
+        'bytes_depois': depois.memory_usage(deep=True, index=False).reindex(antes.columns)
+    })
+    relatorio['reducao_pct'] = (1 - relatorio['bytes_depois'] / relatorio['bytes_antes']).mul(100).round(1)
+    relatorio = relatorio.sort_values('bytes_antes', ascending=False)
+    relatorio.loc['TOTAL'] = ['', '', relatorio['bytes_antes'].sum(), relatorio['bytes_depois'].sum(),
+                              round((1 - relatorio['bytes_depois'].sum() / relatorio['bytes_antes'].sum()) * 100, 1)]
+    return relatorio
+
+def executar_validacoes(resultado: pd.DataFrame, registros_base_original: int, relatorio: pd.DataFrame,
+                        registros_finais: Optional[int] = None) -> None:
+    """
+    Executa validações de integridade dos dados (a base original entra pelo total de registros antes da
+    execução; com registros_finais, resultado são só os registros regravados e o total vem dele)
+    """
     
     # Validação 1: Verificar duplicatas (mas não falhar)
     duplicatas = resultado['Ordem PagBank'].duplicated().sum()
@@ -97,8 +321,8 @@ def executar_validacoes(resultado: pd.DataFrame, base_original: pd.DataFrame, re
         logging.info("✅ Nenhuma duplicata encontrada na chave!")
     
     # Validação 2: Contagens
-    logging.info(f"📊 Registros finais: {len(resultado):,}")
-    logging.info(f"📊 Base original: {len(base_original):,}")
+    logging.info(f"📊 Registros finais: {len(resultado) if registros_finais is None else registros_finais:,}")
+    logging.info(f"📊 Base original: {registros_base_original:,}")
     logging.info(f"📊 Relatório diário: {len(relatorio):,}")
     
     # Validação 3: Verificar se Provider "TEFTI" foi excluído
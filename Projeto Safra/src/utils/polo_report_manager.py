@@ -3,6 +3,7 @@ import streamlit as st
 from datetime import datetime, timedelta
 import pytz
 import io
+import logging
 from pathlib import Path
 from typing import Dict, List
 import sys
@@ -10,13 +11,22 @@ import sys
 # Adicionar config ao path
 sys.path.append(str(Path(__file__).parent.parent.parent))
 from config.settings import config
+from src.classificacao import classificar_urgencia
+from src.armazenamento_sqlite import AuditoriaExportacoes
 
 class PoloReportManager:
     """Gerenciador simplificado de relatórios por polo"""
     
     def __init__(self):
         self.brasilia_tz = pytz.timezone('America/Sao_Paulo')
-        self.arquivo_historico = config.PROCESSED_DIR / "historico_exportacoes.parquet"
+        self.logger = logging.getLogger(__name__)
+        self.auditoria = AuditoriaExportacoes(config.PROCESSED_DIR / config.BANCO_OPERACIONAL)
+        # Histórico do formato antigo (um Parquet regravado a cada exportação) entra no banco uma única vez;
+        # se a migração falhar, o arquivo fica no lugar e a próxima sessão tenta de novo
+        try:
+            self.auditoria.importar_parquet(config.PROCESSED_DIR / "historico_exportacoes.parquet")
+        except Exception as e:
+            self.logger.warning(f"⚠️ Histórico antigo de exportações não migrado: {e}")
     
     def gerar_relatorio_por_polo(self, dados_dashboard: pd.DataFrame) -> Dict[str, pd.DataFrame]:
         """Gera relatório de ordens em aberto agrupadas por polo"""
@@ -32,14 +42,7 @@ class PoloReportManager:
         if ordens_abertas.empty:
             return {}
         
-        ordens_abertas['Nivel_Urgencia'] = ordens_abertas.apply(self._calcular_urgencia, axis=1)
-        ordens_abertas['Descricao_Urgencia'] = ordens_abertas['Nivel_Urgencia'].map({
-            5: '🔴 CRÍTICO',
-            4: '🟠 ALTO',
-            3: '🟡 MÉDIO',
-            2: '🔵 BAIXO',
-            1: '⚪ NORMAL'
-        })
+        ordens_abertas['Nivel_Urgencia'], ordens_abertas['Descricao_Urgencia'] = classificar_urgencia(ordens_abertas)
         
         relatorio_polos = {}
         
@@ -58,26 +61,6 @@ class PoloReportManager:
         
         return relatorio_polos
     
-    def _calcular_urgencia(self, row) -> int:
-        """Calcula nível de urgência (1-5)"""
-        try:
-            status_sla = row.get('Status_SLA', '')
-            dias_aberto = row.get('Dias_Em_Aberto', 0)
-            sla_cliente = row.get('SLA Cliente', 999)
-            
-            if status_sla == 'Vencido' or dias_aberto > sla_cliente:
-                return 5  # CRÍTICO
-            elif dias_aberto >= sla_cliente * 0.9:
-                return 4  # ALTO
-            elif dias_aberto >= sla_cliente * 0.7:
-                return 3  # MÉDIO
-            elif dias_aberto >= sla_cliente * 0.5:
-                return 2  # BAIXO
-            else:
-                return 1  # NORMAL
-        except:
-            return 1
-    
     def _adicionar_estatisticas_polo(self, df_polo: pd.DataFrame) -> pd.DataFrame:
         """Adiciona estatísticas resumidas do polo"""
         if df_polo.empty:
@@ -97,24 +80,10 @@ class PoloReportManager:
     
     def registrar_exportacao(self, polo_id: str, quantidade_ordens: int, 
                            formato: str, usuario: str = "dashboard_user") -> bool:
-        """Registra exportação realizada no histórico"""
+        """Registra exportação realizada no histórico (uma inserção no log de auditoria)"""
         try:
-            if self.arquivo_historico.exists():
-                historico = pd.read_parquet(self.arquivo_historico)
-            else:
-                historico = pd.DataFrame()
-            
-            novo_registro = pd.DataFrame([{
-                'data_exportacao': datetime.now(self.brasilia_tz),
-                'polo_id': polo_id,
-                'quantidade_ordens': quantidade_ordens,
-                'formato_exportacao': formato,
-                'usuario': usuario
-            }])
-            
-            historico_atualizado = pd.concat([historico, novo_registro], ignore_index=True)
-            historico_atualizado.to_parquet(self.arquivo_historico, index=False)
-            
+            self.auditoria.registrar(polo_id, quantidade_ordens, formato, usuario,
+                                     momento=datetime.now(self.brasilia_tz))
             return True
             
         except Exception as e:
@@ -122,13 +91,6 @@ class PoloReportManager:
             return False
     
     def obter_historico_exportacoes(self, dias: int = 7) -> pd.DataFrame:
-        """Obtém histórico de exportações recentes"""
-        if not self.arquivo_historico.exists():
-            return pd.DataFrame()
-        
-        historico = pd.read_parquet(self.arquivo_historico)
-        
+        """Obtém histórico de exportações recentes (consulta por período no índice de data_exportacao)"""
         data_corte = datetime.now(self.brasilia_tz) - timedelta(days=dias)
-        historico_recente = historico[historico['data_exportacao'] >= data_corte]
-        
-        return historico_recente.sort_values('data_exportacao', ascending=False)
+        return self.auditoria.consultar(data_corte)
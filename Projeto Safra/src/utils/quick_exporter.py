@@ -6,6 +6,11 @@ from typing import Dict, List, Optional
 import openpyxl
 from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
 from openpyxl.utils.dataframe import dataframe_to_rows
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from src.utils import contar_valores
 
 class QuickExporter:
     """Exportador rápido com templates otimizados e formatação avançada"""
@@ -89,9 +94,10 @@ class QuickExporter:
         dados_csv.insert(0, 'Polo', nome_polo)
         dados_csv.insert(1, 'Data_Exportacao', datetime.now().strftime('%d/%m/%Y'))
         
-        # Ordenar por urgência se disponível
+        # Ordenar por urgência se disponível (a coluna não faz parte do CSV)
         if 'Nivel_Urgencia' in dados_polo.columns:
-            dados_csv = dados_csv.sort_values('Nivel_Urgencia', ascending=False)
+            ordem = dados_polo['Nivel_Urgencia'].sort_values(ascending=False, kind='stable').index
+            dados_csv = dados_csv.loc[ordem]
         
         return dados_csv.to_csv(index=False, encoding='utf-8-sig').encode('utf-8-sig')
     
@@ -174,7 +180,7 @@ class QuickExporter:
                 {'Polo': nome_polo, 'Categoria': 'DISTRIBUIÇÃO GEOGRÁFICA', 'Métrica': '', 'Valor': ''},
             ])
             
-            dist_estados = dados_polo['Estado'].value_counts().head(10)
+            dist_estados = contar_valores(dados_polo['Estado']).head(10)
             for estado, qtd in dist_estados.items():
                 resumo_data.append({
                     'Polo': nome_polo,
@@ -235,7 +241,7 @@ class QuickExporter:
         # Distribuição por urgência
         if 'Nivel_Urgencia' in dados.columns:
             resumo.append({'Categoria': 'DISTRIBUIÇÃO POR URGÊNCIA', 'Valor': ''})
-            dist_urgencia = dados['Nivel_Urgencia'].value_counts().sort_index(ascending=False)
+            dist_urgencia = contar_valores(dados['Nivel_Urgencia']).sort_index(ascending=False)
             total_ordens = len(dados)
             
             for nivel, qtd in dist_urgencia.items():
@@ -247,7 +253,7 @@ class QuickExporter:
         # Distribuição por Status SLA
         if 'Status_SLA' in dados.columns:
             resumo.append({'Categoria': 'DISTRIBUIÇÃO POR STATUS SLA', 'Valor': ''})
-            dist_sla = dados['Status_SLA'].value_counts()
+            dist_sla = contar_valores(dados['Status_SLA'])
             total_ordens = len(dados)
             
             for status, qtd in dist_sla.items():
@@ -270,7 +276,7 @@ class QuickExporter:
         # Distribuição por Estado (Top 10)
         if 'Estado' in dados.columns:
             resumo.append({'Categoria': 'TOP 10 ESTADOS', 'Valor': ''})
-            dist_estados = dados['Estado'].value_counts().head(10)
+            dist_estados = contar_valores(dados['Estado']).head(10)
             total_ordens = len(dados)
             
             for estado, qtd in dist_estados.items():
@@ -343,7 +349,7 @@ class QuickExporter:
             # Análise por Estado
             analise.append({'Tipo': 'DISTRIBUIÇÃO POR ESTADO', 'Local': '', 'Quantidade': '', 'Percentual': '', 'Média_Dias': ''})
             
-            dist_estados = dados.groupby('Estado').agg({
+            dist_estados = dados.groupby('Estado', observed=True).agg({
                 'Ordem PagBank': 'count',
                 'Dias_Em_Aberto': 'mean'
             }).round(1)
@@ -366,7 +372,7 @@ class QuickExporter:
             analise.append({'Tipo': '', 'Local': '', 'Quantidade': '', 'Percentual': '', 'Média_Dias': ''})
             analise.append({'Tipo': 'TOP 20 CIDADES', 'Local': '', 'Quantidade': '', 'Percentual': '', 'Média_Dias': ''})
             
-            dist_cidades = dados.groupby('Cidade').agg({
+            dist_cidades = dados.groupby('Cidade', observed=True).agg({
                 'Ordem PagBank': 'count',
                 'Dias_Em_Aberto': 'mean'
             }).round(1)
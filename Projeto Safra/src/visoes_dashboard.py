@@ -0,0 +1,127 @@
+import pandas as pd
+import json
+import logging
+import shutil
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+sys.path.append(str(Path(__file__).parent.parent))
+from src.cache_ingestao import preparar_para_parquet
+from src.utils import gravar_atomico
+
+ARQUIVO_MANIFESTO = "manifest.json"
+PASTA_VERSOES = "versoes"
+VERSOES_MANTIDAS = 3
+
+COLUNAS_VISAO_FEEDBACK = [
+    'Ordem PagBank', 'Status_Tratativa', 'Feedback', 'Causa_Raiz',
+    'Data_Feedback', 'Proxima_Acao', 'Dias_Em_Aberto'
+]
+
+# Colunas lidas por calcular_visoes: o histórico é carregado só com elas (Data_Status gera Dias_Em_Aberto)
+COLUNAS_VISOES = list(dict.fromkeys(
+    COLUNAS_VISAO_FEEDBACK + ['SLA Cliente', 'Criação da Ordem', 'Região', 'Estado', 'Provider', 'Data_Status']
+))
+
+
+def calcular_visoes(df: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """Calcula as tabelas agregadas do dashboard (apenas as que têm colunas disponíveis)"""
+    visoes = {}
+
+    # Agregado por Status_Tratativa (não Status da Ordem)
+    if 'Status_Tratativa' in df.columns:
+        status = df.groupby('Status_Tratativa', observed=True).agg({
+            'Ordem PagBank': 'count',
+            'SLA Cliente': 'mean',
+            'Dias_Em_Aberto': 'mean'
+        }).reset_index()
+        status.columns = ['Status_Tratativa', 'Quantidade', 'SLA_Medio', 'Dias_Aberto_Medio']
+        visoes['status_tratativa'] = status
+
+    if 'Criação da Ordem' in df.columns:
+        mes_criacao = pd.to_datetime(df['Criação da Ordem'], errors='coerce').dt.strftime('%Y-%m')
+        visoes['temporal'] = (
+            df.groupby(mes_criacao.rename('Mes_Criacao'), observed=True).size().reset_index(name='Quantidade')
+        )
+
+    if 'Região' in df.columns and 'Estado' in df.columns:
+        visoes['regional'] = df.groupby(['Região', 'Estado'], observed=True).size().reset_index(name='Quantidade')
+
+    if 'Provider' in df.columns:
+        visoes['provider'] = df.groupby('Provider', observed=True).size().reset_index(name='Quantidade')
+
+    if all(col in df.columns for col in COLUNAS_VISAO_FEEDBACK):
+        visoes['feedback'] = df[COLUNAS_VISAO_FEEDBACK].copy()
+
+    return visoes
+
+
+def publicar_visoes(visoes: Dict[str, pd.DataFrame], diretorio: Union[str, Path]) -> Dict[str, Any]:
+    """
+    Grava as visões em uma nova versão e só então aponta o manifesto para ela, de modo que quem
+    lê pelo manifesto nunca enxerga uma versão incompleta (o detalhe é o próprio histórico particionado)
+    """
+    diretorio = Path(diretorio)
+    versao = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+    pasta_versao = diretorio / PASTA_VERSOES / versao
+    pasta_versao.mkdir(parents=True, exist_ok=True)
+
+    tabelas = {}
+    for nome, tabela in visoes.items():
+        arquivo = pasta_versao / f"{nome}.parquet"
+        preparar_para_parquet(tabela.copy()).to_parquet(arquivo, index=False)
+        tabelas[nome] = {
+            'arquivo': f"{PASTA_VERSOES}/{versao}/{arquivo.name}",
+            'linhas': len(tabela),
+            'colunas': [str(col) for col in tabela.columns]
+        }
+
+    manifesto = {
+        'versao': versao,
+        'gerado_em': datetime.now().isoformat(timespec='seconds'),
+        'tabelas': tabelas
+    }
+    gravar_atomico(diretorio / ARQUIVO_MANIFESTO, manifesto)
+
+    _remover_versoes_antigas(diretorio, versao)
+    return manifesto
+
+
+def carregar_manifesto(diretorio: Union[str, Path]) -> Optional[Dict[str, Any]]:
+    """Lê o manifesto da versão publicada (None se ainda não houver publicação)"""
+    arquivo_manifesto = Path(diretorio) / ARQUIVO_MANIFESTO
+    if not arquivo_manifesto.exists():
+        return None
+    try:
+        with open(arquivo_manifesto, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (json.JSONDecodeError, OSError):
+        return None
+
+
+def carregar_visoes(diretorio: Union[str, Path], nomes: List[str],
+                    manifesto: Optional[Dict[str, Any]] = None) -> Dict[str, pd.DataFrame]:
+    """
+    Carrega as visões pedidas da versão apontada pelo manifesto (as que não existirem, inclusive
+    por versão já removida, vêm vazias)
+    """
+    manifesto = manifesto or carregar_manifesto(diretorio)
+    tabelas = manifesto['tabelas'] if manifesto else {}
+    visoes = {}
+    for nome in nomes:
+        try:
+            visoes[nome] = pd.read_parquet(Path(diretorio) / tabelas[nome]['arquivo'])
+        except (KeyError, FileNotFoundError):
+            visoes[nome] = pd.DataFrame()
+    return visoes
+
+
+def _remover_versoes_antigas(diretorio: Path, versao_atual: str) -> None:
+    """Mantém apenas as versões mais recentes (leitores em andamento continuam válidos)"""
+    versoes = sorted(p for p in (diretorio / PASTA_VERSOES).iterdir() if p.is_dir())
+    for pasta in versoes[:-VERSOES_MANTIDAS]:
+        if pasta.name != versao_atual:
+            shutil.rmtree(pasta, ignore_errors=True)
+            logging.getLogger(__name__).info(f"🗑️ Versão antiga das visões removida: {pasta.name}")
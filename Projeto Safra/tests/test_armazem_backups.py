@@ -0,0 +1,106 @@
+import sys
+import zipfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+from src.armazem_backups import ArmazemBackups
+
+
+def gravar_xlsx(caminho: Path, planilha: str, modificado: str = '2025-01-01') -> Path:
+    """Zip com as partes de um xlsx: só a planilha e a data de modificação (parte volátil) variam"""
+    with zipfile.ZipFile(caminho, 'w', zipfile.ZIP_DEFLATED) as pacote:
+        pacote.writestr('[Content_Types].xml', '<Types/>')
+        pacote.writestr('docProps/core.xml', f'<modified>{modificado}</modified>')
+        pacote.writestr('xl/worksheets/sheet1.xml', planilha)
+    return caminho
+
+
+def conteudo_partes(caminho: Path) -> dict:
+    with zipfile.ZipFile(caminho) as pacote:
+        return {nome: pacote.read(nome) for nome in pacote.namelist()}
+
+
+@pytest.fixture
+def armazem(tmp_path):
+    return ArmazemBackups(tmp_path / 'backup')
+
+
+def test_snapshot_e_restauracao(armazem, tmp_path):
+    original = gravar_xlsx(tmp_path / 'Consolidado.xlsx', '<linhas>v1</linhas>')
+
+    snapshot = armazem.criar_snapshot(original, datetime(2025, 1, 1))
+
+    assert snapshot['carimbo'] == '20250101_000000'
+    restaurado = armazem.restaurar('20250101', tmp_path / 'restaurado.xlsx')
+    assert conteudo_partes(restaurado) == conteudo_partes(original)
+    assert armazem.verificar(snapshot['carimbo'], original)
+
+
+def test_conteudo_identico_nao_gera_snapshot(armazem, tmp_path):
+    original = gravar_xlsx(tmp_path / 'Consolidado.xlsx', '<linhas>v1</linhas>')
+    armazem.criar_snapshot(original, datetime(2025, 1, 1))
+
+    # Só a data de modificação do documento mudou
+    gravar_xlsx(original, '<linhas>v1</linhas>', modificado='2025-01-02')
+
+    assert armazem.criar_snapshot(original, datetime(2025, 1, 2)) is None
+    assert len(armazem.listar()) == 1
+
+
+def test_partes_iguais_sao_guardadas_uma_vez(armazem, tmp_path):
+    original = gravar_xlsx(tmp_path / 'Consolidado.xlsx', '<linhas>v1</linhas>')
+    armazem.criar_snapshot(original, datetime(2025, 1, 1))
+    objetos = set(armazem.pasta_objetos.glob('*/*.xz'))
+
+    gravar_xlsx(original, '<linhas>v2</linhas>', modificado='2025-01-02')
+    armazem.criar_snapshot(original, datetime(2025, 1, 2))
+
+    # Só a planilha e o core.xml novos entram no armazém
+    assert len(set(armazem.pasta_objetos.glob('*/*.xz')) - objetos) == 2
+    assert [snapshot['carimbo'] for snapshot in armazem.listar()] == ['20250101_000000', '20250102_000000']
+
+
+def test_restaura_a_versao_pedida(armazem, tmp_path):
+    original = gravar_xlsx(tmp_path / 'Consolidado.xlsx', '<linhas>v1</linhas>')
+    armazem.criar_snapshot(original, datetime(2025, 1, 1))
+    gravar_xlsx(original, '<linhas>v2</linhas>')
+    armazem.criar_snapshot(original, datetime(2025, 1, 2))
+
+    antigo = armazem.restaurar('20250101_000000', tmp_path / 'v1.xlsx')
+    ultimo = armazem.restaurar('ultimo', tmp_path / 'v2.xlsx')
+
+    assert conteudo_partes(antigo)['xl/worksheets/sheet1.xml'] == b'<linhas>v1</linhas>'
+    assert conteudo_partes(ultimo)['xl/worksheets/sheet1.xml'] == b'<linhas>v2</linhas>'
+    with pytest.raises(KeyError):
+        armazem.localizar('19990101')
+
+
+def test_podar_respeita_retencao_e_mantem_o_ultimo(armazem, tmp_path):
+    original = gravar_xlsx(tmp_path / 'Consolidado.xlsx', '<linhas>v1</linhas>')
+    for dia, versao in ((1, 'v1'), (10, 'v2'), (20, 'v3')):
+        gravar_xlsx(original, f'<linhas>{versao}</linhas>', modificado=f'2025-01-{dia:02d}')
+        armazem.criar_snapshot(original, datetime(2025, 1, dia))
+
+    resultado = armazem.podar(5, agora=datetime(2025, 1, 12))
+
+    assert resultado['snapshots_removidos'] == 1
+    assert [snapshot['carimbo'] for snapshot in armazem.listar()] == ['20250110_000000', '20250120_000000']
+    # Objetos só do snapshot removido foram apagados e os restantes continuam restauráveis
+    assert resultado['objetos_removidos'] == 2
+    restaurado = armazem.restaurar('20250110', tmp_path / 'v2.xlsx')
+    assert conteudo_partes(restaurado)['xl/worksheets/sheet1.xml'] == b'<linhas>v2</linhas>'
+
+    armazem.podar(5, agora=datetime(2025, 1, 20) + timedelta(days=365))
+    assert [snapshot['carimbo'] for snapshot in armazem.listar()] == ['20250120_000000']
+
+
+def test_arquivo_que_nao_e_zip(armazem, tmp_path):
+    original = tmp_path / 'notas.txt'
+    original.write_bytes(b'conteudo qualquer')
+
+    snapshot = armazem.criar_snapshot(original, datetime(2025, 1, 1))
+
+    assert armazem.restaurar(snapshot['carimbo'], tmp_path / 'restaurado.txt').read_bytes() == b'conteudo qualquer'
@@ -0,0 +1,101 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.append(str(Path(__file__).parent.parent))
+from src.historico_particionado import PARTICAO_SEM_DATA, HistoricoParticionado
+
+
+def criar_historico() -> pd.DataFrame:
+    """Cinco ordens em dois meses de criação e uma sem data"""
+    return pd.DataFrame({
+        'Ordem PagBank': [10, 11, 20, 21, 30],
+        'Criação da Ordem': pd.to_datetime(['2025-01-05', '2025-01-20', '2025-02-03', '2025-02-28', None]),
+        'Status da Ordem': ['Aberta'] * 5
+    })
+
+
+def test_gravar_particiona_por_mes_e_carrega_de_volta(tmp_path):
+    historico = HistoricoParticionado(tmp_path)
+
+    gravados = historico.gravar(criar_historico())
+
+    assert gravados == ['2025-01', '2025-02', PARTICAO_SEM_DATA]
+    assert historico.listar_particoes() == ['2025-01', '2025-02', PARTICAO_SEM_DATA]
+    assert sorted(historico.carregar()['Ordem PagBank'].tolist()) == [10, 11, 20, 21, 30]
+    assert historico.carregar(['2025-02'])['Ordem PagBank'].tolist() == [20, 21]
+    assert historico.total_registros() == 5
+
+
+def test_carregar_com_coluna_ausente_em_uma_particao(tmp_path):
+    historico = HistoricoParticionado(tmp_path)
+    historico.gravar(criar_historico())
+    historico.gravar(pd.DataFrame({
+        'Ordem PagBank': [40], 'Criação da Ordem': pd.to_datetime(['2025-03-01']), 'Feedback': ['ok']
+    }))
+
+    df = historico.carregar(colunas=['Ordem PagBank', 'Feedback'])
+
+    assert len(df) == 6
+    assert df['Feedback'].notna().sum() == 1
+
+
+def test_particoes_afetadas_pela_chave_e_pelo_mes_das_novas(tmp_path):
+    historico = HistoricoParticionado(tmp_path)
+    historico.gravar(criar_historico())
+
+    # Ordem 11 já está em 2025-01 (mesmo vindo com outra data); a 50 é nova, de 2025-04
+    relatorio = pd.DataFrame({
+        'Ordem PagBank': [11, 50],
+        'Criação da Ordem': pd.to_datetime(['2025-04-10', '2025-04-11'])
+    })
+
+    assert historico.particoes_afetadas(relatorio) == {'2025-01', '2025-04'}
+
+
+def test_particoes_afetadas_sem_coluna_de_data(tmp_path):
+    historico = HistoricoParticionado(tmp_path)
+    historico.gravar(criar_historico())
+
+    relatorio = pd.DataFrame({'Ordem PagBank': [21, 99]})
+
+    assert historico.particoes_afetadas(relatorio) == {'2025-02', PARTICAO_SEM_DATA}
+
+
+def test_gravar_substitui_so_as_particoes_afetadas(tmp_path):
+    historico = HistoricoParticionado(tmp_path)
+    historico.gravar(criar_historico())
+    fevereiro = historico._caminho_particao('2025-02').stat().st_mtime_ns
+
+    meses = historico.particoes_afetadas(pd.DataFrame({'Ordem PagBank': [10]}))
+    parcial = historico.carregar(meses)
+    parcial['Status da Ordem'] = 'Fechada'
+    historico.gravar(parcial, substituir=meses)
+
+    assert historico._caminho_particao('2025-02').stat().st_mtime_ns == fevereiro
+    assert set(historico.carregar(['2025-01'])['Status da Ordem']) == {'Fechada'}
+    assert historico.total_registros() == 5
+
+
+def test_gravar_remove_particao_que_ficou_vazia(tmp_path):
+    historico = HistoricoParticionado(tmp_path)
+    historico.gravar(criar_historico())
+
+    restante = historico.carregar(['2025-01'])
+    historico.gravar(restante, substituir=['2025-01', PARTICAO_SEM_DATA])
+
+    assert historico.listar_particoes() == ['2025-01', '2025-02']
+    assert historico.total_registros() == 4
+
+
+def test_resumo_refeito_quando_a_particao_muda_fora_do_gravar(tmp_path):
+    historico = HistoricoParticionado(tmp_path)
+    historico.gravar(criar_historico())
+
+    arquivo = historico._caminho_particao('2025-02')
+    pd.read_parquet(arquivo).head(1).to_parquet(arquivo, index=False)
+
+    resumo = historico.resumo_particoes()['2025-02']
+    assert resumo['linhas'] == 1
+    assert (resumo['chave_min'], resumo['chave_max']) == (20, 20)
@@ -0,0 +1,66 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+from src.manifesto_execucao import ManifestoExecucao
+
+
+def preparar(tmp_path):
+    """Manifesto, uma entrada e uma saída em um diretório temporário"""
+    entrada = tmp_path / 'relatorio.xlsx'
+    entrada.write_bytes(b'relatorio v1')
+    saida = tmp_path / 'consolidado.xlsx'
+    saida.write_bytes(b'consolidado')
+    return ManifestoExecucao(tmp_path / 'manifesto.json'), entrada, saida
+
+
+def test_inalterado_sem_manifesto(tmp_path):
+    manifesto, entrada, _ = preparar(tmp_path)
+
+    assert not manifesto.inalterado(manifesto.calcular_impressao({'relatorio': entrada}, 'cfg'))
+
+
+def test_inalterado_apos_registrar(tmp_path):
+    manifesto, entrada, saida = preparar(tmp_path)
+    impressao = manifesto.calcular_impressao({'relatorio': entrada}, 'cfg')
+    manifesto.registrar(impressao, {'consolidado': saida}, {'linhas': 1})
+
+    assert manifesto.inalterado(manifesto.calcular_impressao({'relatorio': entrada}, 'cfg'))
+
+
+def test_entrada_ou_configuracao_alterada(tmp_path):
+    manifesto, entrada, saida = preparar(tmp_path)
+    manifesto.registrar(manifesto.calcular_impressao({'relatorio': entrada}, 'cfg'), {'consolidado': saida}, {})
+
+    assert not manifesto.inalterado(manifesto.calcular_impressao({'relatorio': entrada}, 'outra cfg'))
+    entrada.write_bytes(b'relatorio v2')
+    assert not manifesto.inalterado(manifesto.calcular_impressao({'relatorio': entrada}, 'cfg'))
+
+
+def test_data_de_referencia_diferente(tmp_path):
+    manifesto, entrada, saida = preparar(tmp_path)
+    impressao = manifesto.calcular_impressao({'relatorio': entrada}, 'cfg')
+    manifesto.registrar({**impressao, 'data_referencia': '2000-01-01'}, {'consolidado': saida}, {})
+
+    assert not manifesto.inalterado(impressao)
+
+
+def test_saida_editada_ou_removida(tmp_path):
+    manifesto, entrada, saida = preparar(tmp_path)
+    impressao = manifesto.calcular_impressao({'relatorio': entrada}, 'cfg')
+    manifesto.registrar(impressao, {'consolidado': saida}, {})
+
+    saida.write_bytes(b'consolidado editado pelos lideres')
+    assert not manifesto.inalterado(impressao)
+
+    manifesto.registrar(impressao, {'consolidado': saida}, {})
+    saida.unlink()
+    assert not manifesto.inalterado(impressao)
+
+
+def test_manifesto_corrompido(tmp_path):
+    manifesto, entrada, _ = preparar(tmp_path)
+    manifesto.arquivo.write_text('{incompleto', encoding='utf-8')
+
+    assert manifesto.carregar() is None
+    assert not manifesto.inalterado(manifesto.calcular_impressao({'relatorio': entrada}, 'cfg'))
@@ -0,0 +1,117 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.append(str(Path(__file__).parent.parent))
+from src.upsert_ordens import diferencas_por_chave, sobrepor_por_chave, upsert_ordens
+
+COLUNAS_ATUALIZAR = ['Status da Ordem', 'SLA Cliente']
+COLUNAS_FEEDBACK = ['Status_Tratativa', 'Feedback']
+
+
+def criar_base() -> pd.DataFrame:
+    """Histórico com três ordens já tratadas pelos líderes"""
+    return pd.DataFrame({
+        'Ordem PagBank': [1, 2, 3],
+        'Status da Ordem': ['Aberta', 'Aberta', 'Aberta'],
+        'SLA Cliente': [2, 3, 4],
+        'Status_Tratativa': ['Em Aberto', 'Tratado', 'Pendente'],
+        'Feedback': ['a', 'b', 'c']
+    })
+
+
+def test_upsert_separa_as_tres_caixas():
+    relatorio = pd.DataFrame({
+        'Ordem PagBank': [2, 3, 4, 5],
+        'Status da Ordem': ['Fechada', 'Em Rota', 'Aberta', 'Aberta'],
+        'SLA Cliente': [5, 6, 7, 8]
+    })
+
+    resultado, contagens = upsert_ordens(criar_base(), relatorio, COLUNAS_ATUALIZAR, COLUNAS_FEEDBACK)
+
+    assert contagens == {'caixa1_historico': 1, 'caixa2_novas': 2, 'caixa3_atualizadas': 2, 'duplicadas_diario': 0}
+    assert sorted(resultado['Ordem PagBank'].tolist()) == [1, 2, 3, 4, 5]
+    atualizada = resultado.set_index('Ordem PagBank').loc[2]
+    assert atualizada['Status da Ordem'] == 'Fechada'
+    assert atualizada['SLA Cliente'] == 5
+
+
+def test_upsert_preserva_colunas_de_feedback():
+    # O diário também traz as colunas de feedback: as do histórico prevalecem
+    relatorio = pd.DataFrame({
+        'Ordem PagBank': [1, 2],
+        'Status da Ordem': ['Fechada', 'Fechada'],
+        'Status_Tratativa': ['Sobrescrito', None],
+        'Feedback': ['x', None]
+    })
+
+    resultado, _ = upsert_ordens(criar_base(), relatorio, COLUNAS_ATUALIZAR + COLUNAS_FEEDBACK, COLUNAS_FEEDBACK)
+
+    por_chave = resultado.set_index('Ordem PagBank')
+    assert por_chave.loc[1, 'Status_Tratativa'] == 'Em Aberto'
+    assert por_chave.loc[1, 'Feedback'] == 'a'
+    assert por_chave.loc[2, 'Status_Tratativa'] == 'Tratado'
+    assert por_chave.loc[1, 'Status da Ordem'] == 'Fechada'
+
+
+def test_upsert_mantem_a_primeira_chave_duplicada_do_diario():
+    relatorio = pd.DataFrame({
+        'Ordem PagBank': [2, 2, 6, 6, None],
+        'Status da Ordem': ['Primeira', 'Segunda', 'Nova', 'Repetida', 'Sem chave']
+    })
+
+    resultado, contagens = upsert_ordens(criar_base(), relatorio, COLUNAS_ATUALIZAR, COLUNAS_FEEDBACK)
+
+    assert contagens['duplicadas_diario'] == 2
+    assert contagens['caixa3_atualizadas'] == 1
+    # A ordem 6 entra uma vez e a linha sem chave entra como nova
+    assert contagens['caixa2_novas'] == 2
+    assert len(resultado) == 5
+    por_status = resultado.set_index('Status da Ordem')
+    assert 'Segunda' not in por_status.index and 'Repetida' not in por_status.index
+    assert resultado.loc[resultado['Ordem PagBank'] == 2, 'Status da Ordem'].item() == 'Primeira'
+
+
+def test_upsert_aceita_chave_como_texto():
+    base = criar_base().assign(**{'Ordem PagBank': ['1', '2', '3']})
+    relatorio = pd.DataFrame({'Ordem PagBank': ['2.0'], 'Status da Ordem': ['Fechada']})
+
+    resultado, contagens = upsert_ordens(base, relatorio, COLUNAS_ATUALIZAR, COLUNAS_FEEDBACK)
+
+    assert contagens['caixa3_atualizadas'] == 1
+    assert resultado['Ordem PagBank'].dtype == 'Int64'
+
+
+def test_diferencas_por_chave_acha_so_o_feedback_editado():
+    planilha = pd.DataFrame({
+        'Ordem PagBank': [1, 2, 3, 9],
+        'Status_Tratativa': ['Em Aberto', 'Reaberto', 'Pendente', 'Sem histórico'],
+        'Feedback': ['a', 'b', 'novo', 'z']
+    })
+
+    edicoes = diferencas_por_chave(criar_base(), planilha, COLUNAS_FEEDBACK)
+
+    assert edicoes['Ordem PagBank'].tolist() == [2, 3]
+    assert edicoes['Status_Tratativa'].tolist() == ['Reaberto', 'Pendente']
+    # As demais colunas vêm do histórico (ex.: a data que define a partição)
+    assert edicoes['SLA Cliente'].tolist() == [3, 4]
+
+
+def test_diferencas_por_chave_ignora_nulos_e_tipos_diferentes():
+    base = criar_base().astype({'Status_Tratativa': 'category'})
+    base.loc[0, 'Feedback'] = None
+    planilha = criar_base().astype({'Feedback': 'string'})
+    planilha.loc[0, 'Feedback'] = ''
+
+    assert diferencas_por_chave(base, planilha, COLUNAS_FEEDBACK).empty
+
+
+def test_sobrepor_por_chave_aceita_categoria_nova():
+    base = criar_base().astype({'Status_Tratativa': 'category'})
+    edicoes = pd.DataFrame({'Ordem PagBank': [3], 'Status_Tratativa': ['Escalado']})
+
+    resultado = sobrepor_por_chave(base, edicoes)
+
+    assert resultado['Status_Tratativa'].tolist() == ['Em Aberto', 'Tratado', 'Escalado']
+    assert resultado['Feedback'].tolist() == ['a', 'b', 'c']